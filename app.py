@@ -8,6 +8,10 @@ from views.admin import show_admin_page
 from views.my_reports import show_my_reports_page
 from views.auth import show_login_page, show_register_page
 from views.about import show_about_page
+from utils.profiler import Profiler
+from utils.metrics import Metrics
+from utils.backup import BackupManager
+from utils.api import ReportApi
 
 # 1. Page Configuration (Must be first)
 st.set_page_config(
@@ -17,10 +21,23 @@ st.set_page_config(
     initial_sidebar_state="collapsed"  # Hide sidebar completely
 )
 
+# Per-rerun timing spans and counters (see utils/profiler.py)
+Profiler.install()
+Profiler.start_run()
+# Prometheus-style metrics endpoint/file, if configured (see utils/metrics.py)
+Metrics.start_exporters()
+# Periodic store backups (see utils/backup.py)
+BackupManager.start_scheduler()
+# Headless JSON API on NN_API_PORT, if configured (see utils/api.py)
+ReportApi.start_configured()
+
 # 2. Initialize Data & Auth & Theme
-DataManager.init_db()
-AuthManager.init_session()
-UIManager.init_theme()
+with Profiler.span("app.init"):
+    DataManager.init_db()
+    DataManager.sync()  # Pick up changes other sessions made since our last run
+    DataManager.maybe_archive()  # Hourly: move long-resolved reports to cold storage
+    AuthManager.init_session()
+    UIManager.init_theme()
 
 # 3. Handle Session Persistence
 if not AuthManager.is_authenticated():
@@ -33,23 +50,27 @@ UIManager.load_css()
 
 # 3. Render Navbar
 current_page = UIManager.render_navbar()
+Profiler.set_name(current_page)
+Metrics.record_rerun(Profiler.session_id(), current_page)
 
 # 4. Route to appropriate page based on navbar selection
-if current_page == "home":
-    show_dashboard()
-elif current_page == "login":
-    show_login_page()
-elif current_page == "register":
-    show_register_page()
-elif current_page == "my_reports":
-    show_my_reports_page()
-elif current_page == "submit_report":
-    show_report_page()
-elif current_page == "about":
-    show_about_page()
-elif current_page == "admin":
-    show_admin_page()
-else:
-    show_dashboard()  # Default page
+with Profiler.span("app.route"):
+    if current_page == "home":
+        show_dashboard()
+    elif current_page == "login":
+        show_login_page()
+    elif current_page == "register":
+        show_register_page()
+    elif current_page == "my_reports":
+        show_my_reports_page()
+    elif current_page == "submit_report":
+        show_report_page()
+    elif current_page == "about":
+        show_about_page()
+    elif current_page == "admin":
+        show_admin_page()
+    else:
+        show_dashboard()  # Default page
 # 5. Render Footer
 UIManager.render_footer()
+Profiler.end_run()
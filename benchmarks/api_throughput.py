@@ -0,0 +1,201 @@
+"""
+Write and read throughput of the headless JSON API (utils/api.py).
+
+Starts the API on an ephemeral port against a synthetic report store and
+drives it from several client threads: report submissions over keep-alive
+connections, the same with a new connection per request, and a paginated
+GET /reports walk over the whole store. For comparison, the same kind of
+submission is timed through the UI path (an AppTest session filling in and
+submitting the report form).
+
+Usage:
+    python -m benchmarks.api_throughput --reports 10000 --clients 8 --requests 200
+"""
+
+import argparse
+import http.client
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPORT = {
+    "title": "Blocked drain on the main road",
+    "description": "Submitted by the API throughput benchmark.",
+    "category": "Road & Infrastructure Issues",
+    "subcategory": "Blocked drains/gutters",
+    "division": "Dhaka",
+    "district": "Dhaka",
+}
+
+
+def _setup(workdir, reports, backend):
+    """Point the stores at `workdir`, seed it and return (user token, admin token)."""
+    from benchmarks.load_test import _seed
+    from utils.archive import ReportArchive
+    from utils.auth_manager import AuthManager
+    from utils.backup import BackupManager
+    from utils.data_manager import DataManager
+
+    _seed(workdir, reports, users=1)
+    DataManager.DB_FILE = os.path.join(workdir, "reports_db.json")
+    DataManager.BACKEND = backend
+    DataManager.SQLITE_PATH = os.path.join(workdir, "reports.sqlite3")
+    DataManager.NOTIFY_PATH = os.path.join(workdir, "notifications.sqlite3")
+    AuthManager.USERS_FILE = os.path.join(workdir, "users_db.json")
+    AuthManager.SESSIONS_FILE = os.path.join(workdir, "sessions_db.json")
+    ReportArchive.ARCHIVE_DIR = os.path.join(workdir, "archive")
+    BackupManager.BACKUP_DIR = os.path.join(workdir, "backups")
+    return AuthManager.create_session("user0"), AuthManager.create_session(AuthManager.ADMIN_USERNAME)
+
+
+def _request(conn, method, path, token, body=None):
+    headers = {"Authorization": f"Bearer {token}"}
+    if body is not None:
+        body = json.dumps(body)
+        headers["Content-Type"] = "application/json"
+    conn.request(method, path, body=body, headers=headers)
+    response = conn.getresponse()
+    payload = json.loads(response.read())
+    if response.status >= 400:
+        raise RuntimeError(f"{method} {path}: {response.status} {payload}")
+    return payload
+
+
+def _drive(port, token, clients, requests, keep_alive):
+    """Submit `requests` reports from each of `clients` threads; returns (seconds, latencies ms)."""
+    latencies, errors = [], []
+    start = threading.Barrier(clients + 1)
+
+    def client():
+        conn = http.client.HTTPConnection("127.0.0.1", port)
+        samples = []
+        start.wait()
+        try:
+            for _ in range(requests):
+                began = time.perf_counter()
+                if not keep_alive:
+                    conn.close()
+                    conn = http.client.HTTPConnection("127.0.0.1", port)
+                _request(conn, "POST", "/reports", token, REPORT)
+                samples.append((time.perf_counter() - began) * 1000)
+        except Exception as e:
+            errors.append(str(e))
+        finally:
+            conn.close()
+        latencies.extend(samples)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for t in threads:
+        t.start()
+    start.wait()
+    began = time.perf_counter()
+    for t in threads:
+        t.join()
+    if errors:
+        raise RuntimeError(errors[0])
+    return time.perf_counter() - began, latencies
+
+
+def _walk(port, token, limit):
+    """Page through GET /reports; returns (seconds, pages, reports)."""
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    began = time.perf_counter()
+    pages = seen = 0
+    cursor = ""
+    while True:
+        page = _request(conn, "GET", f"/reports?limit={limit}&cursor={cursor}", token)
+        pages += 1
+        seen += len(page["reports"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    conn.close()
+    return time.perf_counter() - began, pages, seen
+
+
+def _ui_submissions(count):
+    """Time `count` report submissions through the Streamlit form; returns seconds per submission."""
+    from benchmarks.load_test import PASSWORD, VirtualUser
+
+    user = VirtualUser([])
+    user.login("user0", PASSWORD)
+    user.step("report_form", lambda at: at.button(key="nav_report").click())
+    timings = []
+    for i in range(count):
+        def submit(at):
+            at.text_input[0].input(f"UI benchmark issue {i}")
+            at.text_area[0].input("Submitted through the report form.")
+            user.button("Submit Official Report").click()
+        began = time.perf_counter()
+        user.step("report_submit", submit)
+        timings.append(time.perf_counter() - began)
+    return statistics.median(timings)
+
+
+def _summary(label, seconds, latencies):
+    latencies = sorted(latencies)
+    rate = len(latencies) / seconds
+    print(f"  {label:<28}{rate:>9.0f} req/s   p50 {latencies[len(latencies) // 2]:6.1f} ms"
+          f"   p99 {latencies[int(len(latencies) * 0.99)]:6.1f} ms")
+    return rate
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="NagarNirman headless API throughput")
+    parser.add_argument("--reports", type=int, default=10000, help="reports in the store")
+    parser.add_argument("--clients", type=int, default=8, help="concurrent client threads")
+    parser.add_argument("--requests", type=int, default=200, help="submissions per client")
+    parser.add_argument("--backend", choices=("json", "sqlite"), default="json",
+                        help="report store backend (see DataManager.BACKEND)")
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--ui-submissions", type=int, default=10,
+                        help="submissions timed through the UI (0 skips)")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args(argv)
+
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+    import streamlit  # noqa: F401  (configures its loggers on import)
+    # Bare-mode Streamlit logs a warning for every session_state access
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    from utils.api import ReportApi
+    from utils.rate_limit import RateLimits
+    # One client submitting hundreds of reports is exactly what the limits stop
+    RateLimits.ENABLED = False
+
+    with tempfile.TemporaryDirectory(prefix="nn-api-") as workdir:
+        user_token, admin_token = _setup(workdir, args.reports, args.backend)
+        server = ReportApi.start(0)
+        port = server.server_address[1]
+        print(f"{args.reports} reports ({args.backend}), {args.clients} clients x {args.requests} submissions")
+
+        results = {}
+        seconds, latencies = _drive(port, user_token, args.clients, args.requests, keep_alive=True)
+        results["post_keepalive_per_s"] = _summary("POST /reports (keep-alive)", seconds, latencies)
+        seconds, latencies = _drive(port, user_token, args.clients, args.requests, keep_alive=False)
+        results["post_reconnect_per_s"] = _summary("POST /reports (reconnect)", seconds, latencies)
+        seconds, pages, seen = _walk(port, admin_token, args.page_size)
+        results["get_reports_per_s"] = seen / seconds
+        print(f"  {'GET /reports walk':<28}{seen / seconds:>9.0f} reports/s ({pages} pages of {args.page_size})")
+        server.shutdown()
+
+        if args.ui_submissions:
+            ui_seconds = _ui_submissions(args.ui_submissions)
+            results["ui_submit_per_s"] = 1 / ui_seconds
+            print(f"  {'UI form submission':<28}{1 / ui_seconds:>9.1f} req/s   "
+                  f"(API is {results['post_keepalive_per_s'] * ui_seconds:.0f}x faster)")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
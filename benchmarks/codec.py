@@ -0,0 +1,86 @@
+"""
+Save/load cost and size of each report store encoding (utils/codec.py).
+
+For every available format and compression, writes a synthetic partition
+with write_store() and reads it back with read_json() (which detects the
+format), at several dataset sizes. The baseline the others are compared
+with is how the store used to be handled: "pretty" JSON with no
+compression, written and read by the stdlib json module. Every file must
+decode to the data that was written.
+
+Usage:
+    python -m benchmarks.codec --sizes 1000 10000 100000
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import make_reports
+from utils import codec
+from utils.codec import available_compressions, available_formats, detect
+from utils.storage import read_json, write_store
+
+
+def _best_of(fn, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        began = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - began)
+    return best * 1000
+
+
+def run(sizes, repeats):
+    results = []
+    with tempfile.TemporaryDirectory(prefix="nn-codec-") as workdir:
+        for size in sizes:
+            reports = make_reports(size)
+            baseline = None
+            print(f"\n{size} reports (orjson {'on' if codec.orjson is not None else 'off'})")
+            print(f"  {'format':<17}{'compression':<13}{'MB':>8}{'save ms':>10}{'load ms':>10}"
+                  f"{'vs pretty save/load/size':>28}")
+            cases = [("pretty", "none", True)] + [(fmt, compression, False) for fmt in available_formats()
+                                                   for compression in available_compressions()]
+            for fmt, compression, stdlib in cases:
+                path = os.path.join(workdir, f"{fmt}-{compression}.json")
+                fast_json, codec.orjson = codec.orjson, None if stdlib else codec.orjson
+                try:
+                    save_ms = _best_of(lambda: write_store(path, reports, fmt, compression, fsync=False), repeats)
+                    load_ms = _best_of(lambda: read_json(path, None), repeats)
+                finally:
+                    codec.orjson = fast_json
+                with open(path, "rb") as f:
+                    detected = detect(f.read())
+                if read_json(path, None) != reports or detected != (fmt, compression):
+                    raise RuntimeError(f"{fmt}/{compression} did not round-trip")
+                row = {"size": size, "format": fmt, "compression": compression, "stdlib": stdlib,
+                       "bytes": os.path.getsize(path), "save_ms": save_ms, "load_ms": load_ms}
+                baseline = baseline or row
+                results.append(row)
+                label = f"{fmt} (stdlib)" if stdlib else fmt
+                print(f"  {label:<17}{compression:<13}{row['bytes'] / 1e6:>8.2f}{save_ms:>10.1f}{load_ms:>10.1f}"
+                      f"{baseline['save_ms'] / save_ms:>12.1f}x{baseline['load_ms'] / load_ms:>7.1f}x"
+                      f"{baseline['bytes'] / row['bytes']:>7.1f}x")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="NagarNirman store encoding benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.repeats)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""
+Cold start of a session against a large report store, per partition format.
+
+For each dataset size, writes a synthetic store in every format and then
+times what the first dashboard render asks of DataManager: opening the
+store (_reload), the hourly archive check app.py runs on start, the
+headline counts and the map coordinates (columnar snapshot), and page 1 of
+the issue feed. Also counts the reports that had to be decoded. With the
+"indexed" format opening the store should not grow with its size and page
+1 should decode FEED_PAGE_SIZE reports; the run fails otherwise.
+
+The files were just written, so they are in the page cache: this measures
+decoding, not disk reads.
+
+Usage:
+    python -m benchmarks.cold_start --sizes 10000 100000 1000000
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+import streamlit as st
+
+from benchmarks.synthetic import make_reports
+
+# Bare-mode Streamlit logs a warning for every session_state access
+logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+from utils.data_manager import DataManager, _shared_report_file  # noqa: E402
+from utils.report_file import LazyReports  # noqa: E402
+from views.dashboard import FEED_PAGE_SIZE  # noqa: E402
+
+FORMATS = ("json", "indexed")
+
+
+def _ms(fn):
+    began = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - began) * 1000, result
+
+
+def _store_bytes():
+    root = DataManager.partition_dir()
+    return sum(os.path.getsize(os.path.join(d, name)) for d, _, files in os.walk(root) for name in files)
+
+
+def run(size, fmt, workdir):
+    today = date.today().isoformat()
+    reports = make_reports(size)
+    for r in reports:
+        # Recently resolved, so the archive check has nothing to move
+        r["resolved_at"] = today if r["status"] == "Resolved" else None
+    DataManager.DB_FILE = os.path.join(workdir, f"{fmt}-{size}", "reports_db.json")
+    DataManager.STORE_FORMAT = fmt
+    os.makedirs(os.path.dirname(DataManager.DB_FILE))
+    DataManager._write_all(reports)
+    del reports
+    _shared_report_file.clear()
+    for key in ("reports", "report_rows", "report_columns", "division_scope"):
+        st.session_state.pop(key, None)
+
+    row = {"size": size, "format": fmt, "mb": _store_bytes() / 1e6}
+    row["open_ms"], _ = _ms(DataManager.init_db)
+    row["archive_ms"], _ = _ms(DataManager.archive_resolved)
+    row["counts_ms"], _ = _ms(lambda: (DataManager.count_reports(), DataManager.count_reports("status", "Resolved"),
+                                       DataManager.get_reports_frame(["lat", "lon"])))
+    row["page_ms"], page = _ms(lambda: DataManager.get_reports_page(0, FEED_PAGE_SIZE))
+    reports = st.session_state.reports
+    row["decoded"] = reports.decoded if isinstance(reports, LazyReports) else len(reports)
+    row["first_render_ms"] = row["open_ms"] + row["archive_ms"] + row["counts_ms"] + row["page_ms"]
+    if [r["id"] for r in page] != list(range(size, size - FEED_PAGE_SIZE, -1)):
+        raise RuntimeError(f"{fmt}: page 1 of the feed is wrong")
+    print(f"  {size:>9} {fmt:<9}{row['mb']:>9.1f}{row['open_ms']:>10.1f}{row['archive_ms']:>11.1f}"
+          f"{row['counts_ms']:>11.1f}{row['page_ms']:>9.1f}{row['first_render_ms']:>10.1f}{row['decoded']:>10}")
+    return row
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="NagarNirman cold-start benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args(argv)
+
+    print(f"  {'reports':>9} {'format':<9}{'MB':>9}{'open ms':>10}{'archive ms':>11}"
+          f"{'counts ms':>11}{'page ms':>9}{'total ms':>10}{'decoded':>10}")
+    with tempfile.TemporaryDirectory(prefix="nn-cold-") as workdir:
+        results = [run(size, fmt, workdir) for size in args.sizes for fmt in args.formats]
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    failed = False
+    indexed = [r for r in results if r["format"] == "indexed"]
+    if indexed:
+        if any(r["decoded"] > FEED_PAGE_SIZE for r in indexed):
+            print(f"FAIL: an indexed store decoded more than page 1 of the feed ({FEED_PAGE_SIZE} reports)")
+            failed = True
+        smallest, largest = min(indexed, key=lambda r: r["size"]), max(indexed, key=lambda r: r["size"])
+        # Opening maps the files and reads their ids; allow some slack for the id merge
+        if largest["size"] > smallest["size"] and largest["open_ms"] > max(10 * smallest["open_ms"], 50):
+            print("FAIL: opening an indexed store grows with its size")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,272 @@
+"""
+Micro-benchmarks for the DataManager, AuthManager and UIManager hot paths.
+
+Every benchmark runs at several dataset sizes outside a Streamlit server
+(st.session_state and st.markdown work in bare mode). Results are stored as
+JSON and can be compared against a saved baseline; the run exits non-zero
+when any benchmark is slower than the baseline by more than the threshold.
+
+Usage:
+    python -m benchmarks.hot_paths --save results.json
+    python -m benchmarks.hot_paths --baseline results.json --threshold 1.25
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+import streamlit as st
+
+from benchmarks.synthetic import make_reports
+from utils.auth_manager import AuthManager
+from utils.data_manager import DataManager
+from utils.rate_limit import RateLimits
+from utils.report_record import Report
+from utils.ui_manager import UIManager
+
+PASSWORD = "bench-pass"
+# Benchmarks that are O(N) with a large constant stop at this size
+PDF_MAX_SIZE = 2000
+
+
+def _reset_store(workdir, size):
+    """Point DataManager at a fresh file holding `size` synthetic reports."""
+    DataManager.DB_FILE = os.path.join(workdir, "reports_db.json")
+    reports = make_reports(size)
+    with open(DataManager.DB_FILE, "w", encoding="utf-8") as f:
+        json.dump(reports, f)
+    for key in list(st.session_state.keys()):
+        del st.session_state[key]
+    DataManager.init_db()
+    return reports
+
+
+def _reset_auth(workdir, size):
+    """Point AuthManager at user/session files with `size` accounts."""
+    AuthManager.USERS_FILE = os.path.join(workdir, "users_db.json")
+    AuthManager.SESSIONS_FILE = os.path.join(workdir, "sessions_db.json")
+    users = {
+        f"user{i}": {
+            "password_hash": AuthManager._hash_password(PASSWORD),
+            "email": f"user{i}@example.com",
+            "full_name": f"User {i}",
+            "role": "user",
+            "created_at": "2025-01-01 00:00:00",
+        }
+        for i in range(size)
+    }
+    sessions = {f"token{i}": {"username": f"user{i}", "created_at": "2025-01-01 00:00:00"}
+                for i in range(size)}
+    with open(AuthManager.USERS_FILE, "w", encoding="utf-8") as f:
+        json.dump(users, f)
+    with open(AuthManager.SESSIONS_FILE, "w", encoding="utf-8") as f:
+        json.dump(sessions, f)
+    AuthManager.init_session()
+
+
+# Each setup takes (workdir, size) and returns the zero-argument callable to time.
+
+def setup_add_report(workdir, size):
+    _reset_store(workdir, size)
+    return lambda: DataManager.add_report("Bench", "Garbage & Sanitation", "Illegal dumping",
+                                          "Benchmark report", "Dhaka", "Dhaka",
+                                          23.81, 90.41, username="user1")
+
+
+def setup_update_status(workdir, size):
+    _reset_store(workdir, size)
+    statuses = itertools.cycle(["Pending", "In Progress", "Resolved"])
+    # The last report
+    return lambda: DataManager.update_status(size, next(statuses))
+
+
+def setup_get_reports_by_user(workdir, size):
+    _reset_store(workdir, size)
+    return lambda: DataManager.get_reports_by_user("user7")
+
+
+def setup_get_user_reports(workdir, size):
+    _reset_store(workdir, size)
+
+    # What a My Submissions rerun asks for: the cached view, its cards and its table
+    def render_data():
+        view = DataManager.get_user_reports("user7")
+        return view.newest(), view.frame()
+    return render_data
+
+
+def setup_load_from_file(workdir, size):
+    _reset_store(workdir, size)
+    return DataManager._load_from_file
+
+
+def setup_save_to_file(workdir, size):
+    _reset_store(workdir, size)
+    reports = DataManager.get_all_reports()
+    return lambda: DataManager._save_to_file(reports)
+
+
+def setup_login(workdir, size):
+    _reset_auth(workdir, size)
+    login = lambda: AuthManager.login(f"user{size - 1}", PASSWORD)
+    # A refused login is fast and would hide a slow one
+    ok, message = login()
+    if not ok:
+        raise RuntimeError(f"login failed: {message}")
+    return login
+
+
+def setup_validate_session(workdir, size):
+    _reset_auth(workdir, size)
+    return lambda: AuthManager.validate_session(f"token{size - 1}")
+
+
+def setup_register_user(workdir, size):
+    _reset_auth(workdir, size)
+    counter = itertools.count()
+    def register():
+        n = next(counter)
+        return AuthManager.register_user(f"bench{n}", PASSWORD, f"bench{n}@example.com", "Bench")
+    ok, message = register()
+    if not ok:
+        raise RuntimeError(f"register_user failed: {message}")
+    return register
+
+
+def setup_render_cards_grid(workdir, size):
+    reports = [Report.from_dict(r) for r in make_reports(size)]
+    return lambda: UIManager.render_report_cards_grid(reports)
+
+
+def setup_generate_reports_pdf(workdir, size):
+    reports = [Report.from_dict(r) for r in make_reports(min(size, PDF_MAX_SIZE))]
+    # generate_reports_pdf reports failures via st.error and returns None;
+    # timing that fast failure path would hide a broken export
+    if DataManager.generate_reports_pdf(reports) is None:
+        raise RuntimeError("generate_reports_pdf failed")
+    return lambda: DataManager.generate_reports_pdf(reports)
+
+
+def setup_report_generator_pdf(workdir, size):
+    from utils.report_generator import ReportGenerator
+    # ReportGenerator predates categories and reads the legacy 'type' key
+    reports = [dict(r, type=r["category"][:15]) for r in make_reports(min(size, PDF_MAX_SIZE))]
+    return lambda: ReportGenerator.generate_pdf(reports)
+
+
+BENCHMARKS = {
+    "DataManager.add_report": setup_add_report,
+    "DataManager.update_status": setup_update_status,
+    "DataManager.get_reports_by_user": setup_get_reports_by_user,
+    "DataManager.get_user_reports": setup_get_user_reports,
+    "DataManager._load_from_file": setup_load_from_file,
+    "DataManager._save_to_file": setup_save_to_file,
+    "AuthManager.login": setup_login,
+    "AuthManager.validate_session": setup_validate_session,
+    "AuthManager.register_user": setup_register_user,
+    "UIManager.render_report_cards_grid": setup_render_cards_grid,
+    "DataManager.generate_reports_pdf": setup_generate_reports_pdf,
+    "ReportGenerator.generate_pdf": setup_report_generator_pdf,
+}
+
+
+def time_call(fn, min_time=0.2, repeats=5):
+    """Median seconds per call over `repeats` batches of at least `min_time` each."""
+    fn()  # warm-up
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1_000_000:
+            break
+        number *= 2
+    samples = [elapsed / number]
+    for _ in range(repeats - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number)
+    return statistics.median(samples)
+
+
+def run(sizes, only=None, min_time=0.2):
+    workdir = tempfile.mkdtemp(prefix="nn-bench-")
+    cwd = os.getcwd()
+    results = {}
+    try:
+        # Anything written relative to the working directory stays in workdir
+        os.chdir(workdir)
+        for name, setup in BENCHMARKS.items():
+            if only and not any(pattern in name for pattern in only):
+                continue
+            for size in sizes:
+                seconds = time_call(setup(workdir, size), min_time=min_time)
+                results[f"{name}@{size}"] = {"benchmark": name, "size": size, "seconds": seconds}
+                print(f"{name:<38}{size:>9}{seconds * 1e3:>12.3f} ms")
+    finally:
+        os.chdir(cwd)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Print ratios against the baseline and return the regressed keys."""
+    regressions = []
+    print(f"\n{'benchmark':<48}{'baseline ms':>13}{'now ms':>10}{'ratio':>8}")
+    for key, result in results.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        ratio = result["seconds"] / base["seconds"] if base["seconds"] else float("inf")
+        flag = "  REGRESSION" if ratio > threshold else ""
+        print(f"{key:<48}{base['seconds'] * 1e3:>13.3f}{result['seconds'] * 1e3:>10.3f}{ratio:>8.2f}{flag}")
+        if ratio > threshold:
+            regressions.append(key)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="NagarNirman hot-path micro-benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--only", nargs="+", help="run benchmarks whose name contains any of these")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per timing batch")
+    parser.add_argument("--save", help="write results JSON to this file")
+    parser.add_argument("--baseline", help="compare against a previously saved results JSON")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="slowdown ratio that counts as a regression")
+    args = parser.parse_args(argv)
+
+    # Bare-mode Streamlit logs a warning for every session_state access
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    # Logging in and registering in a loop is exactly what the limits stop
+    RateLimits.ENABLED = False
+
+    results = run(args.sizes, args.only, args.min_time)
+    payload = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "results": results,
+    }
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
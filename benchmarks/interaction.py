@@ -0,0 +1,106 @@
+"""
+Interaction benchmark: server time per click, measured with Streamlit's AppTest.
+
+AppTest always reruns the whole script, so a click inside a fragment is
+measured by running that fragment alone in its own script, which is what
+the Streamlit server executes for a fragment-scoped rerun. Compare the
+fragment rows with the full-rerun rows to see the per-click saving.
+
+Usage:
+    python -m benchmarks.interaction [reports] [repeats] [--json out.json]
+"""
+
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.synthetic import make_reports
+from utils.archive import ReportArchive
+from utils.assignment import Assignments
+from utils.backup import BackupManager
+from utils.data_manager import DataManager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "app.py")
+
+FRAGMENT_SCRIPT = """
+from utils.data_manager import DataManager
+from {module} import {function}
+DataManager.init_db()
+{function}()
+"""
+
+# name -> (page, role, fragment module, fragment function); a fragment of
+# None means the interaction triggers a full app rerun.
+SCENARIOS = {
+    "full rerun: dashboard": ("home", None, None, None),
+    "full rerun: admin page": ("admin", "admin", None, None),
+    "fragment: dashboard metrics": ("home", None, "views.dashboard", "_metrics_fragment"),
+    "fragment: dashboard map": ("home", None, "views.dashboard", "_map_fragment"),
+    "fragment: dashboard district heatmap": ("home", None, "views.dashboard", "_district_heatmap"),
+    "fragment: dashboard feed": ("home", None, "views.dashboard", "_feed_fragment"),
+    "fragment: admin status panel": ("admin", "admin", "views.admin", "_status_panel"),
+    "fragment: admin export panel": ("admin", "admin", "views.admin", "_export_panel"),
+    "fragment: admin audit feed": ("admin", "admin", "views.admin", "_audit_feed"),
+}
+
+
+def _build(page, role, module, function):
+    if module:
+        at = AppTest.from_string(FRAGMENT_SCRIPT.format(module=module, function=function),
+                                 default_timeout=120)
+    else:
+        at = AppTest.from_file(APP, default_timeout=120)
+    if role:
+        at.session_state.authenticated = True
+        at.session_state.user = {"username": role, "full_name": role}
+        at.session_state.role = role
+    at.session_state.current_page = page
+    # First run loads the report store into session state; it is not timed
+    at.run()
+    return at
+
+
+def _time_rerun(at):
+    start = time.perf_counter()
+    at.run()
+    return (time.perf_counter() - start) * 1000
+
+
+def main(count=2000, repeats=5, json_path=None):
+    workdir = tempfile.mkdtemp()
+    # The app runs from ROOT; everything it writes goes to the workdir
+    DataManager.DB_FILE = os.path.join(workdir, "reports_db.json")
+    DataManager.SQLITE_PATH = os.path.join(workdir, "reports.sqlite3")
+    DataManager.NOTIFY_PATH = os.path.join(workdir, "notifications.sqlite3")
+    ReportArchive.ARCHIVE_DIR = os.path.join(workdir, "archive")
+    BackupManager.BACKUP_DIR = os.path.join(workdir, "backups")
+    Assignments.FILE = os.path.join(workdir, "assignments.json")
+    with open(DataManager.DB_FILE, "w", encoding="utf-8") as f:
+        json.dump(make_reports(count), f)
+
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+    results = {}
+    for name, scenario in SCENARIOS.items():
+        at = _build(*scenario)
+        results[name] = statistics.median(_time_rerun(at) for _ in range(repeats))
+        print(f"{name:<32} {results[name]:9.1f} ms")
+
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump({"reports": count, "median_ms": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    out = None
+    if "--json" in args:
+        out = args[args.index("--json") + 1]
+        args = args[:args.index("--json")]
+    main(*(int(a) for a in args), json_path=out)
@@ -0,0 +1,215 @@
+"""
+Load test: concurrent virtual users driving app.py through Streamlit's AppTest.
+
+Each worker process plays several virtual users. Every user is an AppTest
+session running a scripted journey:
+- citizen: login page -> log in -> dashboard -> submit a report -> My Reports
+- admin:   log in -> admin dashboard -> change a status -> apply
+
+The report store is seeded with a synthetic dataset of the requested size.
+Per-page latency percentiles, overall throughput and peak RSS per session
+are printed, and optionally written as JSON.
+
+Usage:
+    python -m benchmarks.load_test --reports 1000 10000 --processes 4 --users 8
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "app.py")
+PASSWORD = "loadtest-pass"
+
+
+def _seed(workdir, reports, users):
+    """Write the report, user and session files the workers point at."""
+    from benchmarks.synthetic import make_reports
+    from utils.auth_manager import AuthManager
+
+    with open(os.path.join(workdir, "reports_db.json"), "w", encoding="utf-8") as f:
+        json.dump(make_reports(reports, users=users), f)
+    accounts = {
+        f"user{i}": {
+            "password_hash": AuthManager._hash_password(PASSWORD),
+            "email": f"user{i}@example.com",
+            "full_name": f"Load User {i}",
+            "role": "user",
+            "created_at": "2025-01-01 00:00:00",
+        }
+        for i in range(users)
+    }
+    with open(os.path.join(workdir, "users_db.json"), "w", encoding="utf-8") as f:
+        json.dump(accounts, f)
+    with open(os.path.join(workdir, "sessions_db.json"), "w", encoding="utf-8") as f:
+        json.dump({}, f)
+
+
+class VirtualUser:
+    """One browser session; records (page, milliseconds) for every rerun."""
+
+    def __init__(self, samples):
+        from streamlit.testing.v1 import AppTest
+        self.at = AppTest.from_file(APP, default_timeout=300)
+        self.samples = samples
+
+    def step(self, page, action=None):
+        if action:
+            action(self.at)
+        start = time.perf_counter()
+        self.at.run()
+        self.samples.append((page, (time.perf_counter() - start) * 1000))
+        if self.at.exception:
+            raise RuntimeError(f"{page}: {self.at.exception[0].message}")
+
+    def button(self, label):
+        return next(b for b in self.at.button if label in str(b.label))
+
+    def login(self, username, password):
+        self.at.session_state.current_page = "login"
+        self.step("login")
+        def fill(at):
+            at.text_input[0].input(username)
+            at.text_input[1].input(password)
+            self.button("Unlock").click()
+        self.step("login_submit", fill)
+
+
+def citizen_journey(user, n):
+    user.login(f"user{n}", PASSWORD)
+    user.step("dashboard", lambda at: at.button(key="nav_home").click())
+    user.step("report_form", lambda at: at.button(key="nav_report").click())
+    def submit(at):
+        at.text_input[0].input(f"Load test issue from user{n}")
+        at.text_area[0].input("Synthetic report created by the load test.")
+        user.button("Submit Official Report").click()
+    user.step("report_submit", submit)
+    user.step("my_reports", lambda at: at.button(key="nav_my").click())
+
+
+def admin_journey(user, n):
+    from utils.auth_manager import AuthManager
+    # AuthManager keeps the admin password as a hash, so log in directly
+    user.at.session_state.authenticated = True
+    user.at.session_state.user = {"username": AuthManager.ADMIN_USERNAME, "full_name": "Administrator"}
+    user.at.session_state.role = "admin"
+    user.at.session_state.current_page = "admin"
+    user.step("admin")
+    def apply(at):
+        reports = at.session_state.reports
+        at.number_input(key="status_report_id").set_value(reports[n % len(reports)]['id'])
+        {box.label: box for box in at.selectbox}["New Status"].select("Resolved")
+        user.button("Apply Update").click()
+    user.step("admin_update", apply)
+
+
+def _worker(args):
+    workdir, worker_id, users, admin_every = args
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+    from utils.archive import ReportArchive
+    from utils.assignment import Assignments
+    from utils.auth_manager import AuthManager
+    from utils.backup import BackupManager
+    from utils.data_manager import DataManager
+    # The app runs from ROOT; everything it writes goes to the workdir
+    DataManager.DB_FILE = os.path.join(workdir, "reports_db.json")
+    DataManager.SQLITE_PATH = os.path.join(workdir, "reports.sqlite3")
+    DataManager.NOTIFY_PATH = os.path.join(workdir, "notifications.sqlite3")
+    AuthManager.USERS_FILE = os.path.join(workdir, "users_db.json")
+    AuthManager.SESSIONS_FILE = os.path.join(workdir, "sessions_db.json")
+    ReportArchive.ARCHIVE_DIR = os.path.join(workdir, "archive")
+    BackupManager.BACKUP_DIR = os.path.join(workdir, "backups")
+    Assignments.FILE = os.path.join(workdir, "assignments.json")
+
+    samples, errors = [], []
+    start = time.perf_counter()
+    for i in range(users):
+        n = worker_id * users + i
+        try:
+            journey = admin_journey if admin_every and n % admin_every == 0 else citizen_journey
+            journey(VirtualUser(samples), n)
+        except Exception as e:
+            errors.append(str(e))
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is reported in kilobytes on Linux
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return samples, errors, elapsed, rss_mb
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(pct / 100 * len(values)) - 1))
+    return values[index]
+
+
+def run(reports, processes, users, admin_every):
+    workdir = tempfile.mkdtemp(prefix="nn-load-")
+    _seed(workdir, reports, processes * users)
+
+    start = time.perf_counter()
+    with multiprocessing.get_context("spawn").Pool(processes) as pool:
+        results = pool.map(_worker, [(workdir, w, users, admin_every) for w in range(processes)])
+    wall = time.perf_counter() - start
+
+    by_page, errors = {}, []
+    for samples, worker_errors, _, _ in results:
+        errors.extend(worker_errors)
+        for page, ms in samples:
+            by_page.setdefault(page, []).append(ms)
+    reruns = sum(len(v) for v in by_page.values())
+    summary = {
+        "reports": reports,
+        "virtual_users": processes * users,
+        "processes": processes,
+        "wall_seconds": wall,
+        "reruns_per_second": reruns / wall if wall else 0.0,
+        "rss_mb_per_session": statistics.mean(r[3] for r in results) / users,
+        "errors": errors,
+        "pages": {
+            page: {
+                "count": len(ms),
+                "p50_ms": _percentile(ms, 50),
+                "p95_ms": _percentile(ms, 95),
+                "p99_ms": _percentile(ms, 99),
+            }
+            for page, ms in sorted(by_page.items())
+        },
+    }
+
+    print(f"\n{reports} reports, {processes * users} virtual users in {processes} processes")
+    print(f"  throughput: {summary['reruns_per_second']:.1f} reruns/s, "
+          f"peak RSS/session: {summary['rss_mb_per_session']:.1f} MB, errors: {len(errors)}")
+    print(f"  {'page':<16}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for page, stats in summary["pages"].items():
+        print(f"  {page:<16}{stats['count']:>6}{stats['p50_ms']:>10.1f}"
+              f"{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}")
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--reports", type=int, nargs="+", default=[1000, 10000],
+                        help="dataset sizes to test (e.g. 1000 100000 1000000)")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--users", type=int, default=4, help="virtual users per process")
+    parser.add_argument("--admin-every", type=int, default=5,
+                        help="every Nth virtual user runs the admin journey (0 disables)")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args(argv)
+
+    results = [run(n, args.processes, args.users, args.admin_every) for n in args.reports]
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
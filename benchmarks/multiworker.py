@@ -0,0 +1,116 @@
+"""
+Multi-process consistency check and write throughput for the SQLite backend.
+
+Starts several worker processes that share one SQLite report store, the way
+several Streamlit server processes would behind a load balancer. Every
+worker runs DataManager in bare mode: it submits reports, changes the
+status of random reports (including other workers'), and syncs. At the end
+each worker's session view is compared with the database, and report ids
+must be unique and gap-free.
+
+Usage:
+    python -m benchmarks.multiworker --workers 4 --writes 200 --seed-reports 1000
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATUSES = ("Pending", "In Progress", "Resolved", "Rejected")
+
+
+def _worker(workdir, index, writes, start, results):
+    os.chdir(workdir)
+    os.environ["NN_STORE_BACKEND"] = "sqlite"
+    os.environ["NN_SQLITE_PATH"] = os.path.join(workdir, "reports.sqlite3")
+    sys.path.insert(0, ROOT)
+    import streamlit as st
+    from utils.data_manager import DataManager
+    # Bare-mode Streamlit logs a warning for every session_state access
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+    DataManager.init_db()
+    rng = random.Random(index)
+    start.wait()
+    began = time.perf_counter()
+    added = []
+    for i in range(writes):
+        added.append(DataManager.add_report(
+            f"Worker {index} report {i}", "Roads", "Pothole", "multiworker", "Dhaka", "Dhaka",
+            23.8, 90.4, username=f"worker{index}"))
+        DataManager.sync()
+        reports = st.session_state.reports
+        DataManager.update_status(reports[rng.randrange(len(reports))]['id'], rng.choice(STATUSES))
+    elapsed = time.perf_counter() - began
+
+    # Wait for every worker to finish writing, then compare views
+    start.wait()
+    DataManager.sync()
+    view = {r['id']: r['status'] for r in st.session_state.reports}
+    results.put((index, added, elapsed, view))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="NagarNirman multi-process SQLite store check")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--writes", type=int, default=200, help="reports each worker submits")
+    parser.add_argument("--seed-reports", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    from benchmarks.synthetic import make_reports
+    from utils.sqlite_store import SQLiteStore
+
+    with tempfile.TemporaryDirectory() as workdir:
+        seed = make_reports(args.seed_reports)
+        SQLiteStore(os.path.join(workdir, "reports.sqlite3")).replace_all(seed)
+
+        ctx = multiprocessing.get_context("spawn")
+        start = ctx.Barrier(args.workers)
+        results = ctx.Queue()
+        procs = [ctx.Process(target=_worker, args=(workdir, i, args.writes, start, results))
+                 for i in range(args.workers)]
+        for p in procs:
+            p.start()
+        outcomes = [results.get() for _ in procs]
+        for p in procs:
+            p.join()
+
+        store = SQLiteStore(os.path.join(workdir, "reports.sqlite3"))
+        truth = {r['id']: r['status'] for r in store.load()}
+
+    failures = []
+    ids = sorted(i for _, added, _, _ in outcomes for i in added)
+    first = max(r['id'] for r in seed) + 1
+    if ids != list(range(first, first + len(ids))):
+        failures.append("report ids are not unique and contiguous")
+    if len(truth) != len(seed) + args.workers * args.writes:
+        failures.append(f"store holds {len(truth)} reports, expected {len(seed) + args.workers * args.writes}")
+    for index, _, _, view in sorted(outcomes):
+        if view != truth:
+            diff = sum(1 for k in truth.keys() | view.keys() if view.get(k) != truth.get(k))
+            failures.append(f"worker {index} view differs from the database in {diff} reports")
+
+    # Each iteration is one add_report and one update_status
+    writes = 2 * args.workers * args.writes
+    wall = max(elapsed for _, _, elapsed, _ in outcomes)
+    print(json.dumps({
+        "workers": args.workers,
+        "writes": writes,
+        "seconds": round(wall, 3),
+        "writes_per_second": round(writes / wall, 1),
+        "reports": len(truth),
+    }, indent=2))
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""
+Status-change notifications (utils/notifications.py) under bulk updates.
+
+Replays admin bulk updates (a few hundred reports at a time) into a
+Notifier whose email and SMS channels are slow, flaky StubSenders, and
+times how long each update's enqueue() holds up the admin, against the
+time to deliver the same messages inline. Halfway through, the notifier
+is closed and a fresh one opened on the same outbox, as after a restart.
+When the backlog drains, every event must be in its submitter's inbox
+and sent on each channel exactly once; the run fails otherwise, or when
+the p99 enqueue takes longer than --max-enqueue-ms.
+
+A second pass enqueues events one at a time, each fanned out on its own
+as in the admin's single-report updates, with a small Notifier.RETENTION,
+and fails if handled outbox rows and sent deliveries are not pruned.
+
+Usage:
+    python -m benchmarks.notifications --events 20000 --bulk 250 --fail-rate 0.2
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+from contextlib import closing
+
+import numpy as np
+
+from utils.notifications import Notifier, StubSender
+
+USERS = 500
+
+
+def contacts(usernames):
+    # Every other user has given a phone number
+    return {u: {"email": f"{u}@example.org", "sms": f"+8801{int(u[4:]):09d}" if int(u[4:]) % 2 else None}
+            for u in usernames}
+
+
+def make_events(count, seed=42):
+    rng = random.Random(seed)
+    return [{"report_id": i, "title": f"Report {i}", "username": f"user{rng.randint(1, USERS)}",
+             "old_status": "Pending", "status": rng.choice(("In Progress", "Resolved")), "at": "2026-01-01 00:00:00"}
+            for i in range(1, count + 1)]
+
+
+def check_retention(events, retention=100, timeout=60.0):
+    """
+    Fan out `events` one per batch with RETENTION lowered; returns the outbox
+    and delivery row counts left, which must stay within RETENTION plus the
+    1000 seqs between prunes.
+    """
+    kept = Notifier.RETENTION
+    Notifier.RETENTION = retention
+    path = os.path.join(tempfile.mkdtemp(), "notifications.sqlite3")
+    notifier = Notifier(path, contacts=contacts, senders={"email": StubSender(0.0, 0.0, seed=3)})
+    try:
+        for event in events:
+            notifier.enqueue([event])
+            deadline = time.monotonic() + timeout
+            while (backlog := notifier.backlog())["outbox"] or backlog["pending"]:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"not delivered after {timeout:.0f} s: {backlog}")
+                time.sleep(0.001)
+    finally:
+        notifier.close()
+        Notifier.RETENTION = kept
+    with closing(sqlite3.connect(path)) as db:
+        return tuple(db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                     for table in ("outbox", "deliveries"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="NagarNirman notification pipeline benchmark")
+    parser.add_argument("--events", type=int, default=20_000, help="status changes in total")
+    parser.add_argument("--bulk", type=int, default=250, help="reports per admin bulk update")
+    parser.add_argument("--fail-rate", type=float, default=0.2, help="share of sends the stub senders fail")
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds each stub send takes per batch")
+    parser.add_argument("--max-enqueue-ms", type=float, default=50.0)
+    parser.add_argument("--timeout", type=float, default=120.0, help="seconds to wait for delivery")
+    parser.add_argument("--single", type=int, default=1300, help="events enqueued one at a time in the retention pass")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args(argv)
+
+    # Retries in milliseconds rather than seconds, so the run drains quickly
+    Notifier.BACKOFF, Notifier.POLL_SECONDS = 0.01, 0.05
+    Notifier.MAX_ATTEMPTS = 50
+    events = make_events(args.events)
+    email = StubSender(args.fail_rate, args.latency, seed=1)
+    sms = StubSender(args.fail_rate, args.latency, seed=2)
+    path = os.path.join(tempfile.mkdtemp(), "notifications.sqlite3")
+    notifier = Notifier(path, contacts=contacts, senders={"email": email, "sms": sms})
+
+    enqueue = []
+    starts = range(0, len(events), args.bulk)
+    began = time.perf_counter()
+    for i in starts:
+        if i == starts[len(starts) // 2]:
+            # Restart: whatever is still queued must survive in the outbox
+            notifier.close()
+            notifier = Notifier(path, contacts=contacts, senders={"email": email, "sms": sms})
+        t = time.perf_counter()
+        notifier.enqueue(events[i:i + args.bulk])
+        enqueue.append(time.perf_counter() - t)
+    deadline = time.monotonic() + args.timeout
+    while (backlog := notifier.backlog())["outbox"] or backlog["pending"]:
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"not delivered after {args.timeout:.0f} s: {backlog}")
+        time.sleep(0.05)
+    drained = time.perf_counter() - began
+
+    inboxes = {f"user{u}": notifier.inbox(f"user{u}", limit=len(events)) for u in range(1, USERS + 1)}
+    received = Counter((user, n["report_id"]) for user, inbox in inboxes.items() for n in inbox)
+    if received != Counter((e["username"], e["report_id"]) for e in events):
+        raise RuntimeError("an inbox is missing a notification or has one twice")
+    want = contacts({e["username"] for e in events})
+    for channel, sender in (("email", email), ("sms", sms)):
+        expected = Counter((want[e["username"]][channel], e["report_id"]) for e in events
+                           if want[e["username"]][channel])
+        sent = Counter((m["recipient"], int(m["subject"].split("#")[1].split()[0])) for m in sender.sent)
+        if sent != expected:
+            raise RuntimeError(f"{channel}: a message was lost or sent twice")
+    if backlog["dead"]:
+        raise RuntimeError(f"{backlog['dead']} deliveries given up on")
+    notifier.close()
+
+    messages = len(email.sent) + len(sms.sent)
+    # Inline delivery would make the admin wait for every batch of sends, failures retried once each
+    inline_s = (messages + email.failures + sms.failures) / Notifier.SEND_BATCH * args.latency
+    row = {"events": len(events), "bulk": args.bulk, "messages": messages,
+           "failures": email.failures + sms.failures, "enqueue_ms": statistics.mean(enqueue) * 1000,
+           "enqueue_p99_ms": float(np.percentile(enqueue, 99)) * 1000, "drain_s": drained,
+           "inline_s": inline_s}
+    print(f"  {'events':>8}{'bulk':>6}{'messages':>10}{'failures':>10}{'enqueue ms':>12}{'p99 ms':>9}"
+          f"{'drain s':>9}{'inline s':>10}")
+    print(f"  {row['events']:>8}{row['bulk']:>6}{messages:>10}{row['failures']:>10}{row['enqueue_ms']:>12.2f}"
+          f"{row['enqueue_p99_ms']:>9.2f}{drained:>9.2f}{inline_s:>10.2f}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump([row], f, indent=2)
+
+    retention = 100
+    outbox_rows, delivery_rows = check_retention(make_events(args.single, seed=7), retention)
+    print(f"  retention pass: {args.single} single events, {outbox_rows} outbox and "
+          f"{delivery_rows} delivery rows kept (RETENTION {retention})")
+    if max(outbox_rows, delivery_rows) > retention + 1000:
+        print("FAIL: handled notifications are not pruned")
+        return 1
+    if row["enqueue_p99_ms"] > args.max_enqueue_ms:
+        print(f"FAIL: p99 enqueue took {row['enqueue_p99_ms']:.1f} ms (limit {args.max_enqueue_ms:.1f} ms)")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
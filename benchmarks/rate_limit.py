@@ -0,0 +1,72 @@
+"""
+Cost of a rate-limit check as the number of tracked clients grows.
+
+Times RateLimits.check and a bare RateLimiter.take over key populations
+from a handful of clients up to far more than a limiter keeps (MAX_KEYS),
+so eviction is exercised. Each check must stay O(1): the run fails when
+the slowest population costs more than `--threshold` times the fastest,
+or when a limiter holds more than MAX_KEYS buckets.
+
+Usage:
+    python -m benchmarks.rate_limit --keys 10 1000 100000 1000000
+"""
+
+import argparse
+import random
+import sys
+import time
+
+from utils.rate_limit import RateLimiter, RateLimits
+
+
+def _time_per_call(fn, keys, calls):
+    began = time.perf_counter()
+    for i in range(calls):
+        fn(keys[i % len(keys)])
+    return (time.perf_counter() - began) / calls * 1e9
+
+
+def run(populations, calls):
+    results = {}
+    for population in populations:
+        rng = random.Random(population)
+        keys = [f"client-{rng.getrandbits(64):x}" for _ in range(min(population, calls))]
+        limiter = RateLimiter(rate=1.0, burst=5)
+        RateLimits._limiters.clear()
+        take_ns = _time_per_call(limiter.take, keys, calls)
+        check_ns = _time_per_call(lambda key: RateLimits.check("submit", user=key, session=key, ip=key),
+                                  keys, calls)
+        tracked = max([len(limiter)] + [len(lim) for lim in RateLimits._limiters.values()])
+        results[len(keys)] = {"take_ns": take_ns, "check_ns": check_ns, "tracked": tracked}
+        print(f"{len(keys):>10} clients: take {take_ns:8.0f} ns   check {check_ns:8.0f} ns   "
+              f"buckets held {tracked}")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="NagarNirman rate limiter overhead")
+    parser.add_argument("--keys", type=int, nargs="+", default=[10, 1000, 100_000, 1_000_000],
+                        help="distinct client populations to test (capped at --calls)")
+    parser.add_argument("--calls", type=int, default=1_000_000, help="checks timed per population")
+    parser.add_argument("--threshold", type=float, default=3.0,
+                        help="allowed ratio between the slowest and fastest population")
+    args = parser.parse_args(argv)
+
+    RateLimits.ENABLED = True
+    results = run(args.keys, args.calls)
+    failed = False
+    for name in ("take_ns", "check_ns"):
+        times = [r[name] for r in results.values()]
+        ratio = max(times) / min(times)
+        print(f"{name}: slowest/fastest = {ratio:.2f}")
+        if ratio > args.threshold:
+            print(f"FAIL: {name} grows with the number of clients")
+            failed = True
+    if any(r["tracked"] > RateLimiter.MAX_KEYS for r in results.values()):
+        print(f"FAIL: a limiter holds more than {RateLimiter.MAX_KEYS} buckets")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,44 @@
+"""
+Memory benchmark: per-report footprint of dict records vs. Report records.
+
+Usage:
+    python -m benchmarks.report_memory [count]
+"""
+
+import gc
+import json
+import sys
+import tracemalloc
+
+from benchmarks.synthetic import make_reports
+from utils.report_record import Report
+
+
+def measure(build):
+    """Return (result, bytes allocated) for build()."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def main(count=100_000):
+    # Round-trip through JSON so every dict owns its own string copies,
+    # exactly like json.load() in DataManager._load_from_file.
+    payload = json.dumps(make_reports(count))
+
+    dicts, dict_bytes = measure(lambda: json.loads(payload))
+    del dicts
+    records, record_bytes = measure(lambda: [Report.from_dict(r) for r in json.loads(payload)])
+    del records
+
+    print(f"reports:           {count}")
+    print(f"dict per report:   {dict_bytes / count:8.1f} bytes")
+    print(f"Report per report: {record_bytes / count:8.1f} bytes")
+    print(f"reduction:         {dict_bytes / max(record_bytes, 1):8.2f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
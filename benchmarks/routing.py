@@ -0,0 +1,101 @@
+"""
+Volunteer route planning (utils/routing.py) for a division's pending reports.
+
+For each workload, builds pending reports spread over one division's
+districts and a crew of volunteers, submits plan_routes() as a background
+job the way the admin page does, and times how long submitting blocks the
+caller and how long the plan takes. Every report must end up in exactly
+one route or be left over, and no route may exceed its volunteer's
+capacity. The run fails otherwise, or when a plan takes longer than
+--max-seconds.
+
+Usage:
+    python -m benchmarks.routing --reports 1000 5000 10000 --capacity 25
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+import time
+
+from utils.assignment import AssignmentJobs
+from utils.location_data import DIVISIONS_DATA
+from utils.routing import plan_routes
+
+
+def make_stops(count, division="Dhaka", seed=42):
+    """(report id, lat, lon) of `count` pending reports scattered around a division's districts."""
+    rng = random.Random(seed)
+    districts = next(d["districts"] for d in DIVISIONS_DATA if d["division"] == division)
+    stops = []
+    for i in range(1, count + 1):
+        district = rng.choice(districts)
+        stops.append((i, district["latitude"] + rng.uniform(-0.05, 0.05),
+                      district["longitude"] + rng.uniform(-0.05, 0.05)))
+    return stops
+
+
+def run(count, capacity, crew_share, division, jobs):
+    stops = make_stops(count, division)
+    crew = max(1, math.ceil(count * crew_share / capacity))
+    volunteers = [(f"volunteer{i}", capacity) for i in range(crew)]
+
+    began = time.perf_counter()
+    job_id = jobs.submit(plan_routes, stops, volunteers)
+    submit_ms = (time.perf_counter() - began) * 1000
+    while jobs.get(job_id)["state"] in ("queued", "running"):
+        time.sleep(0.005)
+    wall = time.perf_counter() - began
+    job = jobs.get(job_id)
+    if job["state"] != "done":
+        raise RuntimeError(f"{count} reports: planning failed: {job['error']}")
+    plan = job["result"]
+
+    routed = [report_id for route in plan["routes"] for report_id in route["stops"]]
+    if sorted(routed + plan["unassigned"]) != [s[0] for s in stops]:
+        raise RuntimeError(f"{count} reports: a report was lost or routed twice")
+    if any(len(route["stops"]) > capacity for route in plan["routes"]):
+        raise RuntimeError(f"{count} reports: a route is over its volunteer's capacity")
+    km = sum(route["km"] for route in plan["routes"])
+    nearest = sum(route["nearest_neighbour_km"] for route in plan["routes"])
+    row = {"reports": count, "volunteers": crew, "capacity": capacity, "routed": len(routed),
+           "left_over": len(plan["unassigned"]), "submit_ms": submit_ms, "plan_s": plan["seconds"],
+           "wall_s": wall, "km": km, "nearest_neighbour_km": nearest}
+    print(f"  {count:>8}{crew:>6}{capacity:>5}{len(routed):>8}{len(plan['unassigned']):>7}{submit_ms:>11.2f}"
+          f"{plan['seconds']:>9.2f}{km:>10.0f}{nearest:>10.0f}{(1 - km / nearest) * 100 if nearest else 0:>9.1f}%")
+    return row
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="NagarNirman volunteer route planning benchmark")
+    parser.add_argument("--reports", type=int, nargs="+", default=[1000, 5000, 10000])
+    parser.add_argument("--capacity", type=int, default=25, help="stops per volunteer")
+    parser.add_argument("--division", default="Dhaka")
+    parser.add_argument("--max-seconds", type=float, default=5.0)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args(argv)
+
+    jobs = AssignmentJobs()
+    print(f"  {'reports':>8}{'crew':>6}{'cap':>5}{'routed':>8}{'left':>7}{'submit ms':>11}{'plan s':>9}"
+          f"{'km':>10}{'NN km':>10}{'2-opt':>10}")
+    results = []
+    for count in args.reports:
+        # A crew big enough for every report, then one for half of them
+        for share in (1.0, 0.5):
+            results.append(run(count, args.capacity, share, args.division, jobs))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    slow = [r for r in results if r["plan_s"] > args.max_seconds]
+    if slow:
+        print(f"FAIL: planning {slow[0]['reports']} reports took {slow[0]['plan_s']:.1f} s "
+              f"(limit {args.max_seconds:.1f} s)")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""
+Consistency check for several sessions writing to the JSON report store.
+
+Each session is an AppTest running a script that only initialises the
+store and performs one write, so, like the admin page's fragments, it never
+goes through app.py's sync(). Sessions take turns in a random order: one
+adds a report to a division the others have loaded, another changes the
+status of any report written so far (including ones it has never seen).
+In the JSON backend a write rewrites the whole partition from the writing
+session's list, so a stale list would drop the others' reports from disk.
+
+At the end the store on disk must hold every seeded and added report with
+its last status, and every session's view must match it; the run fails
+otherwise.
+
+Usage:
+    python -m benchmarks.sessions --sessions 3 --writes 60 --seed-reports 200
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.synthetic import make_reports
+from utils.archive import ReportArchive
+from utils.assignment import Assignments
+from utils.backup import BackupManager
+from utils.data_manager import DataManager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATUSES = ("Pending", "In Progress", "Resolved")
+
+SCRIPT = """
+import streamlit as st
+from utils.data_manager import DataManager
+DataManager.init_db()
+action = st.session_state.pop("action", None)
+if action and action[0] == "add":
+    st.session_state.added = DataManager.add_report(f"Session report {action[1]}", "Roads", "Pothole",
+                                                    "sessions check", "Chittagong", "Chittagong",
+                                                    22.35, 91.78, username="user1")
+elif action and action[0] == "status":
+    DataManager.update_status(action[1], action[2])
+elif action and action[0] == "sync":
+    DataManager.sync()
+st.session_state.view = {r['id']: r['status'] for r in DataManager.get_all_reports()}
+"""
+
+
+def _run(at, action=None):
+    at.session_state.action = action
+    at.run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="NagarNirman multi-session JSON store check")
+    parser.add_argument("--sessions", type=int, default=3)
+    parser.add_argument("--writes", type=int, default=60, help="writes across all sessions")
+    parser.add_argument("--seed-reports", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+    # Bare-mode Streamlit logs a warning for every session_state access
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+    workdir = tempfile.mkdtemp(prefix="nn-sessions-")
+    DataManager.BACKEND, DataManager.WRITE_MODE = "json", "sync"
+    DataManager.DB_FILE = os.path.join(workdir, "reports_db.json")
+    DataManager.NOTIFY_PATH = os.path.join(workdir, "notifications.sqlite3")
+    ReportArchive.ARCHIVE_DIR = os.path.join(workdir, "archive")
+    BackupManager.BACKUP_DIR = os.path.join(workdir, "backups")
+    Assignments.FILE = os.path.join(workdir, "assignments.json")
+    seed = make_reports(args.seed_reports)
+    with open(DataManager.DB_FILE, "w", encoding="utf-8") as f:
+        json.dump(seed, f)
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+
+    sessions = [AppTest.from_string(SCRIPT, default_timeout=60) for _ in range(args.sessions)]
+    for at in sessions:
+        _run(at)
+    rng = random.Random(args.seed)
+    expected = {r['id']: r['status'] for r in seed}
+    added = []
+    for i in range(args.writes):
+        at = rng.choice(sessions)
+        if not added or rng.random() < 0.5:
+            _run(at, ("add", i))
+            added.append(at.session_state.added)
+            expected[added[-1]] = "Pending"
+        else:
+            report_id = rng.choice(added + [rng.choice(seed)['id']])
+            status = rng.choice(STATUSES)
+            _run(at, ("status", report_id, status))
+            expected[report_id] = status
+
+    failures = []
+    stored = {r['id']: r['status'] for r in DataManager._load_from_file()}
+    lost = expected.keys() - stored.keys()
+    if lost:
+        failures.append(f"{len(lost)} report(s) missing from disk, e.g. #{min(lost)}")
+    wrong = [k for k in expected.keys() & stored.keys() if stored[k] != expected[k]]
+    if wrong:
+        failures.append(f"{len(wrong)} report(s) on disk with a stale status, e.g. #{min(wrong)}")
+    for index, at in enumerate(sessions):
+        # As app.py does on every rerun
+        _run(at, ("sync",))
+        if at.session_state.view != stored:
+            failures.append(f"session {index} view differs from the store")
+
+    print(f"  {args.sessions} sessions, {args.writes} writes ({len(added)} adds): "
+          f"{len(stored)} reports on disk, {len(expected)} expected")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""
+Cold-start import benchmark based on `python -X importtime`.
+
+Imports the modules app.py imports, in a fresh interpreter, after Streamlit
+itself is loaded (its cost is outside our control and reported separately).
+The run fails when the app's own import time exceeds the budget, when a
+module that should load lazily (pandas, numpy, fpdf, Pillow) is pulled in
+at startup, or when it regresses against a saved baseline.
+
+Usage:
+    python -m benchmarks.startup --save startup.json
+    python -m benchmarks.startup --baseline startup.json --threshold 1.25
+"""
+
+import argparse
+import ast
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "app.py")
+# Milliseconds the app's own modules may take to import (median of the runs)
+BUDGET_MS = 150
+# Top-level packages that must only load when a page needs them
+DEFERRED = ("pandas", "numpy", "fpdf", "PIL")
+
+
+def app_imports():
+    """Modules imported at the top level of app.py, in order."""
+    with open(APP, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), APP)
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            modules.append(node.module)
+    return [m for m in dict.fromkeys(modules) if m.split(".")[0] != "streamlit"]
+
+
+def parse_importtime(stderr):
+    """
+    Parse -X importtime output.
+
+    Returns:
+        list: (module: str, self_us: int, cumulative_us: int, depth: int)
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def measure(modules):
+    """Import streamlit, then `modules`, in a fresh interpreter."""
+    code = "import streamlit\n" + "".join(f"import {m}\n" for m in modules)
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          cwd=ROOT, capture_output=True, text=True, check=True)
+    rows = parse_importtime(proc.stderr)
+    top = [r for r in rows if r[3] == 0]
+    streamlit_us = next(r[2] for r in top if r[0] == "streamlit")
+    app_us = sum(r[2] for r in top if r[0] != "streamlit")
+    loaded = {r[0].split(".")[0] for r in rows}
+    return {
+        "streamlit_ms": streamlit_us / 1000,
+        "app_ms": app_us / 1000,
+        "deferred_loaded": sorted(p for p in DEFERRED if p in loaded),
+        "slowest": sorted(((r[0], r[1] / 1000) for r in rows if r[0].split(".")[0] not in ("streamlit",)),
+                          key=lambda r: r[1], reverse=True)[:10],
+    }
+
+
+def run(repeats):
+    modules = app_imports()
+    samples = [measure(modules) for _ in range(repeats)]
+    result = {
+        "modules": modules,
+        "streamlit_ms": statistics.median(s["streamlit_ms"] for s in samples),
+        "app_ms": statistics.median(s["app_ms"] for s in samples),
+        "deferred_loaded": samples[-1]["deferred_loaded"],
+        "slowest": samples[-1]["slowest"],
+    }
+    print(f"streamlit import:      {result['streamlit_ms']:>9.1f} ms")
+    print(f"app modules import:    {result['app_ms']:>9.1f} ms (budget {BUDGET_MS} ms)")
+    print(f"deferred modules hit:  {', '.join(result['deferred_loaded']) or 'none'}")
+    print("slowest app-side modules (self time):")
+    for name, ms in result["slowest"]:
+        print(f"  {name:<40}{ms:>8.1f} ms")
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="NagarNirman cold-start import benchmark")
+    parser.add_argument("--repeats", type=int, default=5, help="fresh interpreters to measure")
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS)
+    parser.add_argument("--save", help="write results JSON to this file")
+    parser.add_argument("--baseline", help="compare against a previously saved results JSON")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="slowdown ratio that counts as a regression")
+    args = parser.parse_args(argv)
+
+    result = run(args.repeats)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "result": result,
+            }, f, indent=2)
+
+    failed = False
+    if result["deferred_loaded"]:
+        print(f"FAIL: {', '.join(result['deferred_loaded'])} imported at startup")
+        failed = True
+    if result["app_ms"] > args.budget_ms:
+        print(f"FAIL: app import time {result['app_ms']:.1f} ms exceeds {args.budget_ms:.0f} ms")
+        failed = True
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            base = json.load(f)["result"]["app_ms"]
+        ratio = result["app_ms"] / base if base else float("inf")
+        print(f"baseline {base:.1f} ms, now {result['app_ms']:.1f} ms, ratio {ratio:.2f}")
+        if ratio > args.threshold:
+            print("FAIL: import time regressed")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,35 @@
+"""
+Synthetic report datasets shared by the benchmarks.
+"""
+
+import random
+
+from utils.location_data import DIVISIONS_DATA, CATEGORY_OPTIONS
+
+STATUSES = ["Pending", "In Progress", "Resolved"]
+
+
+def make_reports(count, seed=42, users=500):
+    """Build a synthetic report list shaped like reports_db.json."""
+    rng = random.Random(seed)
+    categories = list(CATEGORY_OPTIONS.items())
+    reports = []
+    for i in range(1, count + 1):
+        division = rng.choice(DIVISIONS_DATA)
+        district = rng.choice(division["districts"])
+        category, subcategories = rng.choice(categories)
+        reports.append({
+            "id": i,
+            "title": f"Issue {i} in {division['division']}",
+            "category": category,
+            "subcategory": rng.choice(subcategories),
+            "status": rng.choice(STATUSES),
+            "division": division["division"],
+            "district": district["name"],
+            "lat": district["latitude"] + rng.uniform(-0.05, 0.05),
+            "lon": district["longitude"] + rng.uniform(-0.05, 0.05),
+            "date": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "description": "Reported by a resident. " * rng.randint(1, 20),
+            "submitted_by": f"user{rng.randint(1, users)}",
+        })
+    return reports
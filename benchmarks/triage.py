@@ -0,0 +1,188 @@
+"""
+Triage queue (utils/triage.py) under a simulated storm surge.
+
+Starts from a synthetic store, scores it into a TriageQueue, then replays
+a storm: bursts of flooding, exposed-wire and road reports clustered
+around a few hotspots in the coastal districts, interleaved with dispatch
+rounds (the next N pending reports go In Progress) and crews resolving
+reports. Times each kind of change and each "next N" query, against the
+naive alternative of rescoring every open report and sorting them. At
+every checkpoint the queue must list exactly the reports and scores the
+from-scratch scoring does; the run fails otherwise.
+
+Usage:
+    python -m benchmarks.triage --sizes 10000 100000 --surge 20000 --dispatch 25
+"""
+
+import argparse
+import heapq
+import json
+import random
+import statistics
+import sys
+import time
+from datetime import date
+
+import numpy as np
+
+from benchmarks.synthetic import make_reports
+from utils.location_data import DIVISIONS_DATA
+from utils.report_columns import ReportColumns
+from utils.report_record import Report
+from utils.triage import TriageQueue, _days
+
+TODAY = date(2026, 1, 1)
+COASTAL = ("Chittagong", "Cox’s Bazar", "Noakhali", "Lakshmipur", "Khulna", "Satkhira", "Bagerhat",
+           "Barishal", "Patuakhali", "Bhola", "Barguna", "Pirojpur")
+# What a storm brings in, by weight
+SURGE_ISSUES = (("Environmental Hazards", "Waterlogging/flooding", 5),
+                ("Lighting & Electrical", "Exposed wires", 3),
+                ("Road & Infrastructure Issues", "Blocked drains/gutters", 2),
+                ("Safety Issues", "Broken fences/walls", 1),
+                ("Water Supply & Leakage", "Water pipe leaks", 1))
+
+
+def make_surge(count, first_id, seed=7, hotspots=40):
+    """Storm reports around `hotspots` points in the coastal districts, a few hundred metres across each."""
+    rng = random.Random(seed)
+    districts = [(div["division"], d) for div in DIVISIONS_DATA for d in div["districts"] if d["name"] in COASTAL]
+    spots = []
+    for _ in range(hotspots):
+        division, district = rng.choice(districts)
+        spots.append((division, district, district["latitude"] + rng.uniform(-0.05, 0.05),
+                      district["longitude"] + rng.uniform(-0.05, 0.05)))
+    issues = [(category, sub) for category, sub, weight in SURGE_ISSUES for _ in range(weight)]
+    reports = []
+    for i in range(count):
+        division, district, lat, lon = rng.choice(spots)
+        category, subcategory = rng.choice(issues)
+        reports.append(Report.from_dict({
+            "id": first_id + i, "title": f"Storm damage {i}", "category": category, "subcategory": subcategory,
+            "status": "Pending", "division": division, "district": district["name"],
+            "lat": lat + rng.uniform(-0.004, 0.004), "lon": lon + rng.uniform(-0.004, 0.004),
+            # Reported over the last few days of the storm
+            "date": date.fromordinal(TODAY.toordinal() - rng.randint(0, 3)).isoformat(),
+            "description": "Reported during the storm.", "submitted_by": f"user{rng.randint(1, 500)}",
+        }))
+    return reports
+
+
+def rescored(reports, k):
+    """The naive "next k": score every open report from scratch and take the k best."""
+    q = TriageQueue
+    today = _days(TODAY)
+    cells, backlog = {}, {}
+
+    def cell(r):
+        lat, lon = float(np.float32(r['lat'] or 0.0)), float(np.float32(r['lon'] or 0.0))
+        if lat == 0 and lon == 0:
+            return None
+        return r['category'], int(np.floor(lat / q.CELL_DEGREES)), int(np.floor(lon / q.CELL_DEGREES))
+
+    open_reports = [(r, cell(r)) for r in reports if r['status'] != "Resolved"]
+    for r, c in open_reports:
+        if c is not None:
+            cells[c] = cells.get(c, 0) + 1
+        backlog[(r['division'], r['district'])] = backlog.get((r['division'], r['district']), 0) + 1
+    scored = []
+    for r, c in open_reports:
+        if r['status'] != q.QUEUED:
+            continue
+        duplicates = sum(cells.get((c[0], c[1] + dx, c[2] + dy), 0)
+                         for dx in (-1, 0, 1) for dy in (-1, 0, 1)) - 1 if c else 0
+        day = _days(r['date'])
+        score = (q.POLICY.get(r['category'], q.DEFAULT_POLICY)[0]
+                 + q.AGE_WEIGHT * (today - (today if day is None else day))
+                 + q.DUPLICATE_WEIGHT * min(duplicates, q.DUPLICATE_CAP)
+                 + q.BACKLOG_WEIGHT * min(backlog[(r['division'], r['district'])], q.BACKLOG_CAP))
+        scored.append((-score, r['id']))
+    return [(report_id, -key) for key, report_id in heapq.nsmallest(k, scored)]
+
+
+def _us(samples):
+    return statistics.mean(samples) * 1e6 if samples else 0.0
+
+
+def run(size, surge, dispatch, checkpoints, seed=42):
+    rng = random.Random(seed)
+    reports = [Report.from_dict(r) for r in make_reports(size, seed=seed)]
+    by_id = {r['id']: r for r in reports}
+    # The session usually has its columnar snapshot already; time only the scoring
+    columns = ReportColumns.from_reports(reports)
+    began = time.perf_counter()
+    queue = TriageQueue.from_columns(columns, TODAY)
+    build_ms = (time.perf_counter() - began) * 1000
+
+    arrivals = make_surge(surge, size + 1, seed=seed)
+    timings = {"add": [], "status": [], "next": []}
+    in_progress = [r for r in reports if r['status'] == "In Progress"]
+    check_every = max(len(arrivals) // checkpoints, 1)
+    rescan_ms, checked = [], 0
+    for n, report in enumerate(arrivals, 1):
+        reports.append(report)
+        by_id[report['id']] = report
+        began = time.perf_counter()
+        queue.add(report)
+        timings["add"].append(time.perf_counter() - began)
+
+        if rng.random() < 0.3 and in_progress:
+            # A crew closes a job
+            done = in_progress.pop(rng.randrange(len(in_progress)))
+            done['status'] = "Resolved"
+            began = time.perf_counter()
+            queue.set_status(done, "In Progress")
+            timings["status"].append(time.perf_counter() - began)
+
+        if n % 50 == 0:
+            # Dispatch round: the next reports go to crews
+            began = time.perf_counter()
+            picked = queue.next(dispatch, TODAY)
+            timings["next"].append(time.perf_counter() - began)
+            for report_id, _ in picked:
+                r = by_id[report_id]
+                r['status'] = "In Progress"
+                in_progress.append(r)
+                began = time.perf_counter()
+                queue.set_status(r, "Pending")
+                timings["status"].append(time.perf_counter() - began)
+
+        if n % check_every == 0 or n == len(arrivals):
+            began = time.perf_counter()
+            expected = rescored(reports, dispatch)
+            rescan_ms.append((time.perf_counter() - began) * 1000)
+            checked += 1
+            if queue.next(dispatch, TODAY) != expected:
+                raise RuntimeError(f"{size} reports, {n} storm reports in: the queue disagrees with a full rescore")
+
+    row = {
+        "size": size, "surge": surge, "queued": len(queue), "build_ms": build_ms,
+        "add_us": _us(timings["add"]), "add_p99_us": float(np.percentile(timings["add"], 99)) * 1e6,
+        "status_us": _us(timings["status"]), "next_ms": _us(timings["next"]) / 1000,
+        "rescore_ms": statistics.mean(rescan_ms), "checkpoints": checked,
+    }
+    print(f"  {size:>9}{surge:>8}{row['queued']:>9}{build_ms:>10.1f}{row['add_us']:>9.1f}{row['add_p99_us']:>10.1f}"
+          f"{row['status_us']:>11.1f}{row['next_ms']:>9.3f}{row['rescore_ms']:>12.1f}"
+          f"{row['rescore_ms'] / row['next_ms']:>10.0f}x")
+    return row
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="NagarNirman triage queue storm-surge benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--surge", type=int, default=20_000, help="storm reports arriving")
+    parser.add_argument("--dispatch", type=int, default=25, help="reports sent to crews per dispatch round")
+    parser.add_argument("--checkpoints", type=int, default=5, help="full rescores to compare the queue against")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args(argv)
+
+    print(f"  {'reports':>9}{'surge':>8}{'queued':>9}{'build ms':>10}{'add us':>9}{'add p99':>10}"
+          f"{'status us':>11}{'next ms':>9}{'rescore ms':>12}{'speedup':>11}")
+    results = [run(size, args.surge, args.dispatch, args.checkpoints) for size in args.sizes]
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
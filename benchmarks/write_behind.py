@@ -0,0 +1,143 @@
+"""
+Submission latency and simulated crashes for each DataManager write mode.
+
+For every mode (synchronous writes, and write-behind with each fsync
+policy) a child process submits reports as fast as it can against a
+synthetic store, reporting each id the moment add_report returns (what
+the UI would confirm). The parent kills it with SIGKILL part-way through,
+then inspects the files the child left behind:
+- every partition must still parse (no torn writes),
+- the id counter must be above every confirmed id (no id handed out twice),
+- confirmed reports missing from disk are counted as lost. Synchronous
+  mode must lose none; write-behind may lose what was still queued.
+A kill simulates a process crash. Power loss, which is what the fsync
+policies differ on, cannot be simulated here.
+
+Usage:
+    python -m benchmarks.write_behind --reports 10000 --kill-after 300
+"""
+
+import argparse
+import json
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from utils.codec import CodecError, loads
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODES = {
+    "sync": {"NN_WRITE_MODE": "sync"},
+    "behind/always": {"NN_WRITE_MODE": "behind", "NN_FSYNC": "always"},
+    "behind/interval": {"NN_WRITE_MODE": "behind", "NN_FSYNC": "interval"},
+    "behind/count": {"NN_WRITE_MODE": "behind", "NN_FSYNC": "count"},
+}
+
+
+def child(workdir):
+    """Submit reports forever, printing "<id> <milliseconds>" per confirmed submission."""
+    import logging
+    import streamlit  # noqa: F401  (configures its loggers on import)
+    # Bare-mode Streamlit logs a warning for every session_state access
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    from utils.data_manager import DataManager
+
+    DataManager.DB_FILE = os.path.join(workdir, "reports_db.json")
+    DataManager.init_db()
+    print("ready", flush=True)
+    i = 0
+    while True:
+        began = time.perf_counter()
+        new_id = DataManager.add_report(f"Crash test {i}", "Road & Infrastructure Issues", "Potholes",
+                                        "Submitted by the write-behind crash test.", "Dhaka", "Dhaka",
+                                        23.81, 90.41, username="crashtest")
+        print(new_id, (time.perf_counter() - began) * 1000, flush=True)
+        i += 1
+
+
+def _inspect(workdir):
+    """Read what a killed child left: (ids on disk, corrupt partition files, counter value)."""
+    root = os.path.join(workdir, "reports_db")
+    ids, corrupt = set(), []
+    for dirpath, _, files in os.walk(root):
+        for name in files:
+            if not name.endswith(".json") or name.startswith("_"):
+                continue
+            try:
+                with open(os.path.join(dirpath, name), "rb") as f:
+                    ids.update(r["id"] for r in loads(f.read()))
+            except CodecError:
+                corrupt.append(name)
+    with open(os.path.join(root, "_ids.json"), encoding="utf-8") as f:
+        next_id = json.load(f)["next_id"]
+    return ids, corrupt, next_id
+
+
+def run(mode, reports, kill_after):
+    from benchmarks.synthetic import make_reports
+
+    with tempfile.TemporaryDirectory(prefix="nn-crash-") as workdir:
+        with open(os.path.join(workdir, "reports_db.json"), "w", encoding="utf-8") as f:
+            json.dump(make_reports(reports), f)
+        env = dict(os.environ, **MODES[mode])
+        proc = subprocess.Popen([sys.executable, "-m", "benchmarks.write_behind", "--child", workdir],
+                                cwd=ROOT, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        confirmed, latencies = [], []
+        for line in proc.stdout:
+            if line.startswith("ready"):
+                continue
+            new_id, ms = line.split()
+            confirmed.append(int(new_id))
+            latencies.append(float(ms))
+            if len(confirmed) >= kill_after:
+                os.kill(proc.pid, signal.SIGKILL)
+                break
+        proc.wait()
+        if not confirmed:
+            raise RuntimeError(f"{mode}: the child confirmed no submissions")
+        on_disk, corrupt, next_id = _inspect(workdir)
+
+    lost = [i for i in confirmed if i not in on_disk]
+    result = {
+        "confirmed": len(confirmed),
+        "lost": len(lost),
+        "corrupt_partitions": corrupt,
+        "id_reuse_possible": next_id <= max(confirmed),
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": sorted(latencies)[int(len(latencies) * 0.99)],
+    }
+    print(f"  {mode:<18}{result['p50_ms']:>9.2f}{result['p99_ms']:>9.2f}{result['confirmed']:>11}"
+          f"{result['lost']:>7}{len(corrupt):>9}   {'yes' if result['id_reuse_possible'] else 'no'}")
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="NagarNirman write-mode latency and crash test")
+    parser.add_argument("--reports", type=int, default=10000, help="reports in the store")
+    parser.add_argument("--kill-after", type=int, default=300, help="confirmed submissions before the kill")
+    parser.add_argument("--modes", nargs="+", choices=sorted(MODES), default=list(MODES))
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        child(args.child)
+        return 0
+
+    print(f"{args.reports} reports, SIGKILL after {args.kill_after} confirmed submissions")
+    print(f"  {'mode':<18}{'p50 ms':>9}{'p99 ms':>9}{'confirmed':>11}{'lost':>7}{'corrupt':>9}   id reuse")
+    results = {mode: run(mode, args.reports, args.kill_after) for mode in args.modes}
+    failures = [f"{mode}: {problem}" for mode, r in results.items() for problem, bad in (
+        ("partition left corrupt", r["corrupt_partitions"]),
+        ("a confirmed id can be handed out again", r["id_reuse_possible"]),
+        ("lost confirmed reports", mode == "sync" and r["lost"]),
+    ) if bad]
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,378 @@
+"""
+Headless JSON API for NagarNirman
+Lets scripts and kiosks submit and query reports without the Streamlit UI.
+Requests are authenticated with the same session tokens the UI stores in
+sessions_db.json (the st_token of a logged-in session) and go through
+DataManager, so they are saved, synced and archived like UI changes.
+
+A token is issued by every UI login (the browser keeps it in localStorage
+as nn_session_token), or, for scripts, on the server host with
+`python -m utils.api --issue-token admin`, which prints a new session for
+that account. Send it as `Authorization: Bearer <token>`.
+
+    POST  /reports               submit a report (any user; rate limited, 429)
+    GET   /reports               list reports: filters, cursor pagination
+    GET   /reports/{id}          one report
+    PATCH /reports/{id}/status   change a report's status (admins)
+
+Started inside the Streamlit process when NN_API_PORT is set, so it shares
+the change feed with the UI sessions, or on its own with
+`python -m utils.api` (use the SQLite backend then, see DataManager.BACKEND).
+"""
+
+import argparse
+import heapq
+import json
+import logging
+import math
+import os
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import streamlit as st
+
+from utils.auth_manager import AuthManager
+from utils.data_manager import DataManager
+from utils.location_data import CATEGORY_OPTIONS, get_district_coordinates
+from utils.metrics import Metrics
+from utils.rate_limit import RateLimits
+
+STATUSES = ("Pending", "In Progress", "Resolved")
+# Columns GET /reports can filter on with ?name=value
+FILTERS = ("status", "category", "subcategory", "division", "district", "submitted_by")
+
+_REPORT_PATH = re.compile(r"^/reports/(\d+)$")
+_STATUS_PATH = re.compile(r"^/reports/(\d+)/status$")
+
+
+class ApiError(Exception):
+    """A request that is answered with an error status and message."""
+
+    def __init__(self, status, message, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class ReportApi:
+    PAGE_SIZE = 100
+    MAX_PAGE_SIZE = 1000
+    MAX_BODY_BYTES = 64 * 1024
+    # Seconds an idle keep-alive connection is held open
+    IDLE_TIMEOUT = 30
+
+    # The API's DataManager "session": every request thread shares it
+    _lock = threading.RLock()
+    # token -> (user, role), valid while the user and session files are unchanged
+    _tokens = {}
+    _tokens_key = None
+    _server = None
+    _server_lock = threading.Lock()
+
+    @staticmethod
+    def _token(headers):
+        auth = headers.get("Authorization", "")
+        return auth[7:].strip() if auth.startswith("Bearer ") else None
+
+    @staticmethod
+    def _authenticate(headers):
+        """Resolve the bearer token of a request; returns (user, role)."""
+        token = ReportApi._token(headers)
+        if not token:
+            raise ApiError(401, "Missing bearer token.")
+        key = tuple(_mtime(path) for path in (AuthManager.SESSIONS_FILE, AuthManager.USERS_FILE))
+        with ReportApi._lock:
+            if key != ReportApi._tokens_key:
+                # A login, logout or account change happened: forget everything
+                ReportApi._tokens = {}
+                ReportApi._tokens_key = key
+            cached = ReportApi._tokens.get(token)
+            if cached is None:
+                cached = ReportApi._tokens[token] = AuthManager.resolve_session(token)
+        if cached[0] is None:
+            raise ApiError(401, "Invalid or expired token.")
+        return cached
+
+    @staticmethod
+    def create_report(user, body, token=None, ip=None):
+        """POST /reports: validate and submit a report; returns (201, report)."""
+        allowed, retry_after = RateLimits.check("submit", user=user["username"], session=token, ip=ip)
+        if not allowed:
+            raise ApiError(429, RateLimits.message(retry_after), retry_after=retry_after)
+        title = str(body.get("title") or "").strip()
+        description = str(body.get("description") or "").strip()
+        category = body.get("category")
+        subcategory = body.get("subcategory")
+        division = body.get("division")
+        district = body.get("district")
+        if not (title and description and category and subcategory and division and district):
+            raise ApiError(400, "title, description, category, subcategory, division and district are required.")
+        if category not in CATEGORY_OPTIONS:
+            raise ApiError(400, f"Unknown category: {category}")
+        if subcategory not in CATEGORY_OPTIONS[category]:
+            raise ApiError(400, f"Unknown subcategory for {category}: {subcategory}")
+        default_lat, default_lon = get_district_coordinates(division, district)
+        if default_lat is None:
+            raise ApiError(400, f"Unknown division/district: {division}/{district}")
+        try:
+            lat = float(body.get("lat", default_lat))
+            lon = float(body.get("lon", default_lon))
+        except (TypeError, ValueError):
+            raise ApiError(400, "lat and lon must be numbers.")
+
+        with ReportApi._lock:
+            ReportApi._sync()
+            new_id = DataManager.add_report(
+                title=title,
+                category=category,
+                subcategory=subcategory,
+                desc=description,
+                division=division,
+                district=district,
+                lat=lat,
+                lon=lon,
+                username=user["username"],
+            )
+            return 201, ReportApi._find(new_id)
+
+    @staticmethod
+    def list_reports(query):
+        """
+        GET /reports: reports in id order, filtered by column values and date.
+
+        Query parameters:
+            status, category, ...: exact matches (see FILTERS).
+            date_from, date_to: "YYYY-MM-DD" bounds on the report date.
+            limit: page size (default PAGE_SIZE, at most MAX_PAGE_SIZE).
+            cursor: next_cursor of the previous page.
+
+        Returns:
+            tuple: (200, {"reports": [...], "next_cursor": str | None})
+        """
+        params = {name: values[-1] for name, values in parse_qs(query).items()}
+        filters = {name: params[name] for name in FILTERS if params.get(name)}
+        date_from, date_to = params.get("date_from"), params.get("date_to")
+        try:
+            limit = min(int(params.get("limit", ReportApi.PAGE_SIZE)), ReportApi.MAX_PAGE_SIZE)
+            after = int(params.get("cursor") or 0)
+        except ValueError:
+            raise ApiError(400, "limit and cursor must be integers.")
+        if limit < 1:
+            raise ApiError(400, "limit must be positive.")
+
+        def matches(r):
+            return (r['id'] > after
+                    and all(r.get(name) == value for name, value in filters.items())
+                    and not (date_from and str(r.get('date', '')) < date_from)
+                    and not (date_to and str(r.get('date', '')) > date_to))
+
+        with ReportApi._lock:
+            ReportApi._sync()
+            # Reports are in id order except for concurrent submissions from other
+            # sessions, so take the lowest ids rather than the first matches.
+            # One extra tells whether there is a next page.
+            page = heapq.nsmallest(limit + 1, filter(matches, DataManager.get_all_reports()),
+                                   key=lambda r: r['id'])
+            page = [r.to_dict() for r in page]
+        more = len(page) > limit
+        page = page[:limit]
+        return 200, {"reports": page, "next_cursor": str(page[-1]['id']) if more else None}
+
+    @staticmethod
+    def get_report(report_id):
+        """GET /reports/{id}."""
+        with ReportApi._lock:
+            ReportApi._sync()
+            report = ReportApi._find(report_id)
+        if report is None:
+            raise ApiError(404, f"Report #{report_id} not found.")
+        return 200, report
+
+    @staticmethod
+    def update_status(role, report_id, body):
+        """PATCH /reports/{id}/status: admins only; body {"status": ...}."""
+        if role != "admin":
+            raise ApiError(403, "Only administrators can change a report's status.")
+        status = body.get("status")
+        if status not in STATUSES:
+            raise ApiError(400, f"status must be one of: {', '.join(STATUSES)}")
+        with ReportApi._lock:
+            ReportApi._sync()
+            if not DataManager.update_status(report_id, status):
+                raise ApiError(404, f"Report #{report_id} not found.")
+            return 200, ReportApi._find(report_id)
+
+    @staticmethod
+    def _sync():
+        """Load the API's session on first use and apply other sessions' changes; hold _lock."""
+        DataManager.init_db()
+        DataManager.sync()
+
+    @staticmethod
+    def _find(report_id):
+        row = st.session_state.report_rows.get(report_id)
+        return None if row is None else st.session_state.reports[row].to_dict()
+
+    @staticmethod
+    def handle(method, path, headers, body, ip=None):
+        """
+        Route one request from client address `ip`.
+
+        Returns:
+            tuple: (status: int, payload: dict, route: str)
+        """
+        url = urlsplit(path)
+        target = url.path.rstrip("/") or "/"
+        route = "other"
+        try:
+            user, role = ReportApi._authenticate(headers)
+            if target == "/reports":
+                route = "/reports"
+                if method == "POST":
+                    return (*ReportApi.create_report(user, ReportApi._json(body), ReportApi._token(headers), ip),
+                            route)
+                if method == "GET":
+                    return (*ReportApi.list_reports(url.query), route)
+            elif _REPORT_PATH.match(target):
+                route = "/reports/{id}"
+                if method == "GET":
+                    return (*ReportApi.get_report(int(_REPORT_PATH.match(target).group(1))), route)
+            elif _STATUS_PATH.match(target):
+                route = "/reports/{id}/status"
+                if method == "PATCH":
+                    report_id = int(_STATUS_PATH.match(target).group(1))
+                    return (*ReportApi.update_status(role, report_id, ReportApi._json(body)), route)
+            else:
+                raise ApiError(404, f"No such endpoint: {target}")
+            raise ApiError(405, f"{method} is not allowed on {route}.")
+        except ApiError as e:
+            payload = {"error": str(e)}
+            if e.retry_after is not None:
+                payload["retry_after"] = e.retry_after
+            return e.status, payload, route
+
+    @staticmethod
+    def _json(body):
+        try:
+            data = json.loads(body or b"{}")
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            raise ApiError(400, "Request body must be JSON.")
+        if not isinstance(data, dict):
+            raise ApiError(400, "Request body must be a JSON object.")
+        return data
+
+    @staticmethod
+    def start(port, host="127.0.0.1"):
+        """Serve the API on daemon threads; returns the server."""
+        logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").addFilter(_BareSessionFilter())
+        server = _Server((host, port), _Handler)
+        threading.Thread(target=server.serve_forever, name="report-api", daemon=True).start()
+        return server
+
+    @staticmethod
+    def start_configured():
+        """
+        Start the API on NN_API_PORT (NN_API_HOST, default 127.0.0.1), if set.
+        Safe to call on every rerun: it is only started once per process.
+        """
+        with ReportApi._server_lock:
+            port = os.environ.get("NN_API_PORT")
+            if ReportApi._server is None and port:
+                ReportApi._server = ReportApi.start(int(port), os.environ.get("NN_API_HOST", "127.0.0.1"))
+        return ReportApi._server
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def process_request(self, request, client_address):
+        # Named so _BareSessionFilter can recognise request threads
+        threading.Thread(target=self.process_request_thread, args=(request, client_address),
+                         name="report-api-request", daemon=True).start()
+
+
+class _BareSessionFilter(logging.Filter):
+    """Drop Streamlit's missing-ScriptRunContext warning for API threads, which use the bare-mode session on purpose."""
+
+    def filter(self, record):
+        return not threading.current_thread().name.startswith("report-api")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps connections open between requests (every response has a Content-Length)
+    protocol_version = "HTTP/1.1"
+    timeout = ReportApi.IDLE_TIMEOUT
+    # Headers and body are written separately; don't let Nagle hold the body back
+    disable_nagle_algorithm = True
+
+    def _dispatch(self):
+        started = time.perf_counter()
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > ReportApi.MAX_BODY_BYTES:
+            status, payload, route = 413, {"error": "Request body too large."}, "other"
+            self.close_connection = True
+        else:
+            body = self.rfile.read(length) if length else b""
+            status, payload, route = ReportApi.handle(self.command, self.path, self.headers, body,
+                                                      self.client_address[0])
+        data = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        if "retry_after" in payload:
+            self.send_header("Retry-After", str(math.ceil(payload["retry_after"])))
+        self.end_headers()
+        self.wfile.write(data)
+        Metrics.api_requests.inc(method=self.command, route=route, status=status)
+        Metrics.api_latency.observe(time.perf_counter() - started, method=self.command)
+
+    do_GET = do_POST = do_PATCH = do_PUT = do_DELETE = _dispatch
+
+    def log_message(self, *args):
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="NagarNirman headless report API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--issue-token", metavar="USERNAME",
+                        help="print a new session token for USERNAME (e.g. admin) and exit")
+    args = parser.parse_args(argv)
+
+    if args.issue_token:
+        if args.issue_token != AuthManager.ADMIN_USERNAME and args.issue_token not in AuthManager._load_users():
+            print(f"error: no account named {args.issue_token}", file=sys.stderr)
+            return 1
+        print(AuthManager.create_session(args.issue_token))
+        return 0
+
+    # Request threads use Streamlit's bare-mode session state, which logs a
+    # warning for every access
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    if DataManager.BACKEND != "sqlite":
+        print("warning: with the JSON backend a separately running Streamlit server neither sees "
+              "this API's writes nor keeps them; set NN_STORE_BACKEND=sqlite or use NN_API_PORT",
+              file=sys.stderr)
+    server = ReportApi.start(args.port, args.host)
+    print(f"Serving the report API on http://{args.host}:{server.server_address[1]}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
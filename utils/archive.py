@@ -0,0 +1,197 @@
+"""
+Cold storage for NagarNirman reports
+Resolved reports that have stayed resolved for a while are moved out of
+the working set into gzip-compressed JSON-lines partitions, one per month
+of the report date (archive/<yyyy>/<yyyy-mm>.jsonl.gz). A rollup file keeps
+per-partition counts so dashboard totals include archived reports without
+reading them. Archived reports can still be searched and exported.
+"""
+
+import gzip
+import json
+import os
+import threading
+from datetime import date, datetime
+from utils.storage import STORE_LOCK, process_lock, read_json, write_json
+
+
+class ReportArchive:
+    ARCHIVE_DIR = "archive"
+    # Days a report stays resolved before it leaves the working set
+    ARCHIVE_AFTER_DAYS = int(os.environ.get("NN_ARCHIVE_AFTER_DAYS", "90") or 90)
+    # Columns counted per partition for dashboard totals
+    ROLLUP_FIELDS = ("status", "category", "division", "district")
+
+    # ((rollup file mtime, divisions), summed totals)
+    _totals = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _rollups_path():
+        return os.path.join(ReportArchive.ARCHIVE_DIR, "rollups.json")
+
+    @staticmethod
+    def lock_path(name="write"):
+        """Lock file serialising archive work across server processes."""
+        return os.path.join(ReportArchive.ARCHIVE_DIR, f".{name}.lock")
+
+    @staticmethod
+    def _partition_path(month):
+        return os.path.join(ReportArchive.ARCHIVE_DIR, month[:4], f"{month}.jsonl.gz")
+
+    @staticmethod
+    def partition_of(report):
+        """Partition key: the report's month ("2025-12"), or "undated"."""
+        value = str(report.get('date') or "")
+        return value[:7] if len(value) >= 7 else "undated"
+
+    @staticmethod
+    def is_due(report, today=None):
+        """Whether a report has been resolved for at least ARCHIVE_AFTER_DAYS."""
+        if report.get('status') != "Resolved" or not report.get('resolved_at'):
+            return False
+        try:
+            resolved = datetime.strptime(report['resolved_at'], "%Y-%m-%d").date()
+        except ValueError:
+            return False
+        return ((today or date.today()) - resolved).days >= ReportArchive.ARCHIVE_AFTER_DAYS
+
+    @staticmethod
+    def partitions():
+        """Archived partition keys, oldest first."""
+        return sorted(read_json(ReportArchive._rollups_path(), {}))
+
+    @staticmethod
+    def read_partition(month):
+        """All archived reports of one partition, as dicts."""
+        path = ReportArchive._partition_path(month)
+        if not os.path.exists(path):
+            return []
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    @staticmethod
+    def _rollup(reports):
+        """Per-division counts for one partition, plus its highest report id."""
+        divisions = {}
+        for r in reports:
+            rollup = divisions.setdefault(r.get('division'), {
+                "total": 0, **{name: {} for name in ReportArchive.ROLLUP_FIELDS if name != "division"}})
+            rollup["total"] += 1
+            for name in rollup:
+                if name != "total":
+                    value = r.get(name)
+                    rollup[name][value] = rollup[name].get(value, 0) + 1
+        return {"max_id": max((r['id'] for r in reports), default=0), "divisions": divisions}
+
+    @staticmethod
+    def archive(reports):
+        """
+        Append reports (dicts) to their partitions and refresh the rollups.
+
+        Partitions are rewritten atomically, and a report archived twice
+        (e.g. after a crash before the working set was saved) is kept once.
+        """
+        by_month = {}
+        for r in reports:
+            by_month.setdefault(ReportArchive.partition_of(r), []).append(r)
+        # Other server processes may archive into the same partitions. STORE_LOCK
+        # first, as DataManager.archive_resolved() already holds it when it calls this.
+        with STORE_LOCK, process_lock(ReportArchive.lock_path()):
+            rollups = read_json(ReportArchive._rollups_path(), {})
+            for month, new in by_month.items():
+                merged = {r['id']: r for r in ReportArchive.read_partition(month)}
+                merged.update((r['id'], r) for r in new)
+                rows = [merged[k] for k in sorted(merged)]
+                path = ReportArchive._partition_path(month)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with gzip.open(f"{path}.tmp", 'wt', encoding='utf-8') as f:
+                    for r in rows:
+                        f.write(json.dumps(r, ensure_ascii=False, separators=(",", ":")))
+                        f.write("\n")
+                os.replace(f"{path}.tmp", path)
+                rollups[month] = ReportArchive._rollup(rows)
+            write_json(ReportArchive._rollups_path(), rollups)
+        return len(reports)
+
+    @staticmethod
+    def totals(divisions=None):
+        """
+        Counts over archived reports, summed from the rollups.
+
+        Args:
+            divisions: only count these divisions (default: all).
+
+        Returns:
+            dict: {"total": int, "status": {label: int}, "category": ..., ...}
+        """
+        path = ReportArchive._rollups_path()
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            mtime = None
+        key = (mtime, tuple(sorted(divisions)) if divisions is not None else None)
+        with ReportArchive._lock:
+            cached = ReportArchive._totals
+            if cached is not None and cached[0] == key:
+                return cached[1]
+            totals = {"total": 0, **{name: {} for name in ReportArchive.ROLLUP_FIELDS}}
+            for partition in read_json(path, {}).values():
+                for division, rollup in partition["divisions"].items():
+                    if divisions is not None and division not in divisions:
+                        continue
+                    totals["total"] += rollup["total"]
+                    totals["division"][division] = totals["division"].get(division, 0) + rollup["total"]
+                    for name in ReportArchive.ROLLUP_FIELDS:
+                        for label, count in rollup.get(name, {}).items():
+                            totals[name][label] = totals[name].get(label, 0) + count
+            ReportArchive._totals = (key, totals)
+            return totals
+
+    @staticmethod
+    def count(name=None, value=None, divisions=None):
+        """Archived reports in total, or those whose `name` column equals `value`."""
+        totals = ReportArchive.totals(divisions)
+        if name is None:
+            return totals["total"]
+        return totals[name].get(value, 0)
+
+    @staticmethod
+    def max_id():
+        """Highest report id ever archived (0 if none)."""
+        return max((p["max_id"] for p in read_json(ReportArchive._rollups_path(), {}).values()), default=0)
+
+    @staticmethod
+    def search(text="", date_from=None, date_to=None, limit=500, **filters):
+        """
+        Scan archived reports, newest partition first.
+
+        Args:
+            text: case-insensitive match against title and description;
+                "#123" matches the report id.
+            date_from, date_to: "YYYY-MM-DD" bounds on the report date;
+                partitions outside the range are not read.
+            filters: exact matches, e.g. division="Dhaka".
+        """
+        text = (text or "").strip().lower()
+        wanted_id = int(text[1:]) if text.startswith("#") and text[1:].isdigit() else None
+        results = []
+        for month in reversed(ReportArchive.partitions()):
+            if month != "undated" and ((date_from and month < date_from[:7]) or (date_to and month > date_to[:7])):
+                continue
+            for r in reversed(ReportArchive.read_partition(month)):
+                if wanted_id is not None:
+                    if r['id'] != wanted_id:
+                        continue
+                elif text and text not in f"{r.get('title', '')}\n{r.get('description', '')}".lower():
+                    continue
+                if date_from and str(r.get('date', '')) < date_from:
+                    continue
+                if date_to and str(r.get('date', '')) > date_to:
+                    continue
+                if any(r.get(k) != v for k, v in filters.items() if v):
+                    continue
+                results.append(r)
+                if len(results) >= limit:
+                    return results
+        return results
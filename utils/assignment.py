@@ -0,0 +1,97 @@
+"""
+Volunteer assignments for NagarNirman
+Route planning (utils/routing.py) runs as background jobs on a worker
+thread of the server process, so the admin page stays responsive while a
+division is planned; the routes handed to volunteers, and the volunteer
+roster with each one's capacity, are kept in assignments.json.
+"""
+
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from utils.storage import STORE_LOCK, read_json, write_json
+
+
+class AssignmentJobs:
+    """Route-planning jobs of one server process and the worker that runs them."""
+
+    # Finished jobs kept for their sessions to pick up
+    MAX_JOBS = 32
+
+    def __init__(self, workers=1):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="route-planner")
+        self._jobs = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args):
+        """Run fn(*args) in the background; returns the job id for get()."""
+        with self._lock:
+            job_id = next(self._ids)
+            self._jobs[job_id] = {"id": job_id, "state": "queued", "submitted": time.time(),
+                                  "result": None, "error": None}
+            finished = [i for i, job in self._jobs.items() if job["state"] in ("done", "failed")]
+            for i in finished[:max(len(self._jobs) - self.MAX_JOBS, 0)]:
+                del self._jobs[i]
+        self._pool.submit(self._run, job_id, fn, args)
+        return job_id
+
+    def _run(self, job_id, fn, args):
+        job = self._jobs[job_id]
+        job["state"] = "running"
+        try:
+            job["result"] = fn(*args)
+            job["state"] = "done"
+        except Exception as e:
+            job["error"] = f"{type(e).__name__}: {e}"
+            job["state"] = "failed"
+        job["finished"] = time.time()
+
+    def get(self, job_id):
+        """A copy of the job's state ("queued", "running", "done", "failed"), or None if it is unknown or expired."""
+        job = self._jobs.get(job_id)
+        return dict(job) if job is not None else None
+
+
+class Assignments:
+    FILE = "assignments.json"
+    # Reports given to a volunteer when the roster doesn't say
+    DEFAULT_CAPACITY = 25
+    # Most stops one route may have (a shift's worth, and what 2-opt handles quickly)
+    MAX_CAPACITY = 200
+
+    @staticmethod
+    def _load():
+        return read_json(Assignments.FILE, {"volunteers": {}, "routes": {}})
+
+    @staticmethod
+    def roster():
+        """Volunteers and their capacities, as {name: capacity}."""
+        return Assignments._load()["volunteers"]
+
+    @staticmethod
+    def save_roster(volunteers):
+        with STORE_LOCK:
+            data = Assignments._load()
+            data["volunteers"] = {name: min(max(int(capacity), 1), Assignments.MAX_CAPACITY)
+                                  for name, capacity in volunteers}
+            write_json(Assignments.FILE, data)
+
+    @staticmethod
+    def routes():
+        """The current route of each volunteer, as {name: {division, stops, km, assigned_at}}."""
+        return Assignments._load()["routes"]
+
+    @staticmethod
+    def save_routes(division, routes):
+        """Give each volunteer in `routes` (plan_routes() output) their new route, replacing any old one."""
+        assigned_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with STORE_LOCK:
+            data = Assignments._load()
+            for route in routes:
+                if route["stops"]:
+                    data["routes"][route["volunteer"]] = {"division": division, "stops": route["stops"],
+                                                          "km": route["km"], "assigned_at": assigned_at}
+            write_json(Assignments.FILE, data)
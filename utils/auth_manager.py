@@ -4,10 +4,13 @@ Handles user registration, login, logout, and role-based access control.
 """
 
 import streamlit as st
-import json
 import os
 import hashlib
 from datetime import datetime
+from utils.metrics import Metrics
+from utils.storage import CorruptStoreError, read_json, write_json
+from utils.backup import BackupManager
+from utils.rate_limit import RateLimits
 
 class AuthManager:
     USERS_FILE = "users_db.json"
@@ -24,41 +27,40 @@ class AuthManager:
     
     @staticmethod
     def _load_users():
-        """Load users from JSON file."""
-        if os.path.exists(AuthManager.USERS_FILE):
-            try:
-                with open(AuthManager.USERS_FILE, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, IOError):
-                return {}
-        return {}
+        """Load users from JSON file, restoring from backup if it is corrupt."""
+        try:
+            return read_json(AuthManager.USERS_FILE, {})
+        except CorruptStoreError:
+            users, message = BackupManager.recover("users", AuthManager.USERS_FILE)
+            (st.warning if users is not None else st.error)(message)
+            return users if users is not None else {}
     
     @staticmethod
     def _save_users(users):
         """Save users to JSON file."""
         try:
-            with open(AuthManager.USERS_FILE, 'w', encoding='utf-8') as f:
-                json.dump(users, f, indent=2, ensure_ascii=False)
+            with Metrics.write_latency.time(store="users"):
+                write_json(AuthManager.USERS_FILE, users)
         except IOError as e:
             st.error(f"Failed to save user data: {e}")
     
     @staticmethod
     def _load_sessions():
-        """Load sessions from JSON file."""
-        if os.path.exists(AuthManager.SESSIONS_FILE):
-            try:
-                with open(AuthManager.SESSIONS_FILE, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, IOError):
-                return {}
-        return {}
+        """Load sessions from JSON file, restoring from backup if it is corrupt."""
+        try:
+            return read_json(AuthManager.SESSIONS_FILE, {})
+        except CorruptStoreError:
+            sessions, message = BackupManager.recover("sessions", AuthManager.SESSIONS_FILE)
+            (st.warning if sessions is not None else st.error)(message)
+            return sessions if sessions is not None else {}
     
     @staticmethod
     def _save_sessions(sessions):
         """Save sessions to JSON file."""
         try:
-            with open(AuthManager.SESSIONS_FILE, 'w', encoding='utf-8') as f:
-                json.dump(sessions, f, indent=2, ensure_ascii=False)
+            with Metrics.write_latency.time(store="sessions"):
+                write_json(AuthManager.SESSIONS_FILE, sessions)
+            Metrics.session_file_bytes.set(os.path.getsize(AuthManager.SESSIONS_FILE))
         except IOError as e:
             st.error(f"Failed to save session data: {e}")
     
@@ -93,6 +95,10 @@ class AuthManager:
         if username.lower() == "admin":
             return False, "This username is reserved."
         
+        allowed, retry_after = RateLimits.check("register", **RateLimits.client())
+        if not allowed:
+            return False, RateLimits.message(retry_after)
+        
         users = AuthManager._load_users()
         
         # Check if username already exists
@@ -127,25 +133,45 @@ class AuthManager:
         if not username or not password:
             return False, "Username and password are required."
         
+        # Throttle password guessing before any hashing or file reads. The
+        # account's bucket is keyed by client too, and only failures use it up.
+        client = RateLimits.client()
+        account = f"{username}|{client['ip'] or client['session']}"
+        allowed, retry_after = RateLimits.check("login", **client)
+        if allowed:
+            retry_after = RateLimits.retry_after("login_failure", user=account)
+        if retry_after:
+            Metrics.logins.inc(result="throttled")
+            return False, RateLimits.message(retry_after)
+        
         # Check for admin login
         if username == AuthManager.ADMIN_USERNAME:
             if AuthManager._hash_password(password) == AuthManager.ADMIN_PASSWORD_HASH:
                 st.session_state.authenticated = True
                 st.session_state.user = {"username": "admin", "full_name": "Administrator"}
                 st.session_state.role = "admin"
+                # Persistent session, which is also the admin's API bearer token
+                st.session_state.session_token = AuthManager.create_session(AuthManager.ADMIN_USERNAME)
+                Metrics.logins.inc(result="success")
                 return True, "Welcome, Administrator!"
             else:
+                RateLimits.charge("login_failure", user=account)
+                Metrics.logins.inc(result="failure")
                 return False, "Invalid credentials."
         
         # Check for regular user login
         users = AuthManager._load_users()
         
         if username not in users:
+            RateLimits.charge("login_failure", user=account)
+            Metrics.logins.inc(result="failure")
             return False, "Invalid username or password."
         
         user_data = users[username]
         
         if user_data["password_hash"] != AuthManager._hash_password(password):
+            RateLimits.charge("login_failure", user=account)
+            Metrics.logins.inc(result="failure")
             return False, "Invalid username or password."
         
         # Login successful
@@ -160,6 +186,7 @@ class AuthManager:
         # Create persistent session
         token = AuthManager.create_session(username)
         st.session_state.session_token = token
+        Metrics.logins.inc(result="success")
         
         return True, f"Welcome, {user_data.get('full_name', username)}!"
 
@@ -177,42 +204,48 @@ class AuthManager:
         return token
 
     @staticmethod
-    def validate_session(token):
-        """Validate a session token and log in the user if valid."""
+    def resolve_session(token):
+        """
+        Look up the user a session token belongs to, without logging in.
+
+        Returns:
+            tuple: (user: dict | None, role: str | None)
+        """
         if not token:
-            return False
-            
+            return None, None
+
         sessions = AuthManager._load_sessions()
         if token not in sessions:
-            return False
-            
-        session_data = sessions[token]
-        username = session_data["username"]
-        
-        # Admin check
+            return None, None
+
+        username = sessions[token]["username"]
         if username == AuthManager.ADMIN_USERNAME:
-            st.session_state.authenticated = True
-            st.session_state.user = {"username": "admin", "full_name": "Administrator"}
-            st.session_state.role = "admin"
-            st.session_state.session_token = token
-            st.session_state.current_page = "admin"
-            return True
-            
-        # User check
+            return {"username": "admin", "full_name": "Administrator"}, "admin"
+
         users = AuthManager._load_users()
         if username not in users:
-            return False
-            
+            return None, None
+
         user_data = users[username]
-        st.session_state.authenticated = True
-        st.session_state.user = {
+        user = {
             "username": username,
             "full_name": user_data.get("full_name", username),
             "email": user_data.get("email", "")
         }
-        st.session_state.role = user_data.get("role", "user")
+        return user, user_data.get("role", "user")
+
+    @staticmethod
+    def validate_session(token):
+        """Validate a session token and log in the user if valid."""
+        user, role = AuthManager.resolve_session(token)
+        if user is None:
+            return False
+
+        st.session_state.authenticated = True
+        st.session_state.user = user
+        st.session_state.role = role
         st.session_state.session_token = token
-        st.session_state.current_page = "home"
+        st.session_state.current_page = "admin" if user["username"] == AuthManager.ADMIN_USERNAME else "home"
         return True
     
     @staticmethod
@@ -254,3 +287,10 @@ class AuthManager:
     def is_user():
         """Check if the current user is a regular user."""
         return st.session_state.get('role', None) == "user"
+    
+    @staticmethod
+    def get_contacts(usernames):
+        """Get where each of `usernames` can be notified, as {username: {"email": ..., "sms": phone}}."""
+        users = AuthManager._load_users()
+        return {name: {"email": users[name].get('email'), "sms": users[name].get('phone')}
+                for name in usernames if name in users}
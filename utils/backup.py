@@ -0,0 +1,384 @@
+"""
+Backups for NagarNirman
+Compressed, checksummed archives of the JSON stores. A full snapshot is
+followed by incremental deltas, holding only changed and deleted records,
+until the next full snapshot. Restore replays a chain and verifies the
+checksum of every archive before anything is written back.
+
+Usage:
+    python -m utils.backup snapshot [--full]
+    python -m utils.backup list
+    python -m utils.backup verify
+    python -m utils.backup restore [--seq N] [--store reports ...]
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from utils.metrics import Metrics
+from utils.storage import STORE_LOCK, CorruptStoreError, process_lock, quarantine, read_json, write_json
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class BackupError(Exception):
+    """A backup archive is missing, corrupt or fails its checksum."""
+
+
+def _stores():
+    """Store name -> file path for everything that is backed up."""
+    # Imported here: both managers import this module
+    from utils.auth_manager import AuthManager
+    from utils.data_manager import DataManager
+    if DataManager.BACKEND == "sqlite":
+        # Reports live in the shared database (see _read_store)
+        stores = {"reports": None}
+    else:
+        stores = {f"reports/{key}": DataManager.partition_path(key) for key in DataManager.list_partitions()}
+    stores["users"] = AuthManager.USERS_FILE
+    stores["sessions"] = AuthManager.SESSIONS_FILE
+    return stores
+
+
+def _read_store(path):
+    if path is None:
+        from utils.data_manager import DataManager
+        return DataManager._sqlite().load()
+    return read_json(path, [])
+
+
+def _write_store(name, data):
+    """Write a restored store back to its file (or the SQLite database)."""
+    from utils.data_manager import DataManager
+    if name == "reports" and DataManager.BACKEND == "sqlite":
+        DataManager._sqlite().replace_all(data)
+        return
+    if name.startswith("reports/"):
+        path = DataManager.partition_path(name[len("reports/"):])
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        DataManager._write_partition_file(path, data)
+        return
+    if name == "reports":
+        # Taken before the report store was partitioned; migrated on next load
+        path = DataManager.DB_FILE
+    else:
+        path = _stores()[name]
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    write_json(path, data)
+
+
+def _to_records(data):
+    """Key a store's contents for diffing: lists of reports by id, dicts as-is."""
+    if isinstance(data, list):
+        return "list", {str(r["id"]): r for r in data}
+    return "dict", dict(data)
+
+
+def _from_records(shape, records):
+    if shape == "list":
+        # Report ids are allocated in increasing order, so id order is insertion order
+        return [records[k] for k in sorted(records, key=int)]
+    return records
+
+
+def _compress(payload):
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=10).compress(payload), "zst"
+    return gzip.compress(payload, compresslevel=6, mtime=0), "gz"
+
+
+def _decompress(data, filename):
+    if filename.endswith(".zst"):
+        if zstandard is None:
+            raise BackupError(f"{filename}: zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+class BackupManager:
+    BACKUP_DIR = "backups"
+    # Incremental backups taken between two full snapshots
+    FULL_EVERY = 12
+    # Full snapshots (with their incrementals) kept on disk
+    KEEP_FULL = 3
+    # Seconds between scheduled backups (NN_BACKUP_INTERVAL, 0 disables)
+    INTERVAL = int(os.environ.get("NN_BACKUP_INTERVAL", "900") or 0)
+
+    # Last state written, so an incremental doesn't have to replay the chain
+    _last = None
+    _lock = threading.Lock()
+    _scheduler = None
+
+    @staticmethod
+    def _manifest_path():
+        return os.path.join(BackupManager.BACKUP_DIR, "manifest.json")
+
+    @staticmethod
+    def _lock_path():
+        # Every server process runs a scheduler; they take turns on the manifest
+        return os.path.join(BackupManager.BACKUP_DIR, ".lock")
+
+    @staticmethod
+    def list_backups():
+        """Manifest entries, oldest first."""
+        try:
+            return read_json(BackupManager._manifest_path(), {"backups": []})["backups"]
+        except CorruptStoreError as e:
+            raise BackupError(str(e)) from e
+
+    @staticmethod
+    def _read_archive(entry):
+        """Load one archive after checking its SHA-256."""
+        path = os.path.join(BackupManager.BACKUP_DIR, entry["file"])
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError as e:
+            raise BackupError(f"{entry['file']}: {e}") from e
+        if hashlib.sha256(data).hexdigest() != entry["sha256"]:
+            raise BackupError(f"{entry['file']}: checksum mismatch")
+        try:
+            return json.loads(_decompress(data, entry["file"]))
+        except (OSError, EOFError, ValueError) as e:
+            raise BackupError(f"{entry['file']}: {e}") from e
+
+    @staticmethod
+    def _chain(entries, seq=None):
+        """Entries to replay to reach `seq` (default: latest): its full snapshot onwards."""
+        if seq is not None:
+            entries = [e for e in entries if e["seq"] <= seq]
+        if not entries or (seq is not None and entries[-1]["seq"] != seq):
+            raise BackupError(f"No backup with sequence {seq}" if seq is not None else "No backups found")
+        target = entries[-1]
+        return [e for e in entries if e["base"] == target["base"] and e["seq"] <= target["seq"]]
+
+    @staticmethod
+    def _replay(chain):
+        """Rebuild {store: (shape, records)} from a full snapshot and its deltas."""
+        state = {}
+        for entry in chain:
+            archive = BackupManager._read_archive(entry)
+            for name, store in archive["stores"].items():
+                if archive["kind"] == "full":
+                    state[name] = (store["shape"], store["records"])
+                else:
+                    shape, records = state.get(name, (store["shape"], {}))
+                    records = dict(records)
+                    records.update(store["set"])
+                    for key in store["delete"]:
+                        records.pop(key, None)
+                    state[name] = (shape, records)
+        return state
+
+    @staticmethod
+    def snapshot(full=False):
+        """
+        Write a backup of every store.
+
+        Returns:
+            dict | None: The new manifest entry, or None if nothing changed
+            since the previous backup.
+        """
+        with BackupManager._lock, process_lock(BackupManager._lock_path()):
+            with STORE_LOCK:
+                try:
+                    current = {name: _to_records(_read_store(path))
+                               for name, path in _stores().items()}
+                except CorruptStoreError as e:
+                    raise BackupError(f"Refusing to back up a corrupt store: {e}") from e
+
+            entries = BackupManager.list_backups()
+            last = entries[-1] if entries else None
+            since_full = sum(1 for e in entries if last and e["base"] == last["base"]) if last else 0
+            full = full or last is None or since_full > BackupManager.FULL_EVERY
+
+            if full:
+                kind, stores = "full", {name: {"shape": shape, "records": records}
+                                        for name, (shape, records) in current.items()}
+            else:
+                cached = BackupManager._last
+                previous = cached[1] if cached and cached[0] == last["seq"] else \
+                    BackupManager._replay(BackupManager._chain(entries))
+                kind, stores = "incremental", {}
+                for name, (shape, records) in current.items():
+                    old = previous.get(name, (shape, {}))[1]
+                    changed = {k: v for k, v in records.items() if old.get(k) != v}
+                    deleted = [k for k in old if k not in records]
+                    if changed or deleted:
+                        stores[name] = {"shape": shape, "set": changed, "delete": deleted}
+                if not stores:
+                    BackupManager._last = (last["seq"], current)
+                    return None
+
+            seq = last["seq"] + 1 if last else 1
+            payload = json.dumps({"kind": kind, "seq": seq, "created": time.time(), "stores": stores},
+                                 ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            data, ext = _compress(payload)
+            entry = {
+                "seq": seq,
+                "kind": kind,
+                "base": seq if full else last["base"],
+                "file": f"{seq:06d}-{kind}.json.{ext}",
+                "sha256": hashlib.sha256(data).hexdigest(),
+                "bytes": len(data),
+                "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            }
+            os.makedirs(BackupManager.BACKUP_DIR, exist_ok=True)
+            path = os.path.join(BackupManager.BACKUP_DIR, entry["file"])
+            with open(f"{path}.tmp", "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(f"{path}.tmp", path)
+            entries.append(entry)
+            write_json(BackupManager._manifest_path(), {"backups": BackupManager._prune(entries)})
+            BackupManager._last = (seq, current)
+            Metrics.backups.inc(kind=kind)
+            return entry
+
+    @staticmethod
+    def _prune(entries):
+        """Drop chains older than the newest KEEP_FULL full snapshots; returns the kept entries."""
+        fulls = [e["seq"] for e in entries if e["kind"] == "full"]
+        if len(fulls) <= BackupManager.KEEP_FULL:
+            return entries
+        cutoff = fulls[-BackupManager.KEEP_FULL]
+        for entry in entries:
+            if entry["seq"] < cutoff:
+                try:
+                    os.remove(os.path.join(BackupManager.BACKUP_DIR, entry["file"]))
+                except OSError:
+                    pass
+        return [e for e in entries if e["seq"] >= cutoff]
+
+    @staticmethod
+    def verify():
+        """
+        Check every archive's checksum and that each chain replays.
+
+        Returns:
+            list: Problems found (empty when all backups are intact).
+        """
+        problems = []
+        entries = BackupManager.list_backups()
+        for entry in entries:
+            try:
+                BackupManager._read_archive(entry)
+            except BackupError as e:
+                problems.append(str(e))
+        fulls = {e["seq"] for e in entries if e["kind"] == "full"}
+        for base in sorted({e["base"] for e in entries} - fulls):
+            problems.append(f"Full snapshot {base} is missing from the manifest")
+        return problems
+
+    @staticmethod
+    def restore(seq=None):
+        """
+        Rebuild the stores as of backup `seq` (default: the latest).
+
+        Returns:
+            dict: store name -> contents, ready to be written back.
+        """
+        state = BackupManager._replay(BackupManager._chain(BackupManager.list_backups(), seq))
+        return {name: _from_records(shape, records) for name, (shape, records) in state.items()}
+
+    @staticmethod
+    def restore_files(seq=None, stores=None):
+        """Write restored stores over the live files; returns the names written."""
+        with process_lock(BackupManager._lock_path()):
+            state = BackupManager.restore(seq)
+        written = []
+        with STORE_LOCK:
+            for name in stores or state:
+                if name not in state:
+                    raise BackupError(f"Backup has no '{name}' store")
+                _write_store(name, state[name])
+                written.append(name)
+        return written
+
+    @staticmethod
+    def recover(name, path):
+        """
+        Replace a corrupt store file with its latest backed-up contents.
+
+        The corrupt file is moved aside first, never deleted.
+
+        Returns:
+            tuple: (data | None, message: str). data is None if no backup holds the store.
+        """
+        moved = quarantine(path)
+        try:
+            data = BackupManager.restore().get(name)
+        except BackupError as e:
+            return None, f"{path} was corrupt (kept as {moved}) and could not be restored: {e}"
+        if data is None:
+            return None, f"{path} was corrupt (kept as {moved}) and no backup holds it."
+        write_json(path, data)
+        return data, f"{path} was corrupt (kept as {moved}); restored from the latest backup."
+
+    @staticmethod
+    def start_scheduler(interval=None):
+        """
+        Take a backup every `interval` seconds on a daemon thread.
+        Safe to call on every rerun: only one scheduler runs per process.
+        """
+        interval = BackupManager.INTERVAL if interval is None else interval
+        with BackupManager._lock:
+            if BackupManager._scheduler is not None or interval <= 0:
+                return BackupManager._scheduler
+
+            def loop():
+                while True:
+                    time.sleep(interval)
+                    try:
+                        BackupManager.snapshot()
+                    except (BackupError, OSError):
+                        Metrics.backups.inc(kind="failed")
+
+            BackupManager._scheduler = threading.Thread(target=loop, name="backups", daemon=True)
+            BackupManager._scheduler.start()
+            return BackupManager._scheduler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="NagarNirman store backups")
+    commands = parser.add_subparsers(dest="command", required=True)
+    snap = commands.add_parser("snapshot", help="back up all stores now")
+    snap.add_argument("--full", action="store_true", help="force a full snapshot")
+    commands.add_parser("list", help="list backups")
+    commands.add_parser("verify", help="check every archive's checksum")
+    rest = commands.add_parser("restore", help="write a backup over the live store files")
+    rest.add_argument("--seq", type=int, help="backup to restore (default: latest)")
+    rest.add_argument("--store", nargs="+", help="only restore these stores")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "snapshot":
+            entry = BackupManager.snapshot(full=args.full)
+            print(f"{entry['file']} ({entry['bytes']} bytes)" if entry else "No changes since the last backup.")
+        elif args.command == "list":
+            for e in BackupManager.list_backups():
+                print(f"{e['seq']:>6}  {e['kind']:<12}{e['created']}  {e['bytes']:>10}  {e['file']}")
+        elif args.command == "verify":
+            problems = BackupManager.verify()
+            for problem in problems:
+                print(problem)
+            print("OK" if not problems else f"{len(problems)} problem(s)")
+            return 1 if problems else 0
+        elif args.command == "restore":
+            print("Restored: " + ", ".join(BackupManager.restore_files(args.seq, args.store)))
+    except BackupError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
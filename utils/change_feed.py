@@ -0,0 +1,52 @@
+"""
+Change feed for NagarNirman
+A process-wide, append-only log of report mutations. Every Streamlit session
+keeps its own copy of the reports, so sessions pull the changes made by
+others since their last-seen sequence number instead of reloading the file.
+"""
+
+import threading
+from collections import deque
+from itertools import islice
+
+
+class ChangeFeed:
+    """Bounded log of (sequence, event) pairs with monotonically increasing sequences."""
+
+    # Sessions further behind than this many events reload the whole store
+    RETENTION = 10_000
+
+    def __init__(self, retention=RETENTION):
+        self._lock = threading.Lock()
+        self._events = deque(maxlen=retention)
+        self._seq = 0
+
+    @property
+    def latest(self):
+        """Sequence number of the most recent event (0 if none)."""
+        return self._seq
+
+    def publish(self, kind, data):
+        """Append an event and return its sequence number."""
+        with self._lock:
+            self._seq += 1
+            self._events.append((self._seq, {"kind": kind, **data}))
+            return self._seq
+
+    def since(self, seq):
+        """
+        Get the events published after `seq`.
+
+        Returns:
+            tuple: (events: list | None, latest: int). events is None when
+            `seq` has fallen out of the retained window and the caller
+            must reload everything.
+        """
+        with self._lock:
+            if seq >= self._seq:
+                return [], self._seq
+            if not self._events or self._events[0][0] > seq + 1:
+                return None, self._seq
+            # Walk back from the newest event so the cost is O(changes), not O(retention)
+            newer = list(islice(reversed(self._events), self._seq - seq))
+            return [event for _, event in reversed(newer)], self._seq
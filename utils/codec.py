@@ -0,0 +1,184 @@
+"""
+Serialisation formats for NagarNirman store files
+Encodes report partitions in one of several formats, optionally compressed,
+and decodes any of them by looking at the first bytes, so a store can switch
+format without a migration step: files are rewritten in the new format as
+they are next saved.
+
+Formats:
+    json      compact JSON (orjson when installed, else the stdlib)
+    pretty    indented JSON, as the store was first written
+    msgpack   MessagePack (needs the msgpack package)
+    records   length-prefixed JSON records, one per list item
+    indexed   JSON records behind a fixed-size index, opened lazily through
+              mmap (see utils/report_file.py)
+Compression: none, gzip, zstd (needs the zstandard package).
+"""
+
+import gzip
+import json
+import struct
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MSGPACK_MAGIC = b"NNMP"
+RECORDS_MAGIC = b"NNR1"
+INDEXED_MAGIC = b"NNX1"
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+_LENGTH = struct.Struct("<I")
+
+
+class CodecError(ValueError):
+    """Data that cannot be decoded, or a format that is not available."""
+
+
+def available_formats():
+    return ["json", "pretty", "records", "indexed"] + (["msgpack"] if msgpack is not None else [])
+
+
+def available_compressions():
+    return ["none", "gzip"] + (["zstd"] if zstandard is not None else [])
+
+
+def _json_dumps(data):
+    if orjson is not None:
+        try:
+            return orjson.dumps(data)
+        except TypeError:
+            # e.g. integer dict keys, which orjson refuses by default
+            pass
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _json_loads(raw):
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw.decode("utf-8") if isinstance(raw, (bytes, bytearray, memoryview)) else raw)
+
+
+def dumps(data, fmt="json", compression="none"):
+    """Encode `data` as bytes in `fmt`, then compress it."""
+    if fmt == "json":
+        raw = _json_dumps(data)
+    elif fmt == "pretty":
+        raw = json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+    elif fmt == "msgpack":
+        if msgpack is None:
+            raise CodecError("msgpack is not installed")
+        raw = MSGPACK_MAGIC + msgpack.packb(data, use_bin_type=True)
+    elif fmt == "records":
+        if not isinstance(data, list):
+            raise CodecError("the records format stores lists only")
+        parts = [RECORDS_MAGIC]
+        for item in data:
+            body = _json_dumps(item)
+            parts.append(_LENGTH.pack(len(body)))
+            parts.append(body)
+        raw = b"".join(parts)
+    elif fmt == "indexed":
+        if not isinstance(data, list):
+            raise CodecError("the indexed format stores report lists only")
+        # Deferred: utils.report_file imports this module
+        from utils.report_file import encode
+        raw = encode(data)
+    else:
+        raise CodecError(f"Unknown format: {fmt}")
+
+    if compression in (None, "none"):
+        return raw
+    if compression == "gzip":
+        # Level 1: store files are rewritten often, so favour speed over ratio
+        return gzip.compress(raw, compresslevel=1, mtime=0)
+    if compression == "zstd":
+        if zstandard is None:
+            raise CodecError("zstandard is not installed")
+        return zstandard.ZstdCompressor(level=3).compress(raw)
+    raise CodecError(f"Unknown compression: {compression}")
+
+
+def detect(raw):
+    """
+    Identify encoded data from its first bytes.
+
+    Returns:
+        tuple: (format: str, compression: str)
+    """
+    compression = "none"
+    if raw[:2] == GZIP_MAGIC:
+        compression, raw = "gzip", gzip.decompress(raw)
+    elif raw[:4] == ZSTD_MAGIC:
+        compression, raw = "zstd", _zstd_decompress(raw)
+    return _detect_format(raw), compression
+
+
+def _detect_format(raw):
+    head = bytes(raw[:4])
+    if head == MSGPACK_MAGIC:
+        return "msgpack"
+    if head == RECORDS_MAGIC:
+        return "records"
+    if head == INDEXED_MAGIC:
+        return "indexed"
+    stripped = bytes(raw[:64]).lstrip()
+    if stripped[:1] in (b"[", b"{"):
+        return "pretty" if stripped[1:2] in (b"\n", b"\r") else "json"
+    raise CodecError("Unrecognised store format")
+
+
+def _zstd_decompress(raw):
+    if zstandard is None:
+        raise CodecError("zstandard is not installed")
+    # Frames written by ZstdCompressor.compress() record their size
+    return zstandard.ZstdDecompressor().decompress(raw)
+
+
+def loads(raw):
+    """Decode bytes written by dumps(), in any format and compression (or plain JSON)."""
+    if raw[:2] == GZIP_MAGIC:
+        raw = gzip.decompress(raw)
+    elif raw[:4] == ZSTD_MAGIC:
+        raw = _zstd_decompress(raw)
+    fmt = _detect_format(raw)
+    try:
+        if fmt == "msgpack":
+            if msgpack is None:
+                raise CodecError("msgpack is not installed")
+            return msgpack.unpackb(memoryview(raw)[len(MSGPACK_MAGIC):], raw=False, strict_map_key=False)
+        if fmt == "records":
+            return list(iter_records(raw))
+        if fmt == "indexed":
+            from utils.report_file import decode_all
+            return decode_all(raw)
+        return _json_loads(raw)
+    except CodecError:
+        raise
+    except Exception as e:
+        # Truncated or garbled data: every decoder raises something different
+        raise CodecError(f"Cannot decode {fmt} data: {e}") from e
+
+
+def iter_records(raw):
+    """Decode the items of a records-format buffer one at a time."""
+    view = memoryview(raw)
+    offset = len(RECORDS_MAGIC)
+    while offset < len(view):
+        (length,) = _LENGTH.unpack_from(view, offset)
+        offset += _LENGTH.size
+        if offset + length > len(view):
+            raise CodecError("Truncated record")
+        yield _json_loads(bytes(view[offset:offset + length]))
+        offset += length
@@ -1,37 +1,356 @@
 import streamlit as st
-from datetime import datetime
-import json
-import os
+from datetime import datetime, timedelta
 import io
-try:
-    from fpdf import FPDF
-except ImportError:
-    FPDF = None
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+from utils.report_record import Report
+from utils.change_feed import ChangeFeed
+from utils.media_store import MediaStore
+from utils.profiler import Profiler
+from utils.metrics import Metrics
+from utils.codec import CodecError, available_compressions, available_formats
+from utils.storage import (STORE_LOCK, CorruptStoreError, fsync_paths, process_lock, read_json, write_json,
+                           write_store)
+from utils.backup import BackupManager
+from utils.archive import ReportArchive
+from utils.sqlite_store import SQLiteStore
+from utils.write_behind import WriteBehind
+from utils.report_file import LazyReports, ReportFile, StoredRecord
+from utils.user_reports import UserReports
+from utils.district_counts import DistrictCounts
+from utils.triage import TriageQueue
+from utils.assignment import AssignmentJobs, Assignments
+from utils.notifications import Notifier, senders_from_env
+from utils.auth_manager import AuthManager
+# pandas/numpy (via utils.report_columns) and fpdf are imported on first use,
+# so pages that never build a frame or a PDF don't pay for them at startup.
+
+@st.cache_resource
+def _shared_change_feed():
+    """One change feed per server process, shared by every session."""
+    return ChangeFeed()
+
+
+@st.cache_resource
+def _shared_media_store():
+    """One media store (and thumbnail worker pool) per server process."""
+    return MediaStore()
+
+
+@lru_cache(maxsize=None)
+def _division_slug(division):
+    """File-name-safe partition name for a division ("Cox's Bazar" -> "cox-s-bazar")."""
+    return re.sub(r"[^a-z0-9]+", "-", str(division or "other").lower()).strip("-") or "other"
+
+
+@st.cache_resource
+def _shared_sqlite_store(path):
+    """One connection and read cache per server process for the shared SQLite store."""
+    store = SQLiteStore(path)
+    if store.is_empty():
+        # First start in SQLite mode: import the JSON store
+        store.replace_all(DataManager._load_from_file(backend="json"))
+    return store
+
+
+@st.cache_resource
+def _shared_writer(db_file):
+    """The write-behind queue and writer thread for the JSON store at `db_file`."""
+    return WriteBehind(
+        load=lambda key: DataManager._load_partition(key)[0] or [],
+        save=DataManager._write_partitions,
+        key_of=DataManager.partition_key,
+        sync=lambda keys: fsync_paths([DataManager.partition_path(key) for key in keys]),
+        policy=DataManager.FSYNC_POLICY,
+        interval=DataManager.FSYNC_INTERVAL,
+        count=DataManager.FSYNC_COUNT,
+        max_pending=DataManager.WRITE_QUEUE_SIZE,
+    )
+
+
+@st.cache_resource(max_entries=256)
+def _shared_report_file(path, inode, mtime_ns, size):
+    """
+    One mapping per version of an indexed partition file, shared by every
+    session (a rewritten file has a new inode, so it is mapped again).
+    """
+    return ReportFile(path)
+
+
+@st.cache_resource
+def _shared_route_jobs():
+    """Route-planning jobs and their worker thread, one per server process."""
+    return AssignmentJobs()
+
+
+@st.cache_resource
+def _shared_notifier(path):
+    """The notification outbox and its worker threads, one per server process."""
+    return Notifier(path, contacts=AuthManager.get_contacts, senders=senders_from_env(),
+                    confirm=DataManager._confirm_notifications)
+
+
+@st.cache_resource
+def _shared_archive_clock():
+    """When this server process last looked for reports to archive."""
+    return {"last": 0.0, "lock": threading.Lock()}
+
 
 class DataManager:
+    # Legacy single-file store. Reports now live in one file per division
+    # partition under a directory of the same name (reports_db/dhaka.json);
+    # a DB_FILE found on load is split into partitions and moved aside.
     DB_FILE = "reports_db.json"
-    
+    # Also split each division by report month (reports_db/dhaka/2025-12.json)
+    PARTITION_BY_MONTH = os.environ.get("NN_PARTITION_BY_MONTH", "") == "1"
+    # Threads used to read partitions in parallel
+    LOAD_WORKERS = 8
+    # "json": partition files, one server process. "sqlite": one database
+    # file shared by several server processes (e.g. behind a load balancer).
+    BACKEND = os.environ.get("NN_STORE_BACKEND", "json")
+    SQLITE_PATH = os.environ.get("NN_SQLITE_PATH", "reports.sqlite3")
+    # Encoding of partition files (see utils/codec.py); existing files in
+    # another format are still read and are converted as they are rewritten.
+    # "indexed" partitions are mapped and decoded lazily (utils/report_file.py),
+    # so a session opens the store without reading it; they are not compressed.
+    STORE_FORMAT = os.environ.get("NN_STORE_FORMAT", "json")
+    STORE_COMPRESSION = os.environ.get("NN_STORE_COMPRESSION", "none")
+    # JSON backend only. "sync": a change is written before the rerun goes on.
+    # "behind": changes are queued and written in the background; see
+    # utils/write_behind.py for what each fsync policy can lose in a crash.
+    WRITE_MODE = os.environ.get("NN_WRITE_MODE", "sync")
+    FSYNC_POLICY = os.environ.get("NN_FSYNC", "always")  # always | interval | count
+    FSYNC_INTERVAL = float(os.environ.get("NN_FSYNC_INTERVAL", "1.0") or 1.0)
+    FSYNC_COUNT = int(os.environ.get("NN_FSYNC_COUNT", "100") or 100)
+    WRITE_QUEUE_SIZE = 10_000
+    # Ids reserved per counter write in write-behind mode
+    ID_BLOCK = 100
+    # (ids file, next id, end of the reserved block)
+    _id_block = None
+    # How often report pages poll the change feed for updates from other sessions
+    LIVE_REFRESH_SECONDS = 5
+    # How often maybe_archive() moves long-resolved reports to cold storage
+    ARCHIVE_CHECK_SECONDS = 3600
+    # Time a route-planning job spends improving routes (2-opt) before it settles
+    ROUTE_BUDGET_SECONDS = 5.0
+    # Outbox and inboxes of status-change notifications (utils/notifications.py)
+    NOTIFY_PATH = os.environ.get("NN_NOTIFY_PATH", "notifications.sqlite3")
+
     @staticmethod
-    def _load_from_file():
-        """Load reports from JSON file."""
+    def partition_dir():
+        return os.path.splitext(DataManager.DB_FILE)[0]
+
+    @staticmethod
+    def partition_key(report):
+        """Partition a report is routed to: its division, optionally with its month."""
+        slug = _division_slug(report.get('division'))
+        if DataManager.PARTITION_BY_MONTH:
+            date = str(report.get('date') or "")
+            return f"{slug}/{date[:7] if len(date) >= 7 else 'undated'}"
+        return slug
+
+    @staticmethod
+    def partition_path(key):
+        return os.path.join(DataManager.partition_dir(), f"{key}.json")
+
+    @staticmethod
+    def list_partitions(divisions=None):
+        """Partition keys on disk, optionally only those of the given divisions."""
+        root = DataManager.partition_dir()
+        keys = []
+        for dirpath, _, files in os.walk(root):
+            for name in files:
+                # Names starting with "_" are bookkeeping (the id allocator)
+                if name.endswith(".json") and not name.startswith("_"):
+                    keys.append(os.path.relpath(os.path.join(dirpath, name[:-5]), root).replace(os.sep, "/"))
+        if divisions is not None:
+            slugs = {_division_slug(d) for d in divisions}
+            keys = [k for k in keys if k.split("/")[0] in slugs]
+        return sorted(keys)
+
+    @staticmethod
+    def _load_partition(key):
+        """
+        Read one partition, restoring it from backup if it is corrupt.
+
+        Returns:
+            tuple: (reports: list | None, message: str | None)
+        """
+        path = DataManager.partition_path(key)
+        try:
+            return read_json(path, []), None
+        except CorruptStoreError:
+            return BackupManager.recover(f"reports/{key}", path)
+
+    @staticmethod
+    def _sqlite():
+        return _shared_sqlite_store(DataManager.SQLITE_PATH)
+
+    @staticmethod
+    @Profiler.timed("DataManager._load_from_file")
+    def _load_from_file(divisions=None, backend=None):
+        """Load the reports of every partition (or only `divisions`'), reading partitions in parallel."""
+        if (backend or DataManager.BACKEND) == "sqlite":
+            # Served from this process's read cache, refreshed from the change log
+            return DataManager._sqlite().load(divisions)
+        if DataManager._write_behind():
+            # Changes published before the load must be in the files it reads
+            DataManager._writer().flush()
         if os.path.exists(DataManager.DB_FILE):
-            try:
-                with open(DataManager.DB_FILE, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, IOError):
-                # If file is corrupted, return default data
-                return DataManager._get_default_data()
-        else:
-            return DataManager._get_default_data()
-    
+            DataManager._migrate_single_file()
+        keys = DataManager.list_partitions(divisions)
+        if not keys and not DataManager.list_partitions():
+            # Fresh install: seed the sample reports
+            DataManager._write_all(DataManager._get_default_data())
+            keys = DataManager.list_partitions(divisions)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(DataManager.LOAD_WORKERS, len(keys)))) as pool:
+            results = list(pool.map(DataManager._load_partition, keys))
+        reports = []
+        for data, message in results:
+            # Streamlit calls only render from the script thread
+            if message:
+                (st.warning if data is not None else st.error)(message)
+            reports.extend(data or [])
+        # Ids are allocated globally in submission order, so merge back by id
+        reports.sort(key=lambda r: r['id'])
+        return reports
+
+    @staticmethod
+    def _migrate_single_file():
+        """Split the legacy DB_FILE into partitions (replacing them) and move it aside."""
+        try:
+            reports = read_json(DataManager.DB_FILE, [])
+        except CorruptStoreError:
+            reports, message = BackupManager.recover("reports", DataManager.DB_FILE)
+            (st.warning if reports is not None else st.error)(message)
+            if reports is None:
+                return
+        DataManager._write_all(reports)
+        os.replace(DataManager.DB_FILE, f"{DataManager.DB_FILE}.migrated")
+
+    @staticmethod
+    def _write_all(reports):
+        """Replace the whole partitioned store with `reports`."""
+        with STORE_LOCK:
+            stale = set(DataManager.list_partitions())
+            keys = {DataManager.partition_key(r) for r in reports}
+            DataManager._save_to_file(reports, keys)
+            for key in stale - keys:
+                os.remove(DataManager.partition_path(key))
+            next_id = max((r['id'] for r in reports), default=0) + 1
+            DataManager._write_next_id(max(next_id, DataManager._read_next_id() or 0))
+
     @staticmethod
-    def _save_to_file(reports):
-        """Save reports to JSON file."""
+    def _group(reports, keys=None):
+        """Reports of the given partition keys (all if None), {key: [reports]}."""
+        wanted = None if keys is None else set(keys)
+        groups = {}
+        for r in reports:
+            key = DataManager.partition_key(r)
+            if wanted is None or key in wanted:
+                groups.setdefault(key, []).append(r)
+        return groups
+
+    @staticmethod
+    @Profiler.timed("DataManager._save_to_file")
+    def _save_to_file(reports, partitions=None):
+        """
+        Write partitions from `reports`: the given partition keys (a key with
+        no reports is written empty), or every partition `reports` touches.
+        """
+        if isinstance(reports, LazyReports):
+            # Only the partitions being written are gathered, mostly undecoded
+            groups = reports.group(DataManager.partition_key, partitions)
+        else:
+            groups = DataManager._group(reports, partitions)
         try:
-            with open(DataManager.DB_FILE, 'w', encoding='utf-8') as f:
-                json.dump(reports, f, indent=2, ensure_ascii=False)
+            with Metrics.write_latency.time(store="reports"):
+                for key in (groups if partitions is None else partitions):
+                    path = DataManager.partition_path(key)
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    DataManager._write_partition_file(path, [r.to_dict() if isinstance(r, Report) else r
+                                                             for r in groups.get(key, ())])
         except IOError as e:
             st.error(f"Failed to save data: {e}")
+
+    @staticmethod
+    def _write_partitions(partitions, fsync=True):
+        """Replace whole partitions, {key: [report dicts]} (a write-behind group commit)."""
+        with STORE_LOCK, Metrics.write_latency.time(store="reports"):
+            for key, reports in partitions.items():
+                path = DataManager.partition_path(key)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                DataManager._write_partition_file(path, reports, fsync)
+
+    @staticmethod
+    def _write_partition_file(path, reports, fsync=True):
+        # Like backups, fall back to what is installed rather than failing every write
+        fmt = DataManager.STORE_FORMAT if DataManager.STORE_FORMAT in available_formats() else "json"
+        compression = DataManager.STORE_COMPRESSION
+        if compression not in available_compressions():
+            compression = "gzip"
+        if fmt == "indexed":
+            # A compressed file can't be mapped
+            compression = "none"
+        else:
+            reports = [r.to_dict() if isinstance(r, StoredRecord) else r for r in reports]
+        write_store(path, reports, fmt, compression, fsync)
+
+    @staticmethod
+    def _write_behind():
+        return DataManager.BACKEND == "json" and DataManager.WRITE_MODE == "behind"
+
+    @staticmethod
+    def _writer():
+        return _shared_writer(os.path.abspath(DataManager.DB_FILE))
+
+    @staticmethod
+    def _ids_path():
+        return os.path.join(DataManager.partition_dir(), "_ids.json")
+
+    @staticmethod
+    def _read_next_id():
+        try:
+            return read_json(DataManager._ids_path(), {}).get("next_id")
+        except CorruptStoreError:
+            return None
+
+    @staticmethod
+    def _write_next_id(next_id):
+        os.makedirs(DataManager.partition_dir(), exist_ok=True)
+        write_json(DataManager._ids_path(), {"next_id": next_id})
+
+    @staticmethod
+    def _allocate_id():
+        """Take the next report id from the store-wide counter shared by all partitions."""
+        if DataManager.BACKEND == "sqlite":
+            return DataManager._sqlite().allocate_id(floor=ReportArchive.max_id)
+        write_behind = DataManager._write_behind()
+        with STORE_LOCK:
+            path, next_id, end = DataManager._id_block or (None, 0, 0)
+            if write_behind and path == DataManager._ids_path() and next_id < end:
+                DataManager._id_block = (path, next_id + 1, end)
+                return next_id
+            next_id = DataManager._read_next_id()
+            if next_id is None:
+                # Counter lost: start above every id on disk, archived ones included,
+                # and above the ids handed out to changes still queued
+                on_disk = [r['id'] for key in DataManager.list_partitions()
+                           for r in (DataManager._load_partition(key)[0] or ())]
+                next_id = max(on_disk + [ReportArchive.max_id(), end - 1]) + 1
+            if write_behind:
+                # Reserve a block on disk first, so a crash can't hand out these ids twice
+                DataManager._write_next_id(next_id + DataManager.ID_BLOCK)
+                DataManager._id_block = (DataManager._ids_path(), next_id + 1, next_id + DataManager.ID_BLOCK)
+            else:
+                DataManager._write_next_id(next_id + 1)
+            return next_id
     
     @staticmethod
     def _get_default_data():
@@ -69,63 +388,601 @@ class DataManager:
     def init_db():
         """Initialize the 'database' in session state if not exists."""
         if 'reports' not in st.session_state:
-            # Load from file or use defaults
-            st.session_state.reports = DataManager._load_from_file()
+            DataManager._reload()
+
+    @staticmethod
+    def _reload():
+        """(Re)load this session's reports from file and rebuild derived state."""
+        # Read the feed position first: anything published while the file is
+        # being read is replayed by the next sync() and applied idempotently.
+        st.session_state.feed_seq = DataManager.get_change_feed().latest
+        scope = st.session_state.get('division_scope')
+        mapped = DataManager._open_mapped([scope] if scope else None)
+        if mapped is not None:
+            st.session_state.reports = mapped
+            st.session_state.report_rows = mapped.rows()
+        else:
+            st.session_state.reports = [Report.from_dict(r) for r in
+                                        DataManager._load_from_file([scope] if scope else None)]
+            # Report id -> index in the list
+            st.session_state.report_rows = {r['id']: i for i, r in enumerate(st.session_state.reports)}
+        # Columnar copy, built by the first get_report_columns() call
+        st.session_state.report_columns = None
+        # Bumped on every change to the session's reports; per-user views are tagged with it
+        st.session_state.report_version = st.session_state.get('report_version', 0) + 1
+        st.session_state.user_views = {}
+        # Open issues per district, built by the first get_district_counts() call
+        st.session_state.district_counts = None
+        # Dispatch priority of open reports, built by the first get_triage_queue() call
+        st.session_state.triage = None
+        Metrics.report_store_size.set(len(st.session_state.reports))
+
+    @staticmethod
+    def _changed(report, added=False, old_status=None):
+        """
+        Bump the store version after `report` was added or changed status
+        (from `old_status`), bringing per-user views, district counts and the
+        triage queue up to it.
+        """
+        for derived in (st.session_state.district_counts, st.session_state.triage):
+            if derived is None:
+                continue
+            if added:
+                derived.add(report)
+            else:
+                derived.set_status(report, old_status)
+        st.session_state.report_version += 1
+        for view in st.session_state.user_views.values():
+            if report.get('submitted_by') == view.username:
+                if added:
+                    view.add(report)
+                else:
+                    view.update(report)
+            view.version = st.session_state.report_version
+
+    @staticmethod
+    @Profiler.timed("DataManager._open_mapped")
+    def _open_mapped(divisions=None):
+        """
+        Open the partitions of an "indexed" store without decoding them,
+        converting partitions still in another format first.
+
+        Returns:
+            LazyReports | None: None when the store can't be mapped (another
+                format or backend, a legacy single file, a fresh install or
+                an unrecoverable partition); the caller then loads it whole.
+        """
+        if DataManager.BACKEND != "json" or DataManager.STORE_FORMAT != "indexed":
+            return None
+        if DataManager._write_behind():
+            # Changes published before the load must be in the files it maps
+            DataManager._writer().flush()
+        if os.path.exists(DataManager.DB_FILE):
+            return None
+        files = {}
+        for key in DataManager.list_partitions(divisions):
+            path = DataManager.partition_path(key)
+            try:
+                files[key] = DataManager._map_partition(path)
+            except CodecError:
+                # Written in another format (or corrupt): convert it once
+                with STORE_LOCK:
+                    reports, message = DataManager._load_partition(key)
+                    if message:
+                        (st.warning if reports is not None else st.error)(message)
+                    if reports is None:
+                        return None
+                    DataManager._write_partition_file(path, reports)
+                files[key] = DataManager._map_partition(path)
+        return LazyReports(files) if files else None
+
+    @staticmethod
+    def _map_partition(path):
+        stat = os.stat(path)
+        return _shared_report_file(path, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    @staticmethod
+    def get_division_scope():
+        """Division this session is limited to, or None for all divisions."""
+        return st.session_state.get('division_scope')
+
+    @staticmethod
+    def set_division_scope(division):
+        """Limit this session to one division's partition (None loads every partition)."""
+        if division != st.session_state.get('division_scope'):
+            st.session_state.division_scope = division
+            DataManager._reload()
+
+    @staticmethod
+    def _in_scope(division):
+        scope = st.session_state.get('division_scope')
+        return scope is None or _division_slug(scope) == _division_slug(division)
+
+    @staticmethod
+    def get_change_feed():
+        if DataManager.BACKEND == "sqlite":
+            # The database's change log also carries other processes' changes
+            return DataManager._sqlite()
+        return _shared_change_feed()
+
+    @staticmethod
+    @contextmanager
+    def _write_lock():
+        """
+        Hold around reading the working set for a write and committing it.
+        A synchronous JSON write rewrites whole partitions from this session's
+        list, so the list is synced first and no other session writes until
+        the change is published; otherwise reports another session added
+        since this one last synced would be dropped from disk.
+        """
+        if DataManager.BACKEND == "sqlite" or DataManager._write_behind():
+            # Both apply the changes themselves instead of rewriting partitions
+            # (and the writer thread needs STORE_LOCK to drain)
+            yield
+            return
+        with STORE_LOCK:
+            DataManager.sync()
+            yield
+
+    @staticmethod
+    def _commit(changes, reports, partitions):
+        """
+        Persist changes and announce them to other sessions.
+
+        Args:
+            changes: (kind, data) change-feed events describing the writes.
+            reports, partitions: what the JSON backend rewrites; the SQLite
+                backend applies `changes` to the database instead.
+        """
+        if DataManager.BACKEND == "sqlite":
+            # One transaction updates the reports and the change log
+            DataManager._sqlite().publish_many(changes)
+            return
+        if DataManager._write_behind():
+            # The writer thread rebuilds the partitions from the changes themselves
+            DataManager._writer().submit(changes, partitions)
+        else:
+            DataManager._save_to_file(reports, partitions)
+        feed = DataManager.get_change_feed()
+        for kind, data in changes:
+            feed.publish(kind, data)
+
+    @staticmethod
+    def get_media_store():
+        return _shared_media_store()
+
+    @staticmethod
+    def save_photo(data):
+        """
+        Store an uploaded photo.
+
+        Returns:
+            tuple: (ref: str | None, message: str)
+        """
+        try:
+            return DataManager.get_media_store().save(data)
+        except IOError as e:
+            return None, f"Failed to save photo: {e}"
+
+    @staticmethod
+    def sync():
+        """
+        Apply changes published by other sessions since this one last synced.
+
+        Returns:
+            int: Number of reports that changed in this session.
+        """
+        events, latest = DataManager.get_change_feed().since(st.session_state.feed_seq)
+        if events is None:
+            # Fell out of the feed's retained window
+            Metrics.cache_requests.inc(cache="change_feed", result="miss")
+            DataManager._reload()
+            return len(st.session_state.reports)
+
+        if any(event['kind'] in ('archive', 'reload') for event in events):
+            # Reports left the working set; list indexes shift, so start over
+            DataManager._reload()
+            return len(events)
+
+        Metrics.cache_requests.inc(cache="change_feed", result="hit")
+        reports = st.session_state.reports
+        rows = st.session_state.report_rows
+        columns = st.session_state.report_columns
+        changed = 0
+        for event in events:
+            row = rows.get(event['id'])
+            if event['kind'] == 'add' and row is None:
+                if not DataManager._in_scope(event['report'].get('division')):
+                    continue
+                report = Report.from_dict(event['report'])
+                rows[report['id']] = len(reports)
+                reports.append(report)
+                if columns is not None:
+                    columns.append(report)
+                DataManager._changed(report, added=True)
+                changed += 1
+            elif event['kind'] == 'status' and row is not None and reports[row]['status'] != event['status']:
+                old_status = reports[row]['status']
+                reports[row]['status'] = event['status']
+                reports[row]['resolved_at'] = event.get('resolved_at')
+                if columns is not None:
+                    columns.set_value(event['id'], 'status', event['status'])
+                DataManager._changed(reports[row], old_status=old_status)
+                changed += 1
+        st.session_state.feed_seq = latest
+        return changed
 
     @staticmethod
     def get_all_reports():
         return st.session_state.reports
 
     @staticmethod
-    def add_report(title, category, subcategory, desc, division, district, lat, lon, username=None):
-        # Generate new ID based on max existing ID
-        existing_ids = [r['id'] for r in st.session_state.reports] if st.session_state.reports else [0]
-        new_id = max(existing_ids) + 1
-        
-        new_report = {
-            "id": new_id,
-            "title": title,
-            "category": category,
-            "subcategory": subcategory,
-            "status": "Pending",
-            "division": division,
-            "district": district,
-            "lat": lat,
-            "lon": lon,
-            "date": datetime.now().strftime("%Y-%m-%d"),
-            "description": desc,
-            "submitted_by": username  # Track who submitted the report
-        }
-        st.session_state.reports.append(new_report)
+    def get_reports_page(page, size):
+        """Get one page of reports, newest first (only those are decoded from a mapped store)."""
+        reports = st.session_state.reports
+        end = len(reports) - page * size
+        return [reports[i] for i in range(end - 1, max(end - size, 0) - 1, -1)]
+
+    @staticmethod
+    def get_report_row(report_id):
+        """Position of a report in get_all_reports(), or None if it is not in this session's working set."""
+        return st.session_state.report_rows.get(report_id)
+
+    @staticmethod
+    def get_report_ids():
+        reports = st.session_state.reports
+        if isinstance(reports, LazyReports):
+            return reports.ids()
+        return [r['id'] for r in reports]
+
+    @staticmethod
+    def get_report_columns():
+        """Get the columnar snapshot kept in sync with the report list."""
+        if st.session_state.report_columns is None:
+            from utils.report_columns import ReportColumns
+            reports = st.session_state.reports
+            if isinstance(reports, LazyReports):
+                st.session_state.report_columns = ReportColumns.from_index(reports)
+            else:
+                st.session_state.report_columns = ReportColumns.from_reports(reports)
+        return st.session_state.report_columns
+
+    @staticmethod
+    @Profiler.timed("DataManager.get_district_counts")
+    def get_district_counts():
+        """
+        Get open issues per district and category (see utils/district_counts.py),
+        counted in bulk from the columnar snapshot on first use and then kept
+        current by add_report, update_status and sync().
+        """
+        if st.session_state.district_counts is None:
+            st.session_state.district_counts = DistrictCounts.from_columns(DataManager.get_report_columns())
+        return st.session_state.district_counts
+
+    @staticmethod
+    @Profiler.timed("DataManager.get_triage_queue")
+    def get_triage_queue():
+        """
+        Get the dispatch priority of open reports (see utils/triage.py),
+        scored in bulk from the columnar snapshot on first use and then kept
+        current by add_report, update_status and sync().
+        """
+        if st.session_state.triage is None:
+            st.session_state.triage = TriageQueue.from_columns(DataManager.get_report_columns())
+        return st.session_state.triage
+
+    @staticmethod
+    def get_next_to_dispatch(count):
+        """
+        Get the `count` pending reports to dispatch first.
+
+        Returns:
+            list: (report, breakdown) pairs, highest priority first, where
+            breakdown is TriageQueue.explain() of the report.
+        """
+        queue = DataManager.get_triage_queue()
+        reports, rows = st.session_state.reports, st.session_state.report_rows
+        today = datetime.now().date()
+        picked = [reports[rows[report_id]] for report_id, _ in queue.next(count, today)]
+        return [(report, queue.explain(report, today)) for report in picked]
+
+    @staticmethod
+    def get_reports_frame(names=None):
+        """Get a DataFrame view of all reports (or their `names` columns) backed by the columnar snapshot."""
+        return DataManager.get_report_columns().frame(names)
+
+    @staticmethod
+    def add_report(title, category, subcategory, desc, division, district, lat, lon, username=None, photos=None):
+        new_id = DataManager._allocate_id()
         
-        # Save to file immediately
-        DataManager._save_to_file(st.session_state.reports)
+        new_report = Report(
+            id=new_id,
+            title=title,
+            category=category,
+            subcategory=subcategory,
+            status="Pending",
+            division=division,
+            district=district,
+            lat=lat,
+            lon=lon,
+            date=datetime.now().strftime("%Y-%m-%d"),
+            description=desc,
+            submitted_by=username,  # Track who submitted the report
+            photos=photos
+        )
+        key = DataManager.partition_key(new_report)
+        if DataManager._in_scope(division):
+            with DataManager._write_lock():
+                st.session_state.report_rows[new_id] = len(st.session_state.reports)
+                st.session_state.reports.append(new_report)
+                if st.session_state.report_columns is not None:
+                    st.session_state.report_columns.append(new_report)
+                DataManager._changed(new_report, added=True)
+                Metrics.report_store_size.set(len(st.session_state.reports))
+
+                # Save immediately (only the report's partition)
+                DataManager._commit([('add', {'id': new_id, 'report': new_report.to_dict()})],
+                                    st.session_state.reports, [key])
+        elif DataManager.BACKEND == "sqlite" or DataManager._write_behind():
+            # Neither needs the rest of the partition
+            DataManager._commit([('add', {'id': new_id, 'report': new_report.to_dict()})], [new_report], [key])
+        else:
+            # This session hasn't loaded that partition, so append on disk
+            with STORE_LOCK:
+                partition = DataManager._load_partition(key)[0] or []
+                DataManager._commit([('add', {'id': new_id, 'report': new_report.to_dict()})],
+                                    partition + [new_report], [key])
         return new_id
 
     @staticmethod
     def update_status(report_id, new_status):
-        for r in st.session_state.reports:
-            if r['id'] == report_id:
-                r['status'] = new_status
-                # Save to file immediately
-                DataManager._save_to_file(st.session_state.reports)
-                return True
-        return False
+        return DataManager.update_statuses([report_id], new_status) == 1
+
+    @staticmethod
+    def update_statuses(report_ids, new_status):
+        """
+        Set the status of several reports with a single write.
+
+        Returns:
+            int: Number of reports updated (ids not in the working set are skipped).
+        """
+        with DataManager._write_lock():
+            return DataManager._update_statuses(report_ids, new_status)
+
+    @staticmethod
+    def _update_statuses(report_ids, new_status):
+        reports, rows = st.session_state.reports, st.session_state.report_rows
+        columns = st.session_state.report_columns
+        # Archiving counts from when a report was resolved
+        resolved_at = datetime.now().strftime("%Y-%m-%d") if new_status == "Resolved" else None
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        changes, touched, events = [], set(), []
+        for report_id in report_ids:
+            row = rows.get(report_id)
+            if row is None:
+                continue
+            r = reports[row]
+            old_status = r['status']
+            r['status'] = new_status
+            r['resolved_at'] = resolved_at
+            if columns is not None:
+                columns.set_value(report_id, 'status', new_status)
+            DataManager._changed(r, old_status=old_status)
+            changes.append(('status', {'id': report_id, 'status': new_status, 'resolved_at': resolved_at}))
+            touched.add(DataManager.partition_key(r))
+            if r.get('submitted_by') and old_status != new_status:
+                events.append({'report_id': report_id, 'title': r['title'], 'username': r['submitted_by'],
+                               'old_status': old_status, 'status': new_status, 'at': now})
+        if changes:
+            # The outbox is a separate database: stage the notifications
+            # before the save and release them once it succeeded, so a
+            # crash in between can't lose one (see utils/notifications.py).
+            # Delivery happens on the notifier's threads.
+            notifier = DataManager._notifier()
+            staged = notifier.stage(events)
+            try:
+                # Save immediately (only the touched partitions)
+                DataManager._commit(changes, reports, touched)
+            except BaseException:
+                notifier.discard(staged)
+                raise
+            notifier.release(staged)
+        return len(changes)
+
+    @staticmethod
+    def _notifier():
+        return _shared_notifier(os.path.abspath(DataManager.NOTIFY_PATH))
+
+    @staticmethod
+    def _confirm_notifications(events):
+        """Whether the store holds each event's status change (for notifications a crash left staged)."""
+        stored = {r['id']: r['status'] for r in DataManager._load_from_file()}
+        return [stored.get(e['report_id']) == e['status'] for e in events]
+
+    @staticmethod
+    def get_notifications(username, limit=50):
+        """Get a user's newest in-app notifications (see Notifier.inbox)."""
+        return DataManager._notifier().inbox(username, limit)
+
+    @staticmethod
+    def count_unread_notifications(username):
+        return DataManager._notifier().unread(username)
+
+    @staticmethod
+    def mark_notifications_read(username):
+        """Mark all of a user's notifications read; returns how many were unread."""
+        return DataManager._notifier().mark_read(username)
+
+    @staticmethod
+    def start_route_planning(division, volunteers):
+        """
+        Plan routes for `volunteers` ((name, capacity) pairs) through the
+        pending reports of `division` in a background job (see
+        utils/routing.py). Reports go in triage order, so when there are
+        more than the crew can visit the most urgent are planned.
+
+        Returns:
+            int: Job id for get_route_job().
+        """
+        queue = DataManager.get_triage_queue()
+        reports, rows = st.session_state.reports, st.session_state.report_rows
+        stops = []
+        for report_id, _ in queue.next(len(queue), division=division):
+            r = reports[rows[report_id]]
+            # Reports without coordinates can't be routed
+            if r.get('lat') or r.get('lon'):
+                stops.append((report_id, r['lat'], r['lon']))
+        # Deferred: numpy is only needed once routes are planned
+        from utils.routing import plan_routes
+        return _shared_route_jobs().submit(plan_routes, stops, volunteers, DataManager.ROUTE_BUDGET_SECONDS)
+
+    @staticmethod
+    def get_route_job(job_id):
+        """State of a route-planning job: "queued", "running", "done" (with a result) or "failed"; None if expired."""
+        return _shared_route_jobs().get(job_id)
+
+    @staticmethod
+    def assign_routes(division, routes):
+        """
+        Hand planned routes to their volunteers: their stops that are still
+        pending go In Progress in one write, and the routes are saved.
+
+        Returns:
+            int: Number of reports dispatched.
+        """
+        reports, rows = st.session_state.reports, st.session_state.report_rows
+        pending = [report_id for route in routes for report_id in route["stops"]
+                   if report_id in rows and reports[rows[report_id]]['status'] == "Pending"]
+        dispatched = DataManager.update_statuses(pending, "In Progress")
+        Assignments.save_routes(division, routes)
+        return dispatched
+
+    @staticmethod
+    def count_reports(name=None, value=None):
+        """
+        Count reports across the working set and the archive, in total or
+        those whose `name` column (status, category, division, district) equals `value`.
+        """
+        columns = DataManager.get_report_columns()
+        hot = columns.size if name is None else columns.count(name, value)
+        scope = DataManager.get_division_scope()
+        return hot + ReportArchive.count(name, value, [scope] if scope else None)
+
+    @staticmethod
+    def archive_resolved(today=None):
+        """
+        Move reports resolved for ReportArchive.ARCHIVE_AFTER_DAYS or longer
+        to cold storage.
+
+        Returns:
+            int: Number of reports archived.
+        """
+        with DataManager._write_lock():
+            return DataManager._archive_resolved(today or datetime.now().date())
+
+    @staticmethod
+    def _archive_resolved(today):
+        reports = st.session_state.reports
+        lazy = isinstance(reports, LazyReports)
+        if lazy:
+            # Decode only the reports the index says may be due
+            candidates = reports.where('status', "Resolved",
+                                       resolved_by=today - timedelta(days=ReportArchive.ARCHIVE_AFTER_DAYS))
+        else:
+            candidates = reports
+        stamped = []
+        for r in candidates:
+            # Resolved before resolution dates were recorded: start the clock now
+            if r['status'] == "Resolved" and not r.get('resolved_at'):
+                r['resolved_at'] = today.strftime("%Y-%m-%d")
+                stamped.append(r)
+        changes = [('status', {'id': r['id'], 'status': r['status'], 'resolved_at': r['resolved_at']})
+                   for r in stamped]
+        touched = {DataManager.partition_key(r) for r in stamped}
+        due = [r for r in candidates if ReportArchive.is_due(r, today)]
+        if not due:
+            if changes:
+                DataManager._commit(changes, reports, touched)
+            return 0
+
+        # Archive first: a crash before the save below leaves duplicates, which
+        # the archive dedupes on the next run, rather than lost reports.
+        ReportArchive.archive([r.to_dict() for r in due])
+        archived = {r['id'] for r in due}
+        touched |= {DataManager.partition_key(r) for r in due}
+        changes.append(('archive', {'ids': sorted(archived)}))
+        if lazy:
+            remaining = [r for group in reports.group(DataManager.partition_key, touched).values()
+                         for r in group if r['id'] not in archived]
+        else:
+            remaining = [r for r in reports if r['id'] not in archived]
+        DataManager._commit(changes, remaining, touched)
+        DataManager._reload()
+        return len(archived)
+
+    @staticmethod
+    def maybe_archive():
+        """
+        Run archive_resolved() at most once per ARCHIVE_CHECK_SECONDS in this
+        process, and skip it while another server process is archiving.
+        """
+        clock = _shared_archive_clock()
+        if time.time() - clock["last"] < DataManager.ARCHIVE_CHECK_SECONDS:
+            return 0
+        if not clock["lock"].acquire(blocking=False):
+            return 0
+        try:
+            clock["last"] = time.time()
+            with process_lock(ReportArchive.lock_path("pass"), blocking=False) as elected:
+                return DataManager.archive_resolved() if elected else 0
+        finally:
+            clock["lock"].release()
+
+    @staticmethod
+    def search_archive(text="", date_from=None, date_to=None, limit=500, **filters):
+        """Search archived reports (see ReportArchive.search)."""
+        return ReportArchive.search(text, date_from, date_to, limit, **filters)
 
     @staticmethod
     def get_reports_by_user(username):
         """Get all reports submitted by a specific user."""
         if not username:
             return []
-        return [r for r in st.session_state.reports if r.get('submitted_by') == username]
+        reports = st.session_state.reports
+        if isinstance(reports, LazyReports):
+            return reports.where('submitted_by', username)
+        return [r for r in reports if r.get('submitted_by') == username]
 
     @staticmethod
+    def get_user_reports(username):
+        """
+        Get the My Submissions view of `username` (see utils/user_reports.py).
+
+        Views are cached in the session by user and store version: add_report,
+        update_status and sync() keep cached views current, and a view left
+        behind by any other change is rebuilt from get_reports_by_user().
+        """
+        views = st.session_state.user_views
+        view = views.get(username)
+        if view is not None and view.version == st.session_state.report_version:
+            Metrics.cache_requests.inc(cache="user_reports", result="hit")
+            return view
+        Metrics.cache_requests.inc(cache="user_reports", result="miss")
+        view = views[username] = UserReports(username, DataManager.get_reports_by_user(username),
+                                             st.session_state.report_version)
+        return view
+
+    @staticmethod
+    @Profiler.timed("DataManager.generate_reports_pdf")
     def generate_reports_pdf(reports):
         """Generates a professional PDF document of reports."""
-        if not FPDF:
+        try:
+            from fpdf import FPDF
+        except ImportError:
             st.error("PDF generation library (fpdf2) is not installed.")
             return None
         
+        Metrics.pdf_jobs.inc()
         try:
             pdf = FPDF()
             pdf.add_page()
@@ -180,3 +1037,5 @@ class DataManager:
         except Exception as e:
             st.error(f"Failed to generate PDF: {e}")
             return None
+        finally:
+            Metrics.pdf_jobs.dec()
@@ -0,0 +1,114 @@
+"""
+District heatmap counts for NagarNirman
+Open (not yet resolved) issues per district and category, keyed to the
+district centroids in divisionsData.json. Built in one vectorised pass over
+the columnar snapshot and then kept current by DataManager as reports are
+added or change status, so a heatmap layer costs the same to serve however
+many reports there are.
+"""
+
+from utils.location_data import CATEGORY_OPTIONS, DIVISIONS_DATA
+
+
+class DistrictCounts:
+    """Open-issue counts per (district, category) for one session's reports."""
+
+    def __init__(self):
+        # One row per district centroid; reports whose district isn't in
+        # divisionsData.json are counted in `unplaced`
+        self.districts = [(div["division"], d["name"], d["latitude"], d["longitude"])
+                          for div in DIVISIONS_DATA for d in div["districts"]]
+        self._district_index = {(division, name): i for i, (division, name, _, _) in enumerate(self.districts)}
+        # A district name alone, for reports filed under another division
+        self._name_index = {}
+        for i, (_, name, _, _) in enumerate(self.districts):
+            self._name_index.setdefault(name, i)
+        self.categories = list(CATEGORY_OPTIONS)
+        self._category_index = {c: i for i, c in enumerate(self.categories)}
+        self.counts = [[0] * len(self.categories) for _ in self.districts]
+        self.unplaced = 0
+        # Bumped on every change; layers are cached against it
+        self.version = 0
+        self._layers = {}
+
+    @classmethod
+    def from_columns(cls, columns):
+        """Count the open reports of a ReportColumns snapshot in bulk."""
+        import numpy as np
+        counts = cls()
+        n = columns.size
+        resolved = columns.categories["status"].codes.get("Resolved", -2)
+        open_rows = columns.codes["status"][:n] != resolved
+        # (division code, district code) -> district row; a missing value is
+        # coded -1, which wraps around to the trailing None label
+        division_labels = columns.categories["division"].labels + [None]
+        district_labels = columns.categories["district"].labels + [None]
+        width = len(district_labels)
+        district_of = np.array([counts._district(division, district)
+                                for division in division_labels for district in district_labels], dtype=np.int32)
+        division_codes = columns.codes["division"][:n][open_rows].astype(np.int64) % len(division_labels)
+        district_codes = columns.codes["district"][:n][open_rows].astype(np.int64) % width
+        districts = district_of[division_codes * width + district_codes]
+        categories = np.array([counts._category(label) for label in columns.categories["category"].labels] + [-1],
+                              dtype=np.int32)[columns.codes["category"][:n][open_rows]]
+        placed = (districts >= 0) & (categories >= 0)
+        counts.unplaced = int(np.count_nonzero(~placed))
+        matrix = np.zeros((len(counts.districts), len(counts.categories)), dtype=np.int64)
+        np.add.at(matrix, (districts[placed], categories[placed]), 1)
+        counts.counts = matrix.tolist()
+        return counts
+
+    def _district(self, division, district):
+        i = self._district_index.get((division, district))
+        return self._name_index.get(district, -1) if i is None else i
+
+    def _category(self, category):
+        if category is None:
+            return -1
+        i = self._category_index.get(category)
+        if i is None:
+            # Not in categoryOptions.json (e.g. a legacy 'type')
+            i = self._category_index[category] = len(self.categories)
+            self.categories.append(category)
+            for row in self.counts:
+                row.append(0)
+        return i
+
+    def _bump(self, report, delta):
+        district = self._district(report.get('division'), report.get('district'))
+        category = self._category(report.get('category'))
+        if district < 0 or category < 0:
+            self.unplaced += delta
+        else:
+            self.counts[district][category] += delta
+        self.version += 1
+
+    def add(self, report):
+        if report['status'] != "Resolved":
+            self._bump(report, 1)
+
+    def set_status(self, report, old_status):
+        """Account for a report whose status changed from `old_status` to report['status']."""
+        was_open, is_open = old_status != "Resolved", report['status'] != "Resolved"
+        if was_open != is_open:
+            self._bump(report, 1 if is_open else -1)
+
+    def by_category(self):
+        """Open issues per category, across every district."""
+        return {c: sum(row[i] for row in self.counts) for i, c in enumerate(self.categories)}
+
+    def layer(self, category=None):
+        """
+        Open issues per district centroid, for one category or all of them:
+        a list of {division, district, lat, lon, open} rows, cached until the
+        counts change.
+        """
+        cached = self._layers.get(category)
+        if cached is not None and cached[0] == self.version:
+            return cached[1]
+        i = self._category_index.get(category)
+        rows = [{"division": division, "district": name, "lat": lat, "lon": lon,
+                 "open": sum(row) if category is None else (row[i] if i is not None else 0)}
+                for (division, name, lat, lon), row in zip(self.districts, self.counts)]
+        self._layers[category] = (self.version, rows)
+        return rows
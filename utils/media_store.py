@@ -0,0 +1,123 @@
+"""
+Photo storage for NagarNirman
+Stores report photos on disk under their SHA-256 digest, so identical
+uploads are kept once, and builds size-bounded thumbnails in a background
+worker pool. Files live under Streamlit's static folder and are referenced
+by URL instead of being inlined into the page as base64.
+"""
+
+import hashlib
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from utils.metrics import Metrics
+
+
+def _pillow():
+    """Import Pillow on first use; None if it is not installed."""
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    return Image
+
+
+class MediaStore:
+    ROOT = os.path.join("static", "media")
+    # URL prefix Streamlit uses for files in ./static (server.enableStaticServing)
+    URL_PREFIX = "app/static/media"
+    MAX_UPLOAD_BYTES = 5 * 1024 * 1024
+    # Longest edge, in pixels, of each thumbnail variant
+    THUMB_SIZES = {"card": 320, "detail": 960}
+    FORMATS = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp", "GIF": "gif"}
+
+    def __init__(self, root=ROOT, workers=2):
+        self.root = root
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbnails")
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def _original_path(self, digest, ext):
+        # Two-character fan-out keeps directories small
+        return os.path.join(self.root, "originals", digest[:2], f"{digest}.{ext}")
+
+    def _thumb_path(self, digest, variant):
+        return os.path.join(self.root, "thumbs", digest[:2], f"{digest}_{variant}.jpg")
+
+    def save(self, data):
+        """
+        Store an uploaded image and queue its thumbnails.
+
+        Returns:
+            tuple: (ref: str | None, message: str). ref is "<sha256>.<ext>";
+            uploading the same bytes twice returns the same ref.
+        """
+        Image = _pillow()
+        if Image is None:
+            return None, "Image library (Pillow) is not installed."
+        if len(data) > MediaStore.MAX_UPLOAD_BYTES:
+            return None, f"Image exceeds {MediaStore.MAX_UPLOAD_BYTES // (1024 * 1024)} MB."
+        try:
+            with Image.open(io.BytesIO(data)) as img:
+                ext = MediaStore.FORMATS.get(img.format)
+                img.verify()
+        except Exception:
+            return None, "File is not a valid image."
+        if ext is None:
+            return None, "Unsupported image format."
+
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._original_path(digest, ext)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        self._schedule_thumbnails(digest, path)
+        return f"{digest}.{ext}", "Image saved."
+
+    def _schedule_thumbnails(self, digest, path):
+        """Queue thumbnail generation unless the variants exist or are in flight."""
+        if all(os.path.exists(self._thumb_path(digest, v)) for v in MediaStore.THUMB_SIZES):
+            return
+        with self._lock:
+            if digest not in self._pending:
+                self._pending[digest] = self._pool.submit(self._make_thumbnails, digest, path)
+
+    def _make_thumbnails(self, digest, path):
+        try:
+            with _pillow().open(path) as img:
+                img = img.convert("RGB")
+                for variant, size in MediaStore.THUMB_SIZES.items():
+                    out = self._thumb_path(digest, variant)
+                    if os.path.exists(out):
+                        continue
+                    thumb = img.copy()
+                    thumb.thumbnail((size, size))
+                    os.makedirs(os.path.dirname(out), exist_ok=True)
+                    thumb.save(f"{out}.tmp", "JPEG", quality=80, optimize=True)
+                    os.replace(f"{out}.tmp", out)
+        finally:
+            with self._lock:
+                self._pending.pop(digest, None)
+
+    def url(self, ref, variant="card"):
+        """
+        Get the URL for a stored image, preferring the thumbnail variant and
+        falling back to the original while the thumbnail is still being built.
+        """
+        digest, _, ext = ref.partition(".")
+        if os.path.exists(self._thumb_path(digest, variant)):
+            Metrics.cache_requests.inc(cache="thumbnail", result="hit")
+            return f"{MediaStore.URL_PREFIX}/thumbs/{digest[:2]}/{digest}_{variant}.jpg"
+        Metrics.cache_requests.inc(cache="thumbnail", result="miss")
+        return f"{MediaStore.URL_PREFIX}/originals/{digest[:2]}/{digest}.{ext}"
+
+    def wait(self):
+        """Block until queued thumbnails are written (used by scripts and benchmarks)."""
+        with self._lock:
+            futures = list(self._pending.values())
+        for future in futures:
+            future.result()
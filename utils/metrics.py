@@ -0,0 +1,301 @@
+"""
+Process metrics for NagarNirman
+Counters, gauges and histograms rendered in the Prometheus text exposition
+format, served from a small local HTTP endpoint and/or written to a file.
+
+Updates are cheap: each thread adds into its own shard without taking a
+lock, and shards are only summed when the metrics are scraped.
+"""
+
+import bisect
+import os
+import threading
+import time
+
+
+class _Registry:
+    """Holds metric definitions and the per-thread value shards."""
+
+    def __init__(self):
+        self.metrics = {}
+        self.shards = []
+        # Values from shards whose thread has exited
+        self.retired = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def shard(self):
+        shard = getattr(self.local, "shard", None)
+        if shard is None:
+            shard = {}
+            self.local.shard = shard
+            with self.lock:
+                # Streamlit runs each rerun on a fresh thread, so fold dead
+                # threads' shards into `retired` as new ones register; the
+                # list stays as long as the live threads whether or not
+                # anything scrapes.
+                self._retire_dead()
+                self.shards.append((threading.current_thread(), shard))
+        return shard
+
+    def _retire_dead(self):
+        """Fold the shards of exited threads into `retired`; hold `lock`."""
+        alive = []
+        for thread, shard in self.shards:
+            if thread.is_alive():
+                alive.append((thread, shard))
+            else:
+                self._merge(self.retired, shard)
+        self.shards = alive
+
+    @staticmethod
+    def _merge(into, shard):
+        for key, value in list(shard.items()):
+            if isinstance(value, list):
+                acc = into.setdefault(key, [0] * len(value))
+                for i, v in enumerate(value):
+                    acc[i] += v
+            else:
+                into[key] = into.get(key, 0) + value
+
+    def totals(self):
+        """Sum every thread's shard into {(name, labels): value}."""
+        with self.lock:
+            self._retire_dead()
+            alive = list(self.shards)
+            totals = {}
+            self._merge(totals, self.retired)
+        for _, shard in alive:
+            self._merge(totals, shard)
+        return totals
+
+
+_registry = _Registry()
+
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name, self.help, self.kind = name, help_text, "counter"
+        _registry.metrics[name] = self
+
+    def inc(self, amount=1, **labels):
+        shard = _registry.shard()
+        key = (self.name, _labels(labels))
+        shard[key] = shard.get(key, 0) + amount
+
+
+class Gauge:
+    """Value that is either set outright or moved with inc()/dec()."""
+
+    def __init__(self, name, help_text):
+        self.name, self.help, self.kind = name, help_text, "gauge"
+        self.values = {}
+        _registry.metrics[name] = self
+
+    def set(self, value, **labels):
+        self.values[_labels(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        # In-flight gauges move up and down from many threads, so shard them too
+        shard = _registry.shard()
+        key = (self.name, _labels(labels))
+        shard[key] = shard.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram:
+    BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+    def __init__(self, name, help_text, buckets=BUCKETS):
+        self.name, self.help, self.kind = name, help_text, "histogram"
+        self.buckets = tuple(buckets)
+        _registry.metrics[name] = self
+
+    def observe(self, value, **labels):
+        shard = _registry.shard()
+        key = (self.name, _labels(labels))
+        # Layout: one slot per bucket, then +Inf, then sum
+        values = shard.get(key)
+        if values is None:
+            values = shard[key] = [0] * (len(self.buckets) + 2)
+        values[bisect.bisect_left(self.buckets, value)] += 1
+        values[-1] += value
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "t0")
+
+    def __init__(self, histogram, labels):
+        self.histogram, self.labels = histogram, labels
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.t0, **self.labels)
+        return False
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    body = ",".join('{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"')) for k, v in pairs)
+    return "{" + body + "}"
+
+
+class Metrics:
+    """Application metrics and their exporters."""
+
+    reruns = Counter("nn_reruns_total", "Script reruns, by page.")
+    report_store_size = Gauge("nn_report_store_size", "Reports held in the store.")
+    write_latency = Histogram("nn_write_latency_seconds", "Time to persist a JSON store, by store.")
+    write_queue_depth = Gauge("nn_write_queue_depth", "Report changes waiting for the write-behind writer.")
+    write_errors = Counter("nn_write_errors_total", "Failed store writes that will be retried, by store.")
+    session_file_bytes = Gauge("nn_session_file_bytes", "Size of sessions_db.json in bytes.")
+    pdf_jobs = Gauge("nn_pdf_jobs_in_progress", "PDF exports currently being generated.")
+    cache_requests = Counter("nn_cache_requests_total", "Cache lookups, by cache and result (hit/miss).")
+    logins = Counter("nn_logins_total", "Login attempts, by result.")
+    backups = Counter("nn_backups_total", "Store backups taken, by kind (full/incremental/failed).")
+    rate_limited = Counter("nn_rate_limited_total", "Requests refused by a rate limit, by action and key kind.")
+    api_requests = Counter("nn_api_requests_total", "Headless API requests, by method, route and status.")
+    api_latency = Histogram("nn_api_latency_seconds", "Headless API request handling time, by method.")
+    notifications = Counter("nn_notifications_total",
+                            "Notifications handled, by channel (inbox/email/sms) and result (sent/retry/dead/error).")
+    active_sessions = Gauge("nn_active_sessions", "Sessions that reran within the activity window.")
+
+    # Sessions count as active if they reran within this many seconds
+    ACTIVE_WINDOW = 300
+    # Seconds between sweeps of _last_seen for sessions gone idle
+    EXPIRE_SECONDS = 60
+    _last_seen = {}
+    _next_expiry = 0.0
+
+    @staticmethod
+    def record_rerun(session_id, page):
+        Metrics.reruns.inc(page=page)
+        now = time.time()
+        Metrics._last_seen[session_id] = now
+        # Swept here too, so the map stays bounded when nothing scrapes
+        if now >= Metrics._next_expiry:
+            Metrics._next_expiry = now + Metrics.EXPIRE_SECONDS
+            Metrics._expire_sessions(now)
+
+    @staticmethod
+    def _expire_sessions(now):
+        cutoff = now - Metrics.ACTIVE_WINDOW
+        for session_id, seen in list(Metrics._last_seen.items()):
+            if seen < cutoff:
+                Metrics._last_seen.pop(session_id, None)
+
+    @staticmethod
+    def _count_active_sessions():
+        Metrics._expire_sessions(time.time())
+        return len(Metrics._last_seen)
+
+    @staticmethod
+    def render():
+        """Render every metric in the Prometheus text exposition format (0.0.4)."""
+        Metrics.active_sessions.set(Metrics._count_active_sessions())
+        totals = _registry.totals()
+        lines = []
+        for name, metric in sorted(_registry.metrics.items()):
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            series = {labels: value for (n, labels), value in totals.items() if n == name}
+            if metric.kind == "gauge":
+                for labels, value in metric.values.items():
+                    series[labels] = series.get(labels, 0) + value
+            if metric.kind == "histogram":
+                for labels, values in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(metric.buckets, values):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {cumulative}")
+                    cumulative += values[len(metric.buckets)]
+                    lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {values[-1]}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+            else:
+                if not series and metric.kind == "gauge":
+                    series[()] = 0
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def write_file(path):
+        """Atomically write the current metrics to `path` (node_exporter textfile style)."""
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(Metrics.render())
+        os.replace(tmp, path)
+
+    @staticmethod
+    def start_http_server(port, host="127.0.0.1"):
+        """Serve GET /metrics on a daemon thread; returns the server."""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = Metrics.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        return server
+
+    @staticmethod
+    def start_file_writer(path, interval=15):
+        """Rewrite the metrics file every `interval` seconds on a daemon thread."""
+        def loop():
+            while True:
+                try:
+                    Metrics.write_file(path)
+                except OSError:
+                    pass
+                time.sleep(interval)
+        thread = threading.Thread(target=loop, name="metrics-file", daemon=True)
+        thread.start()
+        return thread
+
+    _exporters = None
+    _exporters_lock = threading.Lock()
+
+    @staticmethod
+    def start_exporters():
+        """
+        Start the exporters configured by NN_METRICS_PORT / NN_METRICS_FILE.
+        Safe to call on every rerun: they are only started once per process.
+        """
+        with Metrics._exporters_lock:
+            if Metrics._exporters is None:
+                started = {}
+                port = os.environ.get("NN_METRICS_PORT")
+                if port:
+                    started["http"] = Metrics.start_http_server(int(port))
+                path = os.environ.get("NN_METRICS_FILE")
+                if path:
+                    started["file"] = Metrics.start_file_writer(path)
+                Metrics._exporters = started
+        return Metrics._exporters
@@ -0,0 +1,490 @@
+"""
+Notifications for NagarNirman
+Tells submitters when the status of one of their reports changes. Status
+changes are appended to a durable outbox (an SQLite database in WAL mode,
+shared by every server process), and the admin's write returns as soon as
+they are in it. The outbox lives apart from the report store, so events
+are staged before the store write and released once it is saved (or
+discarded if it fails); events a crash left staged are checked against
+the store after STAGED_GRACE and released only if the change was saved.
+Worker threads then:
+- fan the outbox out, in batches, into each submitter's in-app inbox and
+  into one delivery per external channel (email, SMS) they have a contact
+  for, in a single transaction per batch;
+- hand due deliveries to the channel's sender in batches, retrying failed
+  ones with exponential backoff and giving up after MAX_ATTEMPTS.
+
+Senders are pluggable: anything with send(messages) -> [error or None per
+message] can be registered for a channel. SMTP and HTTP-gateway senders are
+configured from the environment; NN_NOTIFY_STUB=1 replaces them with
+StubSender, which records messages instead of sending them.
+
+Delivery is at least once: a process that dies between a send and
+recording it sends that batch again once its lease runs out.
+"""
+
+import json
+import os
+import random
+import smtplib
+import sqlite3
+import threading
+import time
+import urllib.request
+from email.message import EmailMessage
+
+from utils.metrics import Metrics
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    body TEXT NOT NULL,
+    -- staged (its store write is in progress), ready or done (fanned out)
+    state TEXT NOT NULL DEFAULT 'ready',
+    created REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS inbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT NOT NULL,
+    report_id INTEGER,
+    message TEXT NOT NULL,
+    created TEXT NOT NULL,
+    read INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS inbox_user ON inbox(username, read, id);
+CREATE TABLE IF NOT EXISTS deliveries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    channel TEXT NOT NULL,
+    recipient TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    message TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    due REAL NOT NULL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS deliveries_due ON deliveries(state, channel, due);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+# After _migrate(): databases from before outbox.state lack the column
+INDEXES = "CREATE INDEX IF NOT EXISTS outbox_state ON outbox(state, seq);"
+
+
+def _dumps(data):
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def describe(event):
+    """(subject, text) telling a submitter about a status change."""
+    subject = f"Report #{event['report_id']} is now {event['status']}"
+    text = f"Your report #{event['report_id']} \"{event['title']}\" changed from {event['old_status']} to {event['status']}."
+    if event['status'] == "Resolved":
+        text += " Thank you for helping keep the city in shape."
+    return subject, text
+
+
+class StubSender:
+    """
+    Records messages instead of sending them, for local runs and tests.
+    Can be made to fail a share of messages and to take a while per batch.
+    """
+
+    def __init__(self, fail_rate=0.0, latency=0.0, seed=None):
+        self.fail_rate, self.latency = fail_rate, latency
+        self.sent = []
+        self.failures = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def send(self, messages):
+        if self.latency:
+            time.sleep(self.latency)
+        errors = []
+        with self._lock:
+            for message in messages:
+                if self._rng.random() < self.fail_rate:
+                    self.failures += 1
+                    errors.append("stub failure")
+                else:
+                    self.sent.append(message)
+                    errors.append(None)
+        return errors
+
+
+class EmailSender:
+    """Sends each batch over one SMTP connection."""
+
+    def __init__(self, host, port=587, sender="noreply@nagarnirman.local", user=None, password=None,
+                 starttls=True):
+        self.host, self.port, self.sender = host, port, sender
+        self.user, self.password, self.starttls = user, password, starttls
+
+    def send(self, messages):
+        errors = []
+        with smtplib.SMTP(self.host, self.port, timeout=30) as smtp:
+            if self.starttls:
+                smtp.starttls()
+            if self.user:
+                smtp.login(self.user, self.password)
+            for message in messages:
+                mail = EmailMessage()
+                mail["From"], mail["To"], mail["Subject"] = self.sender, message["recipient"], message["subject"]
+                mail.set_content(message["text"])
+                try:
+                    smtp.send_message(mail)
+                    errors.append(None)
+                except smtplib.SMTPException as e:
+                    errors.append(f"{type(e).__name__}: {e}")
+        return errors
+
+
+class SmsSender:
+    """Posts each batch to an SMS gateway as {"messages": [{"to", "text"}]}."""
+
+    def __init__(self, url, token=None):
+        self.url, self.token = url, token
+
+    def send(self, messages):
+        body = _dumps({"messages": [{"to": m["recipient"], "text": m["text"]} for m in messages]}).encode()
+        request = urllib.request.Request(self.url, data=body, method="POST",
+                                         headers={"Content-Type": "application/json"})
+        if self.token:
+            request.add_header("Authorization", f"Bearer {self.token}")
+        with urllib.request.urlopen(request, timeout=30):
+            pass
+        return [None] * len(messages)
+
+
+def senders_from_env():
+    """The external senders configured in the environment, as {channel: sender}."""
+    if os.environ.get("NN_NOTIFY_STUB", "") == "1":
+        return {"email": StubSender(), "sms": StubSender()}
+    senders = {}
+    if os.environ.get("NN_SMTP_HOST"):
+        senders["email"] = EmailSender(
+            os.environ["NN_SMTP_HOST"], int(os.environ.get("NN_SMTP_PORT", "587") or 587),
+            sender=os.environ.get("NN_SMTP_FROM", "noreply@nagarnirman.local"),
+            user=os.environ.get("NN_SMTP_USER") or None, password=os.environ.get("NN_SMTP_PASSWORD") or None)
+    if os.environ.get("NN_SMS_URL"):
+        senders["sms"] = SmsSender(os.environ["NN_SMS_URL"], os.environ.get("NN_SMS_TOKEN") or None)
+    return senders
+
+
+class Notifier:
+    """Durable notification outbox with its fan-out and delivery threads."""
+
+    # Outbox events fanned out per transaction
+    BATCH = 500
+    # Deliveries handed to a sender at once
+    SEND_BATCH = 50
+    # Seconds before the first retry; doubles per attempt up to MAX_BACKOFF
+    BACKOFF = 2.0
+    MAX_BACKOFF = 3600.0
+    MAX_ATTEMPTS = 8
+    # Seconds a worker may hold claimed deliveries before others take them over
+    LEASE = 120.0
+    # Seconds between looks for work from other processes and retries coming due
+    POLL_SECONDS = 1.0
+    # Seconds an event may stay staged before its store write counts as
+    # interrupted and the event is checked against the store
+    STAGED_GRACE = 60.0
+    # Outbox events and sent deliveries kept once handled
+    RETENTION = 10_000
+
+    def __init__(self, path, contacts=None, senders=None, workers=2, confirm=None):
+        """
+        Args:
+            path: SQLite database file, shared with other server processes.
+            contacts: usernames -> {username: {channel: address}}; who can be
+                reached on which external channel. None: in-app only.
+            senders: {channel: sender}; more can be added with register().
+            workers: delivery threads.
+            confirm: events -> [bool per event]; whether the change each
+                event announces is in the store. Decides the fate of events
+                left staged; None releases them all.
+        """
+        self.path = path
+        self._contacts = contacts
+        self._confirm = confirm
+        self._senders = dict(senders or {})
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._lock = threading.RLock()
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.executescript(SCHEMA)
+            self._migrate()
+            self._db.executescript(INDEXES)
+        self._next_reconcile = 0.0
+        self._fanout_wake = threading.Event()
+        self._delivery_wake = threading.Condition()
+        self._closed = False
+        self.error = None
+        self._threads = [threading.Thread(target=self._fan_out_loop, name="notify-fanout", daemon=True)]
+        self._threads += [threading.Thread(target=self._deliver_loop, name=f"notify-send-{i}", daemon=True)
+                          for i in range(workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def register(self, channel, sender):
+        """Deliver `channel` messages through `sender` from now on (e.g. a StubSender in tests)."""
+        self._senders[channel] = sender
+        self._wake_senders()
+
+    def close(self, timeout=5.0):
+        """Stop the worker threads; whatever is left is picked up on the next start."""
+        self._closed = True
+        self._fanout_wake.set()
+        self._wake_senders()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    # Producers -------------------------------------------------------------
+
+    def enqueue(self, events):
+        """
+        Append status-change events to the outbox, ready to fan out, in one
+        transaction and wake the fan-out thread. Each event is a dict with
+        report_id, title, username, old_status, status and at.
+        """
+        self.release(self.stage(events))
+
+    def stage(self, events):
+        """
+        Append events to the outbox in one transaction, held back from
+        fan-out until release(); call before writing the change they
+        announce. Returns their sequence numbers.
+        """
+        if not events:
+            return []
+        now = time.time()
+
+        def insert(db):
+            return [db.execute("INSERT INTO outbox (body, state, created) VALUES (?, 'staged', ?)",
+                               (_dumps(e), now)).lastrowid for e in events]
+        return self._write(insert)
+
+    def release(self, seqs):
+        """Let staged events fan out: the change they announce was saved."""
+        if seqs:
+            self._write(lambda db: db.executemany("UPDATE outbox SET state = 'ready' WHERE seq = ? AND state = 'staged'",
+                                                  [(seq,) for seq in seqs]))
+            self._fanout_wake.set()
+
+    def discard(self, seqs):
+        """Drop staged events: the change they announce was not saved."""
+        if seqs:
+            self._write(lambda db: db.executemany("DELETE FROM outbox WHERE seq = ? AND state = 'staged'",
+                                                  [(seq,) for seq in seqs]))
+
+    # Inbox -----------------------------------------------------------------
+
+    def inbox(self, username, limit=50, unread_only=False):
+        """A user's newest notifications, as dicts with id, report_id, message, created and read."""
+        where = "username = ? AND read = 0" if unread_only else "username = ?"
+        with self._lock:
+            rows = self._db.execute(f"SELECT id, report_id, message, created, read FROM inbox WHERE {where} "
+                                    "ORDER BY id DESC LIMIT ?", (username, limit)).fetchall()
+        return [{"id": i, "report_id": report_id, "message": message, "created": created, "read": bool(read)}
+                for i, report_id, message, created, read in rows]
+
+    def unread(self, username):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM inbox WHERE username = ? AND read = 0",
+                                    (username,)).fetchone()[0]
+
+    def mark_read(self, username, ids=None):
+        """Mark a user's notifications (or only `ids`) read; returns how many were unread."""
+        def mark(db):
+            if ids is None:
+                return db.execute("UPDATE inbox SET read = 1 WHERE username = ? AND read = 0", (username,)).rowcount
+            return db.executemany("UPDATE inbox SET read = 1 WHERE username = ? AND id = ? AND read = 0",
+                                  [(username, i) for i in ids]).rowcount
+        return self._write(mark)
+
+    def backlog(self):
+        """
+        Get the work not done yet.
+
+        Returns:
+            dict: {"outbox": events not fanned out (staged or ready),
+            "pending": deliveries waiting to be sent, "dead": deliveries
+            given up on}
+        """
+        with self._lock:
+            outbox = self._db.execute("SELECT COUNT(*) FROM outbox WHERE state != 'done'").fetchone()[0]
+            counts = dict(self._db.execute("SELECT state, COUNT(*) FROM deliveries "
+                                           "WHERE state != 'sent' GROUP BY state").fetchall())
+        return {"outbox": outbox, "pending": counts.get("pending", 0), "dead": counts.get("dead", 0)}
+
+    # Workers ---------------------------------------------------------------
+
+    def _write(self, fn):
+        """Run fn(db) in an IMMEDIATE transaction, so other processes' workers wait their turn."""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(self._db)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return result
+
+    def _migrate(self):
+        """Give an outbox from before staging its state column; events past the old fan-out cursor are done."""
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(outbox)")]
+        if "state" in columns:
+            return
+        self._db.execute("ALTER TABLE outbox ADD COLUMN state TEXT NOT NULL DEFAULT 'ready'")
+        self._db.execute("ALTER TABLE outbox ADD COLUMN created REAL NOT NULL DEFAULT 0")
+        self._db.execute("UPDATE outbox SET state = 'done' WHERE seq <= "
+                         "(SELECT COALESCE(MAX(value), 0) FROM counters WHERE name = 'fanout')")
+
+    def _wake_senders(self):
+        with self._delivery_wake:
+            self._delivery_wake.notify_all()
+
+    def _fan_out_loop(self):
+        while not self._closed:
+            self._fanout_wake.wait(Notifier.POLL_SECONDS)
+            self._fanout_wake.clear()
+            try:
+                if time.time() >= self._next_reconcile:
+                    self._next_reconcile = time.time() + Notifier.STAGED_GRACE / 2
+                    self.reconcile()
+                while not self._closed and self.fan_out():
+                    pass
+                self.error = None
+            except Exception as e:
+                # Left in the outbox; retried on the next wake-up
+                self.error = e
+                Metrics.notifications.inc(channel="inbox", result="error")
+                time.sleep(Notifier.POLL_SECONDS)
+
+    def reconcile(self):
+        """
+        Settle events staged longer than STAGED_GRACE, whose store write was
+        cut short (e.g. by a crash): release those whose change the store
+        holds and drop the rest. Returns how many were released.
+        """
+        with self._lock:
+            rows = self._db.execute("SELECT seq, body FROM outbox WHERE state = 'staged' AND created < ? "
+                                    "ORDER BY seq", (time.time() - Notifier.STAGED_GRACE,)).fetchall()
+        if not rows:
+            return 0
+        saved = self._confirm([json.loads(body) for _, body in rows]) if self._confirm else [True] * len(rows)
+        released = [seq for (seq, _), ok in zip(rows, saved) if ok]
+        self.release(released)
+        self.discard([seq for (seq, _), ok in zip(rows, saved) if not ok])
+        return len(released)
+
+    def fan_out(self):
+        """Fan out the next batch of outbox events; returns how many were handled."""
+        with self._lock:
+            rows = self._db.execute("SELECT seq, body FROM outbox WHERE state = 'ready' ORDER BY seq LIMIT ?",
+                                    (Notifier.BATCH,)).fetchall()
+        if not rows:
+            return 0
+        events = [json.loads(body) for _, body in rows]
+        # Looked up outside the transaction: it reads the users store
+        contacts = self._contacts({e['username'] for e in events}) if self._contacts and self._senders else {}
+        now = time.time()
+        seqs = [seq for seq, _ in rows]
+
+        def apply(db):
+            # Another process may have taken this batch since it was read
+            ready = db.execute(f"SELECT COUNT(*) FROM outbox WHERE state = 'ready' AND seq IN "
+                               f"({','.join('?' * len(seqs))})", seqs).fetchone()[0]
+            if ready != len(seqs):
+                return None
+            db.executemany("UPDATE outbox SET state = 'done' WHERE seq = ?", [(seq,) for seq in seqs])
+            inbox, deliveries = [], []
+            for event in events:
+                subject, text = describe(event)
+                inbox.append((event['username'], event['report_id'], text, event['at']))
+                for channel, address in contacts.get(event['username'], {}).items():
+                    if address and channel in self._senders:
+                        deliveries.append((channel, address, subject, text, now))
+            db.executemany("INSERT INTO inbox (username, report_id, message, created) VALUES (?, ?, ?, ?)", inbox)
+            db.executemany("INSERT INTO deliveries (channel, recipient, subject, message, due) "
+                           "VALUES (?, ?, ?, ?, ?)", deliveries)
+            # Prune each time fan-out passes a multiple of 1000, however small the batches
+            first, last = rows[0][0], rows[-1][0]
+            if (first - 1) // 1000 != last // 1000:
+                db.execute("DELETE FROM outbox WHERE state = 'done' AND seq <= ?", (last - Notifier.RETENTION,))
+                db.execute("DELETE FROM deliveries WHERE state = 'sent' AND id <= "
+                           "(SELECT MAX(id) FROM deliveries) - ?", (Notifier.RETENTION,))
+            return len(deliveries)
+
+        deliveries = self._write(apply)
+        if deliveries is None:
+            return 0
+        Metrics.notifications.inc(len(rows), channel="inbox", result="sent")
+        if deliveries:
+            self._wake_senders()
+        return len(rows)
+
+    def _deliver_loop(self):
+        while not self._closed:
+            try:
+                if self.deliver():
+                    continue
+            except Exception as e:
+                self.error = e
+            with self._delivery_wake:
+                self._delivery_wake.wait(Notifier.POLL_SECONDS)
+
+    def deliver(self):
+        """Claim and send one batch of due deliveries; returns how many were attempted."""
+        now = time.time()
+
+        def claim(db):
+            for channel in list(self._senders):
+                rows = db.execute("SELECT id, recipient, subject, message, attempts FROM deliveries "
+                                  "WHERE state = 'pending' AND channel = ? AND due <= ? ORDER BY due LIMIT ?",
+                                  (channel, now, Notifier.SEND_BATCH)).fetchall()
+                if rows:
+                    # Leased: due again only if this worker never records the outcome
+                    db.executemany("UPDATE deliveries SET due = ? WHERE id = ?",
+                                   [(now + Notifier.LEASE, row[0]) for row in rows])
+                    return channel, rows
+            return None, []
+
+        channel, rows = self._write(claim)
+        if not rows:
+            return 0
+        messages = [{"recipient": recipient, "subject": subject, "text": text}
+                    for _, recipient, subject, text, _ in rows]
+        try:
+            errors = self._senders[channel].send(messages)
+        except Exception as e:
+            errors = [f"{type(e).__name__}: {e}"] * len(rows)
+
+        done, retry = [], []
+        for (delivery_id, _, _, _, attempts), error in zip(rows, errors):
+            if error is None:
+                done.append((delivery_id,))
+                continue
+            attempts += 1
+            if attempts >= Notifier.MAX_ATTEMPTS:
+                retry.append(("dead", attempts, now, error, delivery_id))
+            else:
+                backoff = min(Notifier.BACKOFF * 2 ** (attempts - 1), Notifier.MAX_BACKOFF)
+                # Jittered, so a gateway outage doesn't bring every retry back at once
+                retry.append(("pending", attempts, now + backoff * random.uniform(0.5, 1.0), error, delivery_id))
+
+        def record(db):
+            db.executemany("UPDATE deliveries SET state = 'sent', error = NULL WHERE id = ?", done)
+            db.executemany("UPDATE deliveries SET state = ?, attempts = ?, due = ?, error = ? WHERE id = ?", retry)
+
+        self._write(record)
+        Metrics.notifications.inc(len(done), channel=channel, result="sent")
+        for result in ("pending", "dead"):
+            failed = sum(1 for r in retry if r[0] == result)
+            if failed:
+                Metrics.notifications.inc(failed, channel=channel, result="retry" if result == "pending" else "dead")
+        return len(rows)
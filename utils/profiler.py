@@ -0,0 +1,196 @@
+"""
+Per-rerun profiling for NagarNirman
+Records timing spans and counters for every script run, optionally captures
+a cProfile for a sample of reruns, and keeps the most recent runs of all
+sessions so admins can inspect them or export a Chrome trace file.
+"""
+
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import random
+import time
+import zlib
+from collections import deque
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+
+@st.cache_resource
+def _shared_runs():
+    """Recent finished runs of every session in this server process."""
+    return deque(maxlen=Profiler.MAX_RUNS)
+
+
+class Profiler:
+    MAX_RUNS = 200
+    # Spans kept per run; later nested ones are only counted (spans_dropped),
+    # so a span inside a loop can't grow the shared history without bound.
+    # Spans close innermost first, so the two outer levels are always kept.
+    MAX_SPANS = 500
+    # Fraction of reruns captured with cProfile (NN_PROFILE_SAMPLE=0.05 -> 5%)
+    SAMPLE_RATE = float(os.environ.get("NN_PROFILE_SAMPLE", "0") or 0)
+    PROFILE_LINES = 25
+
+    _markdown_installed = False
+
+    @staticmethod
+    def _current():
+        # Kept in session state: a rerun after st.rerun() may start on a new thread
+        return st.session_state.get("_profiler_run")
+
+    @staticmethod
+    def session_id():
+        """Id of the browser session running this script ("bare" outside a server)."""
+        return getattr(get_script_run_ctx(), "session_id", "bare")
+
+    @staticmethod
+    def _new_run(name):
+        run = {
+            "name": name,
+            "session": Profiler.session_id(),
+            "start": time.time(),
+            "t0": time.perf_counter(),
+            "spans": [],
+            "counters": {},
+            "depth": 0,
+            "profile": None,
+        }
+        if Profiler.SAMPLE_RATE and random.random() < Profiler.SAMPLE_RATE:
+            run["profiler"] = cProfile.Profile()
+            run["profiler"].enable()
+        st.session_state["_profiler_run"] = run
+        return run
+
+    @staticmethod
+    def start_run(name="app"):
+        """Begin recording a full script run; closes a run left open by st.rerun()."""
+        if Profiler._current() is not None:
+            Profiler.end_run(status="interrupted")
+        Profiler._new_run(name)
+
+    @staticmethod
+    def end_run(status="ok"):
+        """Finish the current run and publish it to the shared history."""
+        run = Profiler._current()
+        if run is None:
+            return None
+        st.session_state["_profiler_run"] = None
+        run["duration_ms"] = (time.perf_counter() - run.pop("t0")) * 1000
+        run["status"] = status
+        run.pop("depth")
+        profiler = run.pop("profiler", None)
+        if profiler is not None:
+            profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(Profiler.PROFILE_LINES)
+            run["profile"] = out.getvalue()
+        _shared_runs().append(run)
+        return run
+
+    @staticmethod
+    def set_name(name):
+        """Rename the current run once the routed page is known."""
+        run = Profiler._current()
+        if run is not None:
+            run["name"] = name
+
+    @staticmethod
+    def count(name, amount=1):
+        """Add to a counter on the current run (no-op outside a run)."""
+        run = Profiler._current()
+        if run is not None:
+            run["counters"][name] = run["counters"].get(name, 0) + amount
+
+    class _Span:
+        __slots__ = ("name", "run", "t0", "implicit")
+
+        def __init__(self, name):
+            self.name = name
+
+        def __enter__(self):
+            run = Profiler._current()
+            # Fragment reruns skip app.py, so their outermost span opens a run
+            self.implicit = run is None
+            if self.implicit:
+                run = Profiler._new_run(f"fragment:{self.name}")
+            self.run = run
+            run["depth"] += 1
+            self.t0 = time.perf_counter()
+            return self
+
+        def __exit__(self, exc_type, exc, tb):
+            run = self.run
+            end = time.perf_counter()
+            run["depth"] -= 1
+            base = run["t0"]
+            if run["depth"] > 1 and len(run["spans"]) >= Profiler.MAX_SPANS:
+                run["counters"]["spans_dropped"] = run["counters"].get("spans_dropped", 0) + 1
+            else:
+                run["spans"].append({
+                    "name": self.name,
+                    "start_ms": (self.t0 - base) * 1000,
+                    "duration_ms": (end - self.t0) * 1000,
+                    "depth": run["depth"],
+                })
+            if self.implicit and Profiler._current() is run:
+                Profiler.end_run()
+            return False
+
+    @staticmethod
+    def span(name):
+        """Context manager timing a block as a named span of the current run."""
+        return Profiler._Span(name)
+
+    @staticmethod
+    def timed(name):
+        """Decorator form of span()."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with Profiler._Span(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    @staticmethod
+    def install():
+        """Count the bytes every st.markdown call sends to the browser."""
+        if Profiler._markdown_installed:
+            return
+        original = st.markdown
+
+        @functools.wraps(original)
+        def markdown(body, *args, **kwargs):
+            Profiler.count("markdown_calls")
+            Profiler.count("markdown_bytes", len(body.encode("utf-8")) if isinstance(body, str) else 0)
+            return original(body, *args, **kwargs)
+
+        st.markdown = markdown
+        Profiler._markdown_installed = True
+
+    @staticmethod
+    def recent_runs():
+        """Finished runs, newest first."""
+        return list(reversed(_shared_runs()))
+
+    @staticmethod
+    def export_trace(runs=None):
+        """Serialise runs in Chrome trace-event format (chrome://tracing, Perfetto)."""
+        events = []
+        for run in runs if runs is not None else Profiler.recent_runs():
+            base_us = run["start"] * 1e6
+            # One trace "thread" per session
+            pid, tid = os.getpid(), zlib.crc32(str(run["session"]).encode())
+            events.append({"name": run["name"], "ph": "X", "ts": base_us,
+                           "dur": run["duration_ms"] * 1000, "pid": pid, "tid": tid,
+                           "args": dict(run["counters"], status=run["status"])})
+            for span in run["spans"]:
+                events.append({"name": span["name"], "ph": "X",
+                               "ts": base_us + span["start_ms"] * 1000,
+                               "dur": span["duration_ms"] * 1000, "pid": pid, "tid": tid})
+        return json.dumps({"traceEvents": events, "displayTimeUnit": "ms"})
@@ -0,0 +1,158 @@
+"""
+Rate limiting for NagarNirman
+Token buckets that throttle report submissions, logins and registrations
+per user, per session and per client IP, so one client cannot monopolise
+the write path. Buckets live in memory; each limiter keeps at most
+MAX_KEYS of them and evicts the least recently used, so a flood of new
+keys costs constant memory and every check is O(1).
+"""
+
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import streamlit as st
+
+from utils.metrics import Metrics
+from utils.profiler import Profiler
+
+
+class RateLimiter:
+    """Token buckets for many keys: `burst` tokens each, refilled at `rate` per second."""
+
+    MAX_KEYS = 10_000
+
+    def __init__(self, rate, burst, max_keys=MAX_KEYS):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        # key -> [tokens, last refill time], least recently used first
+        self._buckets = OrderedDict()
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def available(self, key, now=None):
+        """Tokens `key` has now (a full bucket for unknown keys)."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                return float(self.burst)
+            return min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+
+    def take(self, key, cost=1, now=None):
+        """
+        Spend `cost` tokens of `key`'s bucket if it has them.
+
+        Returns:
+            float: 0 if allowed, else seconds until the bucket holds `cost` tokens.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(self.burst), now]
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] >= cost:
+                bucket[0] -= cost
+                return 0.0
+            return (cost - bucket[0]) / self.rate
+
+
+class RateLimits:
+    # (tokens refilled per second, burst) per action and key kind. Per-IP
+    # limits are looser: offices and kiosks share an address.
+    LIMITS = {
+        "submit": {"user": (1 / 10, 10), "session": (1 / 10, 10), "ip": (1.0, 30)},
+        "login": {"session": (1 / 10, 10), "ip": (1 / 3, 20)},
+        # Wrong passwords per account from one client, charged only when a
+        # login fails: the owner's own logins and guesses from elsewhere
+        # never lock an account
+        "login_failure": {"user": (1 / 30, 5)},
+        "register": {"session": (1 / 60, 3), "ip": (1 / 60, 5)},
+    }
+    ENABLED = os.environ.get("NN_RATE_LIMITS", "1") != "0"
+
+    _limiters = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _limiter(action, kind):
+        limiter = RateLimits._limiters.get((action, kind))
+        if limiter is None:
+            rate, burst = RateLimits.LIMITS[action][kind]
+            limiter = RateLimits._limiters[(action, kind)] = RateLimiter(rate, burst)
+        return limiter
+
+    @staticmethod
+    def check(action, user=None, session=None, ip=None):
+        """
+        Take one token for `action` from the bucket of every key given.
+
+        Nothing is taken unless every bucket has a token, so a refused
+        request doesn't use up the allowance of the keys that had room.
+
+        Returns:
+            tuple: (allowed: bool, retry_after: float seconds)
+        """
+        if not RateLimits.ENABLED:
+            return True, 0.0
+        keys = [(kind, value) for kind, value in (("user", user), ("session", session), ("ip", ip))
+                if value and kind in RateLimits.LIMITS[action]]
+        now = time.monotonic()
+        with RateLimits._lock:
+            limiters = [(kind, RateLimits._limiter(action, kind), value) for kind, value in keys]
+            for kind, limiter, value in limiters:
+                if limiter.available(value, now) < 1:
+                    Metrics.rate_limited.inc(action=action, key=kind)
+                    return False, limiter.take(value, now=now)
+            for _, limiter, value in limiters:
+                limiter.take(value, now=now)
+        return True, 0.0
+
+    @staticmethod
+    def retry_after(action, **keys):
+        """Seconds until every bucket of `keys` has a token for `action` (0 if they all do); takes nothing."""
+        if not RateLimits.ENABLED:
+            return 0.0
+        now = time.monotonic()
+        wait = 0.0
+        with RateLimits._lock:
+            for kind, value in keys.items():
+                if value and kind in RateLimits.LIMITS[action]:
+                    limiter = RateLimits._limiter(action, kind)
+                    wait = max(wait, (1 - limiter.available(value, now)) / limiter.rate)
+        return wait
+
+    @staticmethod
+    def charge(action, **keys):
+        """Take one token for `action` from the bucket of every key given, as far as they have one."""
+        if not RateLimits.ENABLED:
+            return
+        now = time.monotonic()
+        with RateLimits._lock:
+            for kind, value in keys.items():
+                if value and kind in RateLimits.LIMITS[action]:
+                    RateLimits._limiter(action, kind).take(value, now=now)
+
+    @staticmethod
+    def client():
+        """Session and IP keys of the current Streamlit session (IP is None when unknown)."""
+        try:
+            ip = st.context.ip_address
+        except Exception:
+            ip = None
+        return {"session": st.session_state.get('session_token') or Profiler.session_id(), "ip": ip}
+
+    @staticmethod
+    def message(retry_after):
+        return f"Too many attempts. Please try again in {math.ceil(retry_after)} seconds."
@@ -0,0 +1,174 @@
+"""
+Columnar snapshot of reports for NagarNirman
+Keeps reports as typed numpy columns so views can build DataFrames without
+converting the list of dicts on every rerun.
+"""
+
+from datetime import date
+import numpy as np
+
+EPOCH = date(1970, 1, 1)
+
+
+class _Categories:
+    """Append-only label <-> code mapping for a categorical column."""
+
+    def __init__(self):
+        self.labels = []
+        self.codes = {}
+
+    def code(self, label):
+        if label is None:
+            return -1
+        code = self.codes.get(label)
+        if code is None:
+            code = len(self.labels)
+            self.labels.append(label)
+            self.codes[label] = code
+        return code
+
+
+class ReportColumns:
+    """Incrementally appended, column-oriented copy of the report list."""
+
+    CATEGORICAL = ("status", "category", "division", "district", "submitted_by")
+    INITIAL_CAPACITY = 64
+
+    def __init__(self, capacity=INITIAL_CAPACITY):
+        self.size = 0
+        self.capacity = max(int(capacity), 1)
+        # Report id -> row; None until first needed when built from_index()
+        self.row_of = {}
+        # (LazyReports, rows) whose titles frame() still has to read
+        self._untitled = None
+        self.categories = {name: _Categories() for name in self.CATEGORICAL}
+        self.id = np.zeros(self.capacity, dtype=np.int32)
+        self.lat = np.zeros(self.capacity, dtype=np.float32)
+        self.lon = np.zeros(self.capacity, dtype=np.float32)
+        self.date = np.zeros(self.capacity, dtype=np.int32)
+        self.title = np.empty(self.capacity, dtype=object)
+        # int32 like the index codes of utils/report_file.py: submitted_by is open-ended
+        self.codes = {name: np.full(self.capacity, -1, dtype=np.int32) for name in self.CATEGORICAL}
+
+    @classmethod
+    def from_reports(cls, reports):
+        """Build the columns in one pass from a list of report dicts."""
+        columns = cls(capacity=max(len(reports), cls.INITIAL_CAPACITY))
+        for report in reports:
+            columns.append(report)
+        return columns
+
+    @classmethod
+    def from_index(cls, reports):
+        """
+        Build the columns of a LazyReports (utils/report_file.py) from the
+        index of its files, without decoding the reports. Titles are read by
+        the first frame() that shows them.
+        """
+        arrays, labels = reports.index_columns()
+        n = len(arrays["id"])
+        columns = cls(capacity=max(len(reports), cls.INITIAL_CAPACITY))
+        for name in ("id", "lat", "lon", "date"):
+            getattr(columns, name)[:n] = arrays[name]
+        for name in cls.CATEGORICAL:
+            columns.codes[name][:n] = arrays[name]
+            categories = columns.categories[name]
+            categories.labels = labels[name]
+            categories.codes = {label: code for code, label in enumerate(labels[name])}
+        columns.size = n
+        columns.row_of = None
+        columns._untitled = (reports, n)
+        for row, report in reports.changed():
+            if row < n:
+                # Only the status of a stored report changes after it is written
+                columns.codes["status"][row] = columns.categories["status"].code(report["status"])
+            else:
+                columns.append(report)
+        return columns
+
+    def _rows(self):
+        if self.row_of is None:
+            self.row_of = dict(zip(self.id[:self.size].tolist(), range(self.size)))
+        return self.row_of
+
+    @staticmethod
+    def _to_days(value):
+        """Convert a 'YYYY-MM-DD' string to days since the Unix epoch."""
+        try:
+            return (date.fromisoformat(str(value)[:10]) - EPOCH).days
+        except ValueError:
+            return 0
+
+    def _grow(self):
+        """Double the capacity of every column."""
+        self.capacity *= 2
+        for name in ("id", "lat", "lon", "date", "title"):
+            old = getattr(self, name)
+            new = np.zeros(self.capacity, dtype=old.dtype) if old.dtype != object else np.empty(self.capacity, dtype=object)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+        for name, old in self.codes.items():
+            new = np.full(self.capacity, -1, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            self.codes[name] = new
+
+    def append(self, report):
+        """Append one report dict as a new row."""
+        if self.size == self.capacity:
+            self._grow()
+        row = self.size
+        self.id[row] = report["id"]
+        self.lat[row] = report.get("lat") or 0.0
+        self.lon[row] = report.get("lon") or 0.0
+        self.date[row] = self._to_days(report.get("date", ""))
+        self.title[row] = report.get("title", "")
+        for name in self.CATEGORICAL:
+            value = report.get(name, report.get("type") if name == "category" else None)
+            self.codes[name][row] = self.categories[name].code(value)
+        self._rows()[report["id"]] = row
+        self.size += 1
+
+    def set_value(self, report_id, name, value):
+        """Update a categorical field (e.g. status) in place."""
+        row = self._rows().get(report_id)
+        if row is None:
+            return False
+        self.codes[name][row] = self.categories[name].code(value)
+        return True
+
+    def count(self, name, value):
+        """Count rows whose categorical field equals value, without a DataFrame."""
+        code = self.categories[name].codes.get(value)
+        if code is None:
+            return 0
+        return int(np.count_nonzero(self.codes[name][:self.size] == code))
+
+    def frame(self, names=None):
+        """
+        Return a DataFrame backed by the column buffers, with every column
+        or only `names`.
+
+        Numeric and code columns are slices of the underlying arrays, so no
+        per-report conversion happens. The frame is a read-only snapshot:
+        mutate reports through DataManager, not through the frame.
+        """
+        # Deferred: counting and appending only need numpy
+        import pandas as pd
+        n = self.size
+        names = names or ("id", "title", "lat", "lon", "date") + self.CATEGORICAL
+        if "title" in names and self._untitled is not None:
+            reports, untitled = self._untitled
+            self._untitled = None
+            for row in range(untitled):
+                self.title[row] = reports.title(row)
+        data = {}
+        for name in names:
+            if name in self.CATEGORICAL:
+                data[name] = pd.Categorical.from_codes(
+                    self.codes[name][:n], categories=pd.Index(self.categories[name].labels, dtype=object)
+                )
+            elif name == "date":
+                data[name] = self.date[:n].astype("datetime64[D]")
+            else:
+                data[name] = getattr(self, name)[:n]
+        return pd.DataFrame(data, copy=False)
@@ -0,0 +1,421 @@
+"""
+Indexed report files for NagarNirman
+The "indexed" partition format (see utils/codec.py): a fixed-size index entry
+per report points into a region of JSON records, so a file can be opened
+through mmap without decoding it and a session decodes only the reports it
+reads. The index also carries the fields the dashboard counts and maps
+(status, category, division, district, submitter, coordinates and dates),
+so ReportColumns is built from it without decoding any record.
+
+Layout (little-endian):
+    header   magic "NNX1", report count (u32), label table size (u32), 4 reserved bytes
+    labels   JSON object: coded field -> list of labels; index codes point into it
+    index    one ENTRY per report, sorted by id (starts 8-byte aligned)
+    records  compact JSON objects, in index order; offsets are relative to here
+"""
+
+import bisect
+import mmap
+import os
+import struct
+from datetime import date
+
+from utils.codec import INDEXED_MAGIC, CodecError, _json_dumps, _json_loads
+from utils.report_record import Report
+# numpy is imported on first use (see LazyReports), like in ReportColumns
+
+HEADER = struct.Struct("<4sII4x")
+# id, record offset, record length, lat, lon, date, resolved_at, then one code per CODED field
+ENTRY = struct.Struct("<qQIffii5i")
+# Same fields as ReportColumns.CATEGORICAL; -1 codes a missing value
+CODED = ("status", "category", "division", "district", "submitted_by")
+# Dates are stored as days since EPOCH; NO_DATE marks a missing or unparsable one
+EPOCH = date(1970, 1, 1)
+NO_DATE = -2 ** 31
+
+
+def _days(value):
+    try:
+        return (date.fromisoformat(str(value)[:10]) - EPOCH).days
+    except ValueError:
+        return NO_DATE
+
+
+def _index_dtype():
+    import numpy as np
+    return np.dtype([("id", "<i8"), ("offset", "<u8"), ("length", "<u4"), ("lat", "<f4"), ("lon", "<f4"),
+                     ("date", "<i4"), ("resolved_at", "<i4")] + [(name, "<i4") for name in CODED])
+
+
+def encode(items):
+    """Encode report dicts, Report records or StoredRecords as an indexed file (bytes)."""
+    tables = {name: {} for name in CODED}
+
+    def code(name, value):
+        if value is None:
+            return -1
+        return tables[name].setdefault(value, len(tables[name]))
+
+    rows = []
+    for item in items:
+        if isinstance(item, StoredRecord):
+            # Unchanged since it was read: copy the record and its index fields as they are
+            entry = item.file.entry(item.row)
+            body, head = item.raw(), (entry[0],) + entry[3:7]
+            values = [item[name] for name in CODED]
+        else:
+            data = item.to_dict() if isinstance(item, Report) else item
+            body = _json_dumps(data)
+            head = (data["id"], data.get("lat") or 0.0, data.get("lon") or 0.0,
+                    _days(data.get("date")), _days(data.get("resolved_at")))
+            # Legacy reports used 'type' instead of 'category'
+            values = [data.get(name, data.get("type") if name == "category" else None) for name in CODED]
+        rows.append((head, body, [code(name, value) for name, value in zip(CODED, values)]))
+    rows.sort(key=lambda row: row[0][0])
+
+    labels = _json_dumps({name: list(tables[name]) for name in CODED})
+    labels += b" " * (-(HEADER.size + len(labels)) % 8)
+    parts = [HEADER.pack(INDEXED_MAGIC, len(rows), len(labels)), labels]
+    offset = 0
+    for (report_id, lat, lon, day, resolved), body, codes in rows:
+        parts.append(ENTRY.pack(report_id, offset, len(body), lat, lon, day, resolved, *codes))
+        offset += len(body)
+    parts.extend(body for _, body, _ in rows)
+    return b"".join(parts)
+
+
+def _layout(buf):
+    """
+    Parse and check the header of an indexed file.
+
+    Returns:
+        tuple: (count: int, labels: dict, index_start: int, records_start: int)
+    """
+    if len(buf) < HEADER.size:
+        raise CodecError("Not an indexed report file")
+    magic, count, labels_size = HEADER.unpack_from(buf, 0)
+    if magic != INDEXED_MAGIC:
+        raise CodecError("Not an indexed report file")
+    index_start = HEADER.size + labels_size
+    records_start = index_start + count * ENTRY.size
+    if records_start > len(buf):
+        raise CodecError("Truncated index")
+    if count:
+        # Records are laid out in index order, so the last one ends the file
+        _, offset, length = ENTRY.unpack_from(buf, records_start - ENTRY.size)[:3]
+        if records_start + offset + length != len(buf):
+            raise CodecError("Truncated records")
+    try:
+        labels = _json_loads(bytes(buf[HEADER.size:index_start]))
+    except Exception as e:
+        raise CodecError(f"Cannot decode the label table: {e}") from e
+    return count, labels, index_start, records_start
+
+
+def decode_all(raw):
+    """Decode every report of an indexed file, in id order (codec.loads() for this format)."""
+    count, _, index_start, records_start = _layout(raw)
+    reports = []
+    for i in range(count):
+        _, offset, length = ENTRY.unpack_from(raw, index_start + i * ENTRY.size)[:3]
+        start = records_start + offset
+        reports.append(_json_loads(bytes(raw[start:start + length])))
+    return reports
+
+
+class ReportFile:
+    """A read-only indexed report file, mapped into memory."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            if os.name == "nt":
+                # Windows can't replace a file while it is mapped
+                buf = f.read()
+            else:
+                try:
+                    buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                except ValueError:
+                    raise CodecError("Empty file")
+        self.path = path
+        self._buf = buf
+        self.count, self.labels, self._index_start, self._records_start = _layout(buf)
+        self._index = None
+
+    def __len__(self):
+        return self.count
+
+    def entry(self, row):
+        """The raw index entry of a row (see ENTRY)."""
+        return ENTRY.unpack_from(self._buf, self._index_start + row * ENTRY.size)
+
+    def raw(self, row):
+        _, offset, length = self.entry(row)[:3]
+        start = self._records_start + offset
+        return self._buf[start:start + length]
+
+    def decode(self, row):
+        return _json_loads(self.raw(row))
+
+    def label(self, row, name):
+        value = self.entry(row)[7 + CODED.index(name)]
+        return None if value < 0 else self.labels[name][value]
+
+    def index(self):
+        """The whole index as a numpy structured array over the mapped file (no copy)."""
+        if self._index is None:
+            import numpy as np
+            self._index = np.frombuffer(self._buf, dtype=_index_dtype(), count=self.count,
+                                        offset=self._index_start)
+        return self._index
+
+
+class StoredRecord:
+    """
+    A report in a ReportFile that has not been decoded. Its id and coded
+    fields are read from the index; any other field decodes the record.
+    Used to rewrite a partition without decoding the reports it leaves as they are.
+    """
+
+    __slots__ = ("file", "row")
+
+    def __init__(self, file, row):
+        self.file = file
+        self.row = row
+
+    def __getitem__(self, key):
+        if key == "id":
+            return self.file.entry(self.row)[0]
+        if key in CODED:
+            return self.file.label(self.row, key)
+        return self.to_dict()[key]
+
+    def get(self, key, default=None):
+        try:
+            value = self[key]
+        except KeyError:
+            return default
+        return default if value is None else value
+
+    def raw(self):
+        return self.file.raw(self.row)
+
+    def to_dict(self):
+        return self.file.decode(self.row)
+
+
+class LazyReports:
+    """
+    A session's report list over mapped partition files.
+
+    Behaves like the list of Report records DataManager otherwise keeps, in
+    id order: a report is decoded the first time it is read and then kept,
+    so in-place changes (a status update) stick. Reports added later are
+    appended in memory. Iterating decodes everything, so hot paths use
+    where(), group() and the index (ReportColumns.from_index) instead.
+    """
+
+    def __init__(self, files):
+        """
+        Args:
+            files: {partition key: ReportFile}; a file holds only that partition's reports.
+        """
+        import numpy as np
+        self._keys = list(files)
+        self._files = list(files.values())
+        # Row of file i in the concatenated indexes starts at _bases[i]
+        self._bases = [0]
+        for f in self._files:
+            self._bases.append(self._bases[-1] + len(f))
+        self._stored = self._bases[-1]
+        ids = [f.index()["id"] for f in self._files]
+        if len(ids) == 1:
+            self._ids, self._order = ids[0], None
+        else:
+            # Each file is sorted by id; merge them into one id order
+            ids = np.concatenate(ids) if ids else np.zeros(0, dtype=np.int64)
+            self._order = np.argsort(ids, kind="stable")
+            self._ids = ids[self._order]
+        self._positions = None
+        self._decoded = {}
+        self._added = []
+
+    def __len__(self):
+        return self._stored + len(self._added)
+
+    def __getitem__(self, pos):
+        if isinstance(pos, slice):
+            return [self[i] for i in range(*pos.indices(len(self)))]
+        if pos < 0:
+            pos += len(self)
+        if not 0 <= pos < len(self):
+            raise IndexError("report index out of range")
+        if pos >= self._stored:
+            return self._added[pos - self._stored]
+        report = self._decoded.get(pos)
+        if report is None:
+            f, row = self._locate(pos)
+            report = self._decoded[pos] = Report.from_dict(f.decode(row))
+        return report
+
+    def __iter__(self):
+        for pos in range(len(self)):
+            yield self[pos]
+
+    def __reversed__(self):
+        for pos in range(len(self) - 1, -1, -1):
+            yield self[pos]
+
+    def append(self, report):
+        self._added.append(report)
+
+    @property
+    def decoded(self):
+        """Stored reports decoded so far."""
+        return len(self._decoded)
+
+    def _locate(self, pos):
+        """(file, row in file) of a stored position."""
+        if self._order is not None:
+            pos = int(self._order[pos])
+        i = bisect.bisect_right(self._bases, pos) - 1
+        return self._files[i], pos - self._bases[i]
+
+    def _position(self, i, rows):
+        """List positions of rows (numpy array) of file i."""
+        if self._order is None:
+            return rows
+        if self._positions is None:
+            import numpy as np
+            self._positions = np.empty(self._stored, dtype=np.int64)
+            self._positions[self._order] = np.arange(self._stored)
+        return self._positions[self._bases[i] + rows]
+
+    def position_of(self, report_id):
+        """List position of a stored report, or None."""
+        i = int(self._ids.searchsorted(report_id))
+        if i < self._stored and self._ids[i] == report_id:
+            return i
+        return None
+
+    def rows(self):
+        return _Rows(self)
+
+    def ids(self):
+        return self._ids.tolist() + [r['id'] for r in self._added]
+
+    def title(self, pos):
+        """A report's title, without keeping the decoded report."""
+        if pos in self._decoded or pos >= self._stored:
+            return self[pos]['title']
+        f, row = self._locate(pos)
+        return f.decode(row).get('title', "")
+
+    def where(self, name, label, resolved_by=None):
+        """
+        Reports whose coded field `name` is `label`, decoding only those.
+
+        With `resolved_by` (a date), stored reports resolved after that day
+        are skipped as well; reports without a resolution date are kept.
+        Decoded and added reports are checked on the record itself, since
+        their status may have changed since the file was written.
+        """
+        import numpy as np
+        hits = []
+        for i, f in enumerate(self._files):
+            try:
+                code = f.labels[name].index(label)
+            except ValueError:
+                continue
+            index = f.index()
+            mask = index[name] == code
+            if resolved_by is not None:
+                resolved = index["resolved_at"]
+                mask &= (resolved == NO_DATE) | (resolved <= _days(resolved_by))
+            hits.extend(self._position(i, np.flatnonzero(mask)).tolist())
+        positions = {p for p in hits if p not in self._decoded}
+        positions.update(p for p, r in self._decoded.items() if r.get(name) == label)
+        return [self[p] for p in sorted(positions)] + [r for r in self._added if r.get(name) == label]
+
+    def group(self, key_of, keys=None):
+        """
+        Reports of the given partition keys (all if None), {key: [reports]}.
+        Reports not decoded yet come back as StoredRecords, so rewriting a
+        partition copies them rather than decoding them.
+        """
+        wanted = None if keys is None else set(keys)
+        groups = {}
+        for i, (key, f) in enumerate(zip(self._keys, self._files)):
+            if wanted is not None and key not in wanted:
+                continue
+            group = groups[key] = []
+            if self._order is None:
+                positions = range(len(f))
+            else:
+                import numpy as np
+                positions = self._position(i, np.arange(len(f))).tolist()
+            for row, pos in enumerate(positions):
+                report = self._decoded.get(pos)
+                group.append(StoredRecord(f, row) if report is None else report)
+        for report in self._added:
+            key = key_of(report)
+            if wanted is None or key in wanted:
+                groups.setdefault(key, []).append(report)
+        return groups
+
+    def index_columns(self):
+        """
+        The indexed fields of the stored reports, in list order.
+
+        Returns:
+            tuple: (arrays: dict of numpy arrays for id, lat, lon, date and
+                each CODED field, labels: dict of label lists for the codes)
+        """
+        import numpy as np
+        parts = {name: [] for name in ("id", "lat", "lon", "date") + CODED}
+        codes = {name: {} for name in CODED}
+        for f in self._files:
+            index = f.index()
+            for name in ("id", "lat", "lon", "date"):
+                parts[name].append(index[name])
+            for name in CODED:
+                # Map this file's codes to the merged label table; the extra slot keeps -1 at -1
+                table = codes[name]
+                lookup = np.array([table.setdefault(label, len(table)) for label in f.labels[name]] + [-1],
+                                  dtype=np.int32)
+                parts[name].append(lookup[index[name]])
+        arrays = {}
+        for name, chunks in parts.items():
+            array = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.int32)
+            arrays[name] = array if self._order is None else array[self._order]
+        arrays["date"] = np.where(arrays["date"] == NO_DATE, 0, arrays["date"])
+        return arrays, {name: list(codes[name]) for name in CODED}
+
+    def changed(self):
+        """(position, report) of every decoded or added report, which the index may not describe."""
+        return list(self._decoded.items()) + [(self._stored + i, r) for i, r in enumerate(self._added)]
+
+
+class _Rows:
+    """Report id -> list position for a LazyReports (what _reload builds as a dict for lists)."""
+
+    def __init__(self, reports):
+        self._reports = reports
+        self._added = {}
+
+    def get(self, report_id, default=None):
+        row = self._added.get(report_id)
+        if row is None:
+            row = self._reports.position_of(report_id)
+        return default if row is None else row
+
+    def __getitem__(self, report_id):
+        row = self.get(report_id)
+        if row is None:
+            raise KeyError(report_id)
+        return row
+
+    def __setitem__(self, report_id, row):
+        self._added[report_id] = row
+
+    def __contains__(self, report_id):
+        return self.get(report_id) is not None
@@ -0,0 +1,149 @@
+"""
+Compact report record for NagarNirman
+A slotted replacement for the per-report dict that shares repeated strings
+and keeps long descriptions compressed until they are read.
+"""
+
+import sys
+import zlib
+
+# Value of an OPTIONAL slot that was never set
+_UNSET = object()
+
+
+class Report:
+    """
+    A single report with a dict-compatible interface.
+
+    Views and UIManager keep using report['title'] / report.get('district'),
+    while each record stores only slot values, interned enum-like strings
+    and a compressed description.
+    """
+
+    FIELDS = ("id", "title", "category", "subcategory", "status", "division",
+              "district", "lat", "lon", "date", "description", "submitted_by", "photos")
+    INTERNED = frozenset(("category", "subcategory", "status", "division",
+                          "district", "date", "submitted_by"))
+    # Keys most reports only gain later (resolving one sets resolved_at); they
+    # get a slot so setting them doesn't create _extra, but stay out of
+    # to_dict() and keys() until set.
+    OPTIONAL = ("resolved_at",)
+    # Descriptions longer than this are stored zlib-compressed
+    LONG_DESCRIPTION = 200
+
+    __slots__ = ("id", "title", "category", "subcategory", "status", "division",
+                 "district", "lat", "lon", "date", "_description", "submitted_by",
+                 "photos", "resolved_at", "_extra")
+
+    def __init__(self, id, title, category, subcategory, status, division, district,
+                 lat, lon, date, description="", submitted_by=None, photos=(),
+                 resolved_at=_UNSET, **extra):
+        self.id = id
+        self.title = title
+        self.lat = lat
+        self.lon = lon
+        self.description = description
+        self.category = category
+        self.subcategory = subcategory
+        self.status = status
+        self.division = division
+        self.district = district
+        self.date = date
+        self.submitted_by = submitted_by
+        # Media store references ("<sha256>.<ext>"), see utils.media_store
+        self.photos = tuple(photos or ())
+        self.resolved_at = resolved_at
+        self._extra = extra or None
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a record from a stored report dict, keeping unknown keys."""
+        data = dict(data)
+        # Legacy reports used 'type' instead of 'category'
+        if "category" not in data and "type" in data:
+            data["category"] = data["type"]
+        values = {name: data.pop(name, None) for name in cls.FIELDS}
+        values["description"] = values["description"] or ""
+        return cls(**values, **data)
+
+    def to_dict(self):
+        """Return a plain dict suitable for JSON serialisation."""
+        data = {name: self[name] for name in self.FIELDS}
+        data["photos"] = list(self.photos)
+        for name in self.OPTIONAL:
+            value = getattr(self, name)
+            if value is not _UNSET:
+                data[name] = value
+        if self._extra:
+            data.update(self._extra)
+        return data
+
+    @property
+    def description(self):
+        value = self._description
+        if isinstance(value, bytes):
+            return zlib.decompress(value).decode("utf-8")
+        return value
+
+    @description.setter
+    def description(self, value):
+        value = value or ""
+        if len(value) > Report.LONG_DESCRIPTION:
+            self._description = zlib.compress(value.encode("utf-8"))
+        else:
+            self._description = value
+
+    def __setattr__(self, name, value):
+        if name in Report.INTERNED:
+            value = _intern(value)
+        object.__setattr__(self, name, value)
+
+    # Dict-compatible accessors -------------------------------------------------
+
+    def __getitem__(self, key):
+        if key in Report.FIELDS:
+            return getattr(self, key)
+        if key in Report.OPTIONAL:
+            value = getattr(self, key)
+            if value is _UNSET:
+                raise KeyError(key)
+            return value
+        if self._extra and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in Report.FIELDS or key in Report.OPTIONAL:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __contains__(self, key):
+        if key in Report.OPTIONAL:
+            return getattr(self, key) is not _UNSET
+        return key in Report.FIELDS or bool(self._extra and key in self._extra)
+
+    def get(self, key, default=None):
+        try:
+            value = self[key]
+        except KeyError:
+            return default
+        # Unset slots behave like missing keys so callers' defaults apply
+        return default if value is None else value
+
+    def keys(self):
+        optional = [name for name in Report.OPTIONAL if getattr(self, name) is not _UNSET]
+        return list(Report.FIELDS) + optional + list(self._extra or ())
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def __repr__(self):
+        return f"Report(id={self.id!r}, title={self.title!r}, status={self.status!r})"
+
+
+def _intern(value):
+    """Intern strings so identical labels share one object across records."""
+    return sys.intern(value) if isinstance(value, str) else value
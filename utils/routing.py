@@ -0,0 +1,200 @@
+"""
+Route planning for NagarNirman field crews
+Splits open reports into geographic batches that fit each volunteer's
+capacity (k-means over the stored coordinates, with capacities enforced
+at every assignment step) and orders each batch into a route: nearest
+neighbour, then 2-opt. Plain numpy over projected coordinates, so a
+division's worth of reports plans in well under a second.
+"""
+
+import time
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def project(lat, lon):
+    """Equirectangular x/y in km around the points' mean latitude; accurate at division scale."""
+    lat, lon = np.radians(np.asarray(lat, dtype=np.float64)), np.radians(np.asarray(lon, dtype=np.float64))
+    scale = np.cos(lat.mean()) if len(lat) else 1.0
+    return np.column_stack((lon * scale, lat)) * EARTH_RADIUS_KM
+
+
+def _distances(a, b):
+    squared = (a ** 2).sum(axis=1)[:, None] + (b ** 2).sum(axis=1)[None, :] - 2 * a @ b.T
+    return np.sqrt(np.maximum(squared, 0))
+
+
+def _seed_centres(xy, k, rng):
+    """k-means++ seeding."""
+    centres = [xy[rng.integers(len(xy))]]
+    nearest = ((xy - centres[0]) ** 2).sum(axis=1)
+    for _ in range(1, k):
+        total = nearest.sum()
+        pick = rng.choice(len(xy), p=nearest / total) if total > 0 else rng.integers(len(xy))
+        centres.append(xy[pick])
+        nearest = np.minimum(nearest, ((xy - xy[pick]) ** 2).sum(axis=1))
+    return np.array(centres)
+
+
+def _assign(xy, centres, capacities, choices=8):
+    """
+    Give every point to the nearest centre with room left. Points whose
+    nearest centre is much closer than their second choice go first, so
+    capacity is spent where switching would cost the most. Only each
+    point's `choices` nearest centres are ranked up front; a point finding
+    them all full falls back to the rest in order.
+    """
+    d = _distances(xy, centres)
+    k = d.shape[1]
+    choices = min(choices, k)
+    near = np.argpartition(d, choices - 1, axis=1)[:, :choices] if choices < k else np.argsort(d, axis=1)
+    ranked = np.take_along_axis(d, near, axis=1)
+    order = np.argsort(ranked, axis=1)
+    near, ranked = np.take_along_axis(near, order, axis=1), np.take_along_axis(ranked, order, axis=1)
+    regret = ranked[:, 1] - ranked[:, 0] if k > 1 else -ranked[:, 0]
+    room = [int(c) for c in capacities]
+    labels = np.full(len(xy), -1, dtype=np.int64)
+    preferences = near.tolist()
+    for i in np.argsort(-regret, kind="stable").tolist():
+        for centre in preferences[i]:
+            if room[centre] > 0:
+                break
+        else:
+            centre = next((c for c in np.argsort(d[i]).tolist() if room[c] > 0), None)
+            if centre is None:
+                continue
+        labels[i] = centre
+        room[centre] -= 1
+    return labels
+
+
+def cluster(xy, capacities, iterations=12, seed=0):
+    """
+    Batch points for volunteers with the given capacities.
+
+    Returns:
+        numpy.ndarray: the volunteer index of each point, or -1 for points
+        beyond the total capacity (pass the highest-priority points first
+        and size the list to fit, so none are left over).
+    """
+    n, k = len(xy), len(capacities)
+    if n == 0 or k == 0:
+        return np.full(n, -1, dtype=np.int64)
+    rng = np.random.default_rng(seed)
+    centres = _seed_centres(xy, min(k, n), rng)
+    if len(centres) < k:
+        # More volunteers than points: the spare ones get nothing
+        centres = np.vstack([centres, np.repeat(centres[:1], k - len(centres), axis=0)])
+    labels = _assign(xy, centres, capacities)
+    for _ in range(iterations):
+        placed = labels >= 0
+        sizes = np.bincount(labels[placed], minlength=k)
+        for axis in (0, 1):
+            sums = np.bincount(labels[placed], weights=xy[placed, axis], minlength=k)
+            centres[:, axis] = np.where(sizes > 0, sums / np.maximum(sizes, 1), centres[:, axis])
+        relabelled = _assign(xy, centres, capacities)
+        if np.array_equal(relabelled, labels):
+            break
+        labels = relabelled
+    return labels
+
+
+def route_length(xy, order):
+    if len(order) < 2:
+        return 0.0
+    path = xy[np.asarray(order)]
+    return float(np.sqrt(((path[1:] - path[:-1]) ** 2).sum(axis=1)).sum())
+
+
+def nearest_neighbour(xy, start=None):
+    """Visit order that always walks to the closest unvisited point, from `start` (default: an outermost point)."""
+    n = len(xy)
+    if n == 0:
+        return []
+    d = _distances(xy, xy)
+    if start is None:
+        start = int(np.argmax(((xy - xy.mean(axis=0)) ** 2).sum(axis=1)))
+    order, visited = [start], np.zeros(n, dtype=bool)
+    visited[start] = True
+    for _ in range(n - 1):
+        row = np.where(visited, np.inf, d[order[-1]])
+        order.append(int(np.argmin(row)))
+        visited[order[-1]] = True
+    return order
+
+
+def two_opt(xy, order, deadline=None, max_passes=50):
+    """
+    Improve an open route by reversing segments while that shortens it.
+
+    The route is closed through a dummy stop at distance zero from every
+    point, so the classic tour move also moves the route's ends. Each pass
+    scores every move from one position at once; stops after a pass with no
+    improvement, `max_passes`, or at `deadline` (time.perf_counter()).
+    """
+    n = len(order)
+    if n < 3:
+        return list(order)
+    d = np.zeros((n + 1, n + 1))
+    d[:n, :n] = _distances(xy, xy)
+    tour = np.array(list(order) + [n])
+    size = n + 1
+    for _ in range(max_passes):
+        improved = False
+        for i in range(size - 2):
+            a, b = tour[i], tour[i + 1]
+            j = np.arange(i + 2, size if i else size - 1)
+            c, e = tour[j], tour[(j + 1) % size]
+            gain = d[a, b] + d[c, e] - d[a, c] - d[b, e]
+            best = int(np.argmax(gain))
+            if gain[best] > 1e-9:
+                tour[i + 1:j[best] + 1] = tour[i + 1:j[best] + 1][::-1].copy()
+                improved = True
+        if not improved or (deadline is not None and time.perf_counter() > deadline):
+            break
+    # Open the tour at the dummy stop
+    at = int(np.flatnonzero(tour == n)[0])
+    return np.concatenate((tour[at + 1:], tour[:at])).tolist()
+
+
+def plan_routes(stops, volunteers, budget_seconds=5.0, seed=0):
+    """
+    Batch and order stops for a crew of volunteers.
+
+    Args:
+        stops: (report id, lat, lon) of each report to visit, most urgent
+            first; anything beyond the crew's total capacity is left over.
+        volunteers: (name, capacity) of each volunteer.
+        budget_seconds: time after which 2-opt stops improving routes.
+
+    Returns:
+        dict: {"routes": [{"volunteer", "stops": [report ids in visit
+        order], "path": [[lon, lat] of each stop], "km",
+        "nearest_neighbour_km"}], "unassigned": [report ids], "seconds"}.
+    """
+    began = time.perf_counter()
+    capacities = [max(int(capacity), 0) for _, capacity in volunteers]
+    stops = list(stops)
+    leftover = [s[0] for s in stops[sum(capacities):]]
+    stops = stops[:sum(capacities)]
+    ids = np.array([s[0] for s in stops], dtype=np.int64)
+    lonlat = np.array([(s[2], s[1]) for s in stops], dtype=np.float64).reshape(-1, 2)
+    xy = project(lonlat[:, 1], lonlat[:, 0])
+    labels = cluster(xy, capacities, seed=seed)
+    deadline = began + budget_seconds
+    routes = []
+    for c, (name, _) in enumerate(volunteers):
+        members = np.flatnonzero(labels == c)
+        first = nearest_neighbour(xy[members])
+        order = two_opt(xy[members], first, deadline)
+        routes.append({
+            "volunteer": name,
+            "stops": ids[members][order].tolist(),
+            "path": lonlat[members][order].tolist(),
+            "km": round(route_length(xy[members], order), 2),
+            "nearest_neighbour_km": round(route_length(xy[members], first), 2),
+        })
+    return {"routes": routes, "unassigned": ids[labels == -1].tolist() + leftover,
+            "seconds": time.perf_counter() - began}
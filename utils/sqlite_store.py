@@ -0,0 +1,212 @@
+"""
+Shared SQLite report store for NagarNirman
+Lets several Streamlit server processes serve the same reports. Every
+write updates the reports table and appends to a change log in a single
+transaction; the change log's sequence number is the store version.
+Each process keeps a read cache of all reports tagged with the version it
+reflects and brings it up to date from the change log instead of
+re-reading the table. Sessions sync from the same log, so it replaces the
+in-process ChangeFeed (same latest / since / publish interface).
+"""
+
+import json
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id INTEGER PRIMARY KEY,
+    division TEXT,
+    body TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS reports_division ON reports(division);
+CREATE TABLE IF NOT EXISTS changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    body TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def _dumps(data):
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+class SQLiteStore:
+    """Reports plus change log in one SQLite database (WAL mode)."""
+
+    # Change-log entries kept; workers further behind reload everything
+    RETENTION = 10_000
+
+    def __init__(self, path):
+        self.path = path
+        # One connection per process, shared by Streamlit's script threads
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._lock = threading.RLock()
+        # (version, {id: report dict}) for every report in the store
+        self._cache = None
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.executescript(SCHEMA)
+
+    # Change log --------------------------------------------------------------
+
+    @property
+    def latest(self):
+        """Store version: sequence number of the newest change (0 if none)."""
+        with self._lock:
+            return self._db.execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()[0]
+
+    def since(self, seq):
+        """
+        Get the changes after `seq`, from any process.
+
+        Returns:
+            tuple: (events: list | None, latest: int). events is None when
+            `seq` is older than the retained log and the caller must reload.
+        """
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                latest, oldest = self._db.execute("SELECT COALESCE(MAX(seq), 0), MIN(seq) FROM changes").fetchone()
+                if seq >= latest:
+                    return [], latest
+                if oldest is None or oldest > seq + 1:
+                    return None, latest
+                rows = self._db.execute("SELECT body FROM changes WHERE seq > ? ORDER BY seq", (seq,)).fetchall()
+                return [json.loads(body) for (body,) in rows], latest
+            finally:
+                self._db.execute("COMMIT")
+
+    def publish(self, kind, data):
+        """Apply a change to the reports table and log it; returns its sequence number."""
+        return self.publish_many([(kind, data)])
+
+    def publish_many(self, changes):
+        """Apply and log several (kind, data) changes in one transaction."""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                first = None
+                for kind, data in changes:
+                    self._apply(kind, data)
+                    seq = self._db.execute("INSERT INTO changes (body) VALUES (?)",
+                                           (_dumps({"kind": kind, **data}),)).lastrowid
+                    first = seq if first is None else first
+                # Prune each time the log crosses a multiple of 1000, however big the batch
+                if (first - 1) // 1000 != seq // 1000:
+                    self._db.execute("DELETE FROM changes WHERE seq <= ?", (seq - SQLiteStore.RETENTION,))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return seq
+
+    def _apply(self, kind, data):
+        if kind == 'add':
+            report = data['report']
+            self._db.execute("INSERT OR REPLACE INTO reports (id, division, body) VALUES (?, ?, ?)",
+                             (report['id'], report.get('division'), _dumps(report)))
+        elif kind == 'status':
+            row = self._db.execute("SELECT body FROM reports WHERE id = ?", (data['id'],)).fetchone()
+            if row is not None:
+                report = json.loads(row[0])
+                report['status'] = data['status']
+                report['resolved_at'] = data.get('resolved_at')
+                self._db.execute("UPDATE reports SET body = ? WHERE id = ?", (_dumps(report), data['id']))
+        elif kind == 'archive':
+            self._db.executemany("DELETE FROM reports WHERE id = ?", [(i,) for i in data['ids']])
+
+    # Reports -----------------------------------------------------------------
+
+    def is_empty(self):
+        with self._lock:
+            return self._db.execute(
+                "SELECT NOT EXISTS (SELECT 1 FROM reports) AND NOT EXISTS (SELECT 1 FROM counters)"
+            ).fetchone()[0] == 1
+
+    def replace_all(self, reports):
+        """Replace every report (import or restore); logged as one reload-forcing change."""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.execute("DELETE FROM reports")
+                self._db.executemany("INSERT INTO reports (id, division, body) VALUES (?, ?, ?)",
+                                     [(r['id'], r.get('division'), _dumps(r)) for r in reports])
+                next_id = max((r['id'] for r in reports), default=0) + 1
+                self._db.execute("INSERT INTO counters (name, value) VALUES ('next_id', ?) "
+                                 "ON CONFLICT(name) DO UPDATE SET value = MAX(value, excluded.value)", (next_id,))
+                # Drop the log so every worker falls out of it and reloads
+                self._db.execute("DELETE FROM changes")
+                self._db.execute("INSERT INTO changes (body) VALUES (?)", (_dumps({"kind": "reload"}),))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def allocate_id(self, floor=None):
+        """
+        Take the next report id from the counter shared by every process.
+
+        Args:
+            floor: callable giving the highest id used outside this store
+                (e.g. archived reports), consulted only if the counter is missing.
+        """
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute("SELECT value FROM counters WHERE name = 'next_id'").fetchone()
+                if row is None:
+                    highest = self._db.execute("SELECT COALESCE(MAX(id), 0) FROM reports").fetchone()[0]
+                    next_id = max(highest, floor() if floor else 0) + 1
+                else:
+                    next_id = row[0]
+                self._db.execute("INSERT INTO counters (name, value) VALUES ('next_id', ?) "
+                                 "ON CONFLICT(name) DO UPDATE SET value = excluded.value", (next_id + 1,))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return next_id
+
+    def load(self, divisions=None):
+        """All reports (or only `divisions`'), in id order, from the process read cache."""
+        with self._lock:
+            cache = self._refresh()
+        reports = [cache[k] for k in sorted(cache)]
+        if divisions is not None:
+            reports = [r for r in reports if r.get('division') in divisions]
+        return reports
+
+    def _refresh(self):
+        """Bring the read cache up to the current version; returns {id: report}."""
+        if self._cache is not None:
+            version, cache = self._cache
+            events, latest = self.since(version)
+            if events is not None and not any(e['kind'] == 'reload' for e in events):
+                for event in events:
+                    if event['kind'] == 'add':
+                        cache[event['report']['id']] = event['report']
+                    elif event['kind'] == 'status' and event['id'] in cache:
+                        cache[event['id']] = dict(cache[event['id']], status=event['status'],
+                                                  resolved_at=event.get('resolved_at'))
+                    elif event['kind'] == 'archive':
+                        for report_id in event['ids']:
+                            cache.pop(report_id, None)
+                self._cache = (latest, cache)
+                return cache
+
+        # Cold cache or fell out of the log: read the table and its version together
+        self._db.execute("BEGIN")
+        try:
+            rows = self._db.execute("SELECT id, body FROM reports").fetchall()
+            latest = self._db.execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()[0]
+        finally:
+            self._db.execute("COMMIT")
+        cache = {report_id: json.loads(body) for report_id, body in rows}
+        self._cache = (latest, cache)
+        return cache
@@ -0,0 +1,130 @@
+"""
+JSON store files for NagarNirman
+Crash-safe reads and writes for reports_db.json, users_db.json and
+sessions_db.json. Writes go to a temporary file that is fsynced and then
+renamed over the original, so a crash leaves either the old or the new
+contents, never a truncated file. Report partitions can also be written in
+a compact or binary format (see utils/codec.py); reads detect the format.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: a single server process, where STORE_LOCK is enough
+    fcntl = None
+
+from utils.codec import CodecError, dumps, loads
+
+# Held while a store file is replaced, so a backup never sees one store
+# updated and another not yet written for the same change.
+STORE_LOCK = threading.RLock()
+
+
+@contextmanager
+def process_lock(path, blocking=True):
+    """
+    Hold an exclusive lock on the file `path` across server processes
+    (several SQLite-backend workers share one set of files) for the
+    with-block. Yields False, without waiting, if `blocking` is False and
+    another process holds it. Not reentrant, even within one process.
+    """
+    if fcntl is None:
+        yield True
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'a') as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class CorruptStoreError(Exception):
+    """A store file exists but cannot be parsed."""
+
+
+def write_json(path, data, fsync=True):
+    """
+    Atomically replace `path` with `data` serialised as JSON.
+
+    With fsync=False the new contents survive a process crash but not
+    necessarily a power loss until fsync_paths() is called on `path`.
+    """
+    write_store(path, data, "pretty", fsync=fsync)
+
+
+def write_store(path, data, fmt="json", compression="none", fsync=True):
+    """Like write_json(), in any codec format and compression."""
+    payload = dumps(data, fmt, compression)
+    tmp = f"{path}.tmp"
+    with STORE_LOCK:
+        with open(tmp, 'wb') as f:
+            f.write(payload)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+        if fsync:
+            _fsync_dir(os.path.dirname(os.path.abspath(path)))
+
+
+def fsync_paths(paths):
+    """Flush files written with fsync=False, and their directories, to disk."""
+    for path in paths:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    for directory in {os.path.dirname(os.path.abspath(path)) for path in paths}:
+        _fsync_dir(directory)
+
+
+def _fsync_dir(path):
+    # Persist the rename itself; not supported on every platform
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def read_json(path, default):
+    """
+    Read a store file, in whatever format write_store() wrote it.
+
+    Returns `default` if the file does not exist and raises
+    CorruptStoreError if it exists but cannot be decoded.
+    """
+    if not os.path.exists(path):
+        return default
+    with open(path, 'rb') as f:
+        raw = f.read()
+    try:
+        return loads(raw)
+    except CodecError as e:
+        raise CorruptStoreError(f"{path}: {e}") from e
+
+
+def quarantine(path):
+    """Move a corrupt store file aside so it is never overwritten; returns the new path."""
+    target = f"{path}.corrupt-{time.strftime('%Y%m%d-%H%M%S')}"
+    os.replace(path, target)
+    return target
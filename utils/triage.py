@@ -0,0 +1,465 @@
+"""
+Triage queue for NagarNirman
+Scores open reports for dispatch (category severity, time waiting, nearby
+duplicates and the district's backlog) and keeps the pending ones in
+indexed priority heaps, so the next reports to dispatch are found without
+rescoring or sorting the store, and a new report or status change costs
+O(log n).
+"""
+
+import heapq
+from datetime import date
+from math import floor
+
+EPOCH = date(1970, 1, 1)
+
+# Candidate kinds in TriageQueue.next(); a district sorts before its own top report
+_DISTRICT, _REPORT = 0, 1
+# Cell keys pack (category, lat cell, lon cell) into one int
+_CELL_BITS = 20
+_CELL_BIAS = 1 << 19
+# Offsets of the 3x3 block of cells around a cell key
+_NEIGHBOURS = tuple((dx << _CELL_BITS) + dy for dx in (-1, 0, 1) for dy in (-1, 0, 1))
+
+
+def _days(value):
+    """Days since the Unix epoch of a date or 'YYYY-MM-DD' string, or None."""
+    if isinstance(value, date):
+        return (value - EPOCH).days
+    try:
+        return (date.fromisoformat(str(value)[:10]) - EPOCH).days
+    except ValueError:
+        return None
+
+
+class IndexedHeap:
+    """
+    Binary min-heap of (key, item) entries with an item -> position index,
+    so any item's key can be changed, or the item removed, in O(log n).
+
+    Items must be hashable and unique. Keys must be unique as well (give
+    them a tie-breaker, e.g. the item), so entries never compare by item.
+    """
+
+    __slots__ = ("entries", "_pos")
+
+    def __init__(self, entries=(), ordered=False):
+        self.entries = list(entries)
+        if not ordered:
+            heapq.heapify(self.entries)
+        self._pos = {item: i for i, (_, item) in enumerate(self.entries)}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, item):
+        return item in self._pos
+
+    def peek(self):
+        """The (key, item) entry with the smallest key, or None."""
+        return self.entries[0] if self.entries else None
+
+    def key(self, item):
+        return self.entries[self._pos[item]][0]
+
+    def set(self, item, key):
+        """Insert `item` with `key`, or move it to `key` if it is already queued."""
+        i = self._pos.get(item)
+        if i is None:
+            i = self._pos[item] = len(self.entries)
+            self.entries.append((key, item))
+            self._up(i)
+            return
+        old = self.entries[i][0]
+        self.entries[i] = (key, item)
+        if key < old:
+            self._up(i)
+        else:
+            self._down(i)
+
+    def remove(self, item):
+        """Remove `item` if it is queued."""
+        i = self._pos.pop(item, None)
+        if i is None:
+            return
+        last = self.entries.pop()
+        if i < len(self.entries):
+            self.entries[i] = last
+            self._pos[last[1]] = i
+            self._up(i)
+            self._down(self._pos[last[1]])
+
+    def _up(self, i):
+        entries, pos = self.entries, self._pos
+        entry = entries[i]
+        while i:
+            parent = (i - 1) >> 1
+            if entries[parent] <= entry:
+                break
+            entries[i] = entries[parent]
+            pos[entries[i][1]] = i
+            i = parent
+        entries[i] = entry
+        pos[entry[1]] = i
+
+    def _down(self, i):
+        entries, pos = self.entries, self._pos
+        n = len(entries)
+        entry = entries[i]
+        while True:
+            child = 2 * i + 1
+            if child >= n:
+                break
+            if child + 1 < n and entries[child + 1] < entries[child]:
+                child += 1
+            if entry <= entries[child]:
+                break
+            entries[i] = entries[child]
+            pos[entries[i][1]] = i
+            i = child
+        entries[i] = entry
+        pos[entry[1]] = i
+
+
+class TriageQueue:
+    """
+    Dispatch priority of one session's open reports.
+
+    score = category severity + AGE_WEIGHT * days waiting
+            + DUPLICATE_WEIGHT * nearby duplicates (at most DUPLICATE_CAP)
+            + BACKLOG_WEIGHT * open reports in the district (at most BACKLOG_CAP)
+
+    Duplicates are the other open reports of the same category in the same
+    or an adjacent CELL_DEGREES grid cell. Every report ages at the same
+    rate, so the order doesn't change as days pass and the heaps hold keys
+    relative to the report date. The backlog term is the same for every
+    report of a district, so it is kept per district: each district has a
+    heap of its pending reports and a top heap orders the districts by
+    their best report plus that bonus. Only "Pending" reports are queued;
+    "In Progress" ones still count towards duplicates and backlog.
+    """
+
+    # category -> (severity points, SLA days to resolve)
+    POLICY = {
+        "Safety Issues": (10, 2),
+        "Lighting & Electrical": (9, 3),
+        "Environmental Hazards": (8, 3),
+        "Water Supply & Leakage": (7, 5),
+        "Health & Hygiene": (6, 5),
+        "Road & Infrastructure Issues": (6, 7),
+        "Garbage & Sanitation": (5, 3),
+        "Transport": (4, 10),
+        "Public Facilities": (3, 14),
+        "Other (General/Custom)": (2, 14),
+    }
+    DEFAULT_POLICY = (2, 14)
+    # Weights are multiples of powers of two, so keys adjusted in place by
+    # bonus differences stay exactly equal to keys scored from scratch
+    # A point per 16 days waiting: old reports climb without a year-old
+    # bench outranking a live flood
+    AGE_WEIGHT = 1 / 16
+    DUPLICATE_WEIGHT = 2
+    # Capped so a flooded street doesn't bury every other district, and so
+    # a new report only rescores the few reports of sparse nearby cells
+    DUPLICATE_CAP = 6
+    CELL_DEGREES = 0.0025  # about 250 m
+    BACKLOG_WEIGHT = 1 / 32
+    BACKLOG_CAP = 160
+    QUEUED = "Pending"
+
+    def __init__(self):
+        self.categories = []
+        self._category_index = {}
+        # (division, district) -> index into the lists below
+        self._district_index = {}
+        self.districts = []
+        self.backlog = []
+        self._heaps = []
+        # District index -> its best (key, report id), offset by the backlog bonus
+        self._top = IndexedHeap()
+        # Queued report id -> district index
+        self._queued = {}
+        # Open report ids per cell: sorted (cell, id) arrays from the bulk
+        # build, and the cells changed since then as sets
+        self._cell_keys = ()
+        self._cell_ids = ()
+        self._cells = {}
+        # Open reports per cell, for the cells looked up so far
+        self._counts = {}
+        # Bumped on every change, like DistrictCounts.version
+        self.version = 0
+
+    @classmethod
+    def from_columns(cls, columns, today=None):
+        """Score and queue the open reports of a ReportColumns snapshot in bulk."""
+        import numpy as np
+        queue = cls()
+        n = columns.size
+        today = _days(today or date.today())
+        resolved = columns.categories["status"].codes.get("Resolved", -2)
+        open_rows = np.flatnonzero(columns.codes["status"][:n] != resolved)
+        ids = columns.id[:n][open_rows].astype(np.int64)
+
+        # Category and district of each open report, as queue indexes; a
+        # missing label is coded -1, which wraps around to the trailing None
+        category_of = np.array([queue._category(label) for label in columns.categories["category"].labels + [None]],
+                               dtype=np.int64)
+        categories = category_of[columns.codes["category"][:n][open_rows]]
+        division_labels = columns.categories["division"].labels + [None]
+        district_labels = columns.categories["district"].labels + [None]
+        width = len(district_labels)
+        pairs = (columns.codes["division"][:n][open_rows].astype(np.int64) % len(division_labels)) * width \
+            + columns.codes["district"][:n][open_rows].astype(np.int64) % width
+        unique_pairs, pair_rows = np.unique(pairs, return_inverse=True)
+        district_of = np.array([queue._district(division_labels[p // width], district_labels[p % width])
+                                for p in unique_pairs.tolist()], dtype=np.int64)
+        districts = district_of[pair_rows.reshape(-1)] if len(ids) else np.zeros(0, dtype=np.int64)
+        queue.backlog = np.bincount(districts, minlength=len(queue.districts)).tolist()
+
+        # Open reports per cell, and for each report the open reports of its 3x3 block
+        lat = columns.lat[:n][open_rows].astype(np.float64)
+        lon = columns.lon[:n][open_rows].astype(np.float64)
+        placed = (lat != 0) | (lon != 0)
+        cells = np.full(len(ids), -1, dtype=np.int64)
+        cells[placed] = cls._cell_keys_of(categories[placed], lat[placed], lon[placed], np)
+        order = np.lexsort((ids[placed], cells[placed]))
+        queue._cell_keys = cells[placed][order]
+        queue._cell_ids = ids[placed][order]
+        unique_cells, cell_counts = np.unique(queue._cell_keys, return_counts=True)
+        block = np.zeros(len(unique_cells), dtype=np.int64)
+        for offset in _NEIGHBOURS:
+            at = np.searchsorted(unique_cells, unique_cells + offset).clip(max=max(len(unique_cells) - 1, 0))
+            if len(unique_cells):
+                block += np.where(unique_cells[at] == unique_cells + offset, cell_counts[at], 0)
+        duplicates = np.zeros(len(ids), dtype=np.int64)
+        duplicates[np.flatnonzero(placed)[order]] = np.repeat(block, cell_counts) - 1
+
+        # Pending reports, sorted by district and key: each district's run
+        # is already a valid heap
+        severity = np.array([queue._policy(c)[0] for c in queue.categories] or [0], dtype=np.float64)
+        dates = columns.date[:n][open_rows].astype(np.int64)
+        dates[dates == 0] = today
+        own = severity[categories] + cls.DUPLICATE_WEIGHT * np.minimum(duplicates, cls.DUPLICATE_CAP) \
+            - cls.AGE_WEIGHT * dates
+        pending = columns.codes["status"][:n][open_rows] == columns.categories["status"].codes.get(cls.QUEUED, -2)
+        order = np.lexsort((ids[pending], -own[pending], districts[pending]))
+        keys, queued, where = (-own[pending])[order].tolist(), ids[pending][order].tolist(), \
+            districts[pending][order].tolist()
+        queue._queued = dict(zip(queued, where))
+        bounds = np.searchsorted(districts[pending][order], np.arange(len(queue.districts) + 1)).tolist()
+        entries = list(zip(zip(keys, queued), queued))
+        queue._heaps = [IndexedHeap(entries[bounds[d]:bounds[d + 1]], ordered=True) for d in range(len(queue.districts))]
+        for d in range(len(queue.districts)):
+            queue._refresh(d)
+        return queue
+
+    @classmethod
+    def _cell_keys_of(cls, categories, lat, lon, np):
+        rows = np.floor(lat / cls.CELL_DEGREES).astype(np.int64) + _CELL_BIAS
+        cols = np.floor(lon / cls.CELL_DEGREES).astype(np.int64) + _CELL_BIAS
+        return (categories << (2 * _CELL_BITS)) | (rows << _CELL_BITS) | cols
+
+    def _cell_of(self, report):
+        """Cell key of an open report, or None if it has no coordinates."""
+        # Rounded through float32 like the columnar snapshot, so a report
+        # lands in the cell the bulk build put it in
+        import numpy as np
+        lat, lon = float(np.float32(report.get('lat') or 0.0)), float(np.float32(report.get('lon') or 0.0))
+        if lat == 0 and lon == 0:
+            return None
+        rows = floor(lat / self.CELL_DEGREES) + _CELL_BIAS
+        cols = floor(lon / self.CELL_DEGREES) + _CELL_BIAS
+        return (self._category(report.get('category')) << (2 * _CELL_BITS)) | (rows << _CELL_BITS) | cols
+
+    def _category(self, category):
+        i = self._category_index.get(category)
+        if i is None:
+            i = self._category_index[category] = len(self.categories)
+            self.categories.append(category)
+        return i
+
+    def _district(self, division, district):
+        key = (division, district)
+        i = self._district_index.get(key)
+        if i is None:
+            i = self._district_index[key] = len(self.districts)
+            self.districts.append(key)
+            self.backlog.append(0)
+            self._heaps.append(IndexedHeap())
+        return i
+
+    def _policy(self, category):
+        return self.POLICY.get(category, self.DEFAULT_POLICY)
+
+    def _members(self, cell):
+        members = self._cells.get(cell)
+        if members is not None:
+            return members
+        if not len(self._cell_keys):
+            return ()
+        lo, hi = self._cell_keys.searchsorted(cell), self._cell_keys.searchsorted(cell, side="right")
+        return self._cell_ids[lo:hi].tolist()
+
+    def _count(self, cell):
+        count = self._counts.get(cell)
+        if count is None:
+            if len(self._cell_keys):
+                count = int(self._cell_keys.searchsorted(cell, side="right") - self._cell_keys.searchsorted(cell))
+            else:
+                count = 0
+            self._counts[cell] = count
+        return count
+
+    def _duplicates(self, cell):
+        """Open reports in the 3x3 block around `cell`, other than the one in question."""
+        if cell is None:
+            return 0
+        return sum(self._count(cell + offset) for offset in _NEIGHBOURS) - 1
+
+    def _duplicate_bonus(self, duplicates):
+        return self.DUPLICATE_WEIGHT * min(max(duplicates, 0), self.DUPLICATE_CAP)
+
+    def _backlog_bonus(self, d):
+        return self.BACKLOG_WEIGHT * min(self.backlog[d], self.BACKLOG_CAP)
+
+    def _own(self, report, cell):
+        """Score of a report without the backlog bonus and relative to its date."""
+        day = _days(report.get('date'))
+        day = _days(date.today()) if day is None else day
+        return (self._policy(report.get('category'))[0] + self._duplicate_bonus(self._duplicates(cell))
+                - self.AGE_WEIGHT * day)
+
+    def _refresh(self, d):
+        """Re-key district `d` in the top heap after its best report or backlog changed."""
+        best = self._heaps[d].peek()
+        if best is None:
+            self._top.remove(d)
+        else:
+            self._top.set(d, (best[0][0] - self._backlog_bonus(d), best[0][1]))
+
+    def _move(self, report_id, cell, delta):
+        """
+        Add (delta 1) or remove (-1) an open report's cell membership and
+        rescore the queued reports whose duplicate count crossed the cap.
+        """
+        members = self._cells.get(cell)
+        if members is None:
+            members = self._cells[cell] = set(self._members(cell))
+        if delta > 0:
+            members.add(report_id)
+        else:
+            members.discard(report_id)
+        self._counts[cell] = len(members)
+        touched = set()
+        for offset in _NEIGHBOURS:
+            neighbour = cell + offset
+            after = self._duplicates(neighbour)
+            bonus, old_bonus = self._duplicate_bonus(after), self._duplicate_bonus(after - delta)
+            if bonus == old_bonus:
+                continue
+            for member in self._members(neighbour):
+                d = self._queued.get(member)
+                if d is None or member == report_id:
+                    continue
+                heap = self._heaps[d]
+                key = heap.key(member)
+                heap.set(member, (key[0] - (bonus - old_bonus), member))
+                touched.add(d)
+        for d in touched:
+            self._refresh(d)
+
+    def _open(self, report):
+        d = self._district(report.get('division'), report.get('district'))
+        self.backlog[d] += 1
+        cell = self._cell_of(report)
+        if cell is not None:
+            self._move(report['id'], cell, 1)
+        if report['status'] == self.QUEUED:
+            self._queue(report, d, cell)
+        self._refresh(d)
+
+    def _close(self, report):
+        d = self._district(report.get('division'), report.get('district'))
+        self.backlog[d] -= 1
+        self._dequeue(report['id'])
+        cell = self._cell_of(report)
+        if cell is not None:
+            self._move(report['id'], cell, -1)
+        self._refresh(d)
+
+    def _queue(self, report, d, cell):
+        self._queued[report['id']] = d
+        self._heaps[d].set(report['id'], (-self._own(report, cell), report['id']))
+
+    def _dequeue(self, report_id):
+        d = self._queued.pop(report_id, None)
+        if d is not None:
+            self._heaps[d].remove(report_id)
+            self._refresh(d)
+
+    def add(self, report):
+        if report['status'] != "Resolved":
+            self._open(report)
+            self.version += 1
+
+    def set_status(self, report, old_status):
+        """Account for a report whose status changed from `old_status` to report['status']."""
+        was_open, is_open = old_status != "Resolved", report['status'] != "Resolved"
+        if was_open and not is_open:
+            self._close(report)
+        elif is_open and not was_open:
+            self._open(report)
+        elif is_open and (report['status'] == self.QUEUED) != (report['id'] in self._queued):
+            d = self._district(report.get('division'), report.get('district'))
+            if report['status'] == self.QUEUED:
+                self._queue(report, d, self._cell_of(report))
+                self._refresh(d)
+            else:
+                self._dequeue(report['id'])
+        else:
+            return
+        self.version += 1
+
+    def __len__(self):
+        return len(self._queued)
+
+    def next(self, k, today=None, division=None):
+        """
+        The k queued reports to dispatch first, as (report id, score) pairs,
+        highest score first (ties go to the older id), optionally only those
+        of one division. Walks the heaps without popping them, in O(k log k)
+        plus the districts passed over.
+        """
+        aged = self.AGE_WEIGHT * _days(today or date.today())
+        top, out = self._top.entries, []
+        candidates = [(top[0][0], _DISTRICT, 0, None)] if top else []
+        while candidates and len(out) < k:
+            key, kind, i, d = heapq.heappop(candidates)
+            if kind == _DISTRICT:
+                for child in (2 * i + 1, 2 * i + 2):
+                    if child < len(top):
+                        heapq.heappush(candidates, (top[child][0], _DISTRICT, child, None))
+                # The district's key is its best report's key, so that comes next
+                if division is None or self.districts[top[i][1]][0] == division:
+                    heapq.heappush(candidates, (key, _REPORT, 0, top[i][1]))
+                continue
+            out.append((key[1], aged - key[0]))
+            entries, bonus = self._heaps[d].entries, self._backlog_bonus(d)
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < len(entries):
+                    own, report_id = entries[child][0]
+                    heapq.heappush(candidates, ((own - bonus, report_id), _REPORT, child, d))
+        return out
+
+    def explain(self, report, today=None):
+        """Score breakdown of an open report, with its SLA (days left; negative when overdue)."""
+        severity, sla_days = self._policy(report.get('category'))
+        day = _days(report.get('date'))
+        age = max(_days(today or date.today()) - day, 0) if day is not None else 0
+        duplicates = max(self._duplicates(self._cell_of(report)), 0)
+        d = self._district_index.get((report.get('division'), report.get('district')))
+        backlog = self.backlog[d] if d is not None else 0
+        score = (severity + self.AGE_WEIGHT * age + self._duplicate_bonus(duplicates)
+                 + self.BACKLOG_WEIGHT * min(backlog, self.BACKLOG_CAP))
+        return {"score": score, "severity": severity, "age_days": age, "duplicates": duplicates,
+                "backlog": backlog, "sla_days": sla_days, "sla_left": sla_days - age}
@@ -1,6 +1,8 @@
 import streamlit as st
 import os
 import textwrap
+from utils.data_manager import DataManager
+from utils.profiler import Profiler
 
 class UIManager:
     @staticmethod
@@ -20,6 +22,7 @@ class UIManager:
         return st.session_state.get('theme', 'dark')
     
     @staticmethod
+    @Profiler.timed("UIManager.load_css")
     def load_css(file_path="assets/style.css"):
         """Loads custom CSS and handles theme switching via direct variable injection."""
         theme = UIManager.get_theme()
@@ -85,10 +88,7 @@ class UIManager:
             """
 
         # Load base CSS from file
-        base_css = ""
-        if os.path.exists(file_path):
-            with open(file_path) as f:
-                base_css = f.read()
+        base_css = UIManager._read_text_file(file_path)
         
         # Session Persistence JS
         # This script syncs the session token to/from localStorage
@@ -145,6 +145,7 @@ class UIManager:
 
     
     @staticmethod
+    @Profiler.timed("UIManager.render_navbar")
     def render_navbar():
         """Renders the top navigation bar with Boss Level styling."""
         from utils.auth_manager import AuthManager
@@ -217,39 +218,37 @@ class UIManager:
                     curr_col = 0
 
                 # 1. Home (Always visible)
-                if nav_cols[curr_col].button("🏠 Home", use_container_width=True, key="nav_home",
-                                     type="primary" if st.session_state.current_page == "home" else "secondary"):
-                    st.session_state.current_page = "home"
-                    st.rerun()
+                nav_cols[curr_col].button("🏠 Home", use_container_width=True, key="nav_home",
+                                     type="primary" if st.session_state.current_page == "home" else "secondary",
+                                     on_click=UIManager.go_to, args=("home",))
                 curr_col += 1
 
                 # 1b. About (Always visible)
-                if nav_cols[curr_col].button("ℹ️ About", use_container_width=True, key="nav_about",
-                                     type="primary" if st.session_state.current_page == "about" else "secondary"):
-                    st.session_state.current_page = "about"
-                    st.rerun()
+                nav_cols[curr_col].button("ℹ️ About", use_container_width=True, key="nav_about",
+                                     type="primary" if st.session_state.current_page == "about" else "secondary",
+                                     on_click=UIManager.go_to, args=("about",))
                 curr_col += 1
                 
                 # 2. User-specific Routes (Only for non-admin users)
                 if is_auth and not is_admin:
-                    if nav_cols[curr_col].button("📢 Make Report", use_container_width=True, key="nav_report",
-                                         type="primary" if st.session_state.current_page == "submit_report" else "secondary"):
-                        st.session_state.current_page = "submit_report"
-                        st.rerun()
+                    nav_cols[curr_col].button("📢 Make Report", use_container_width=True, key="nav_report",
+                                         type="primary" if st.session_state.current_page == "submit_report" else "secondary",
+                                         on_click=UIManager.go_to, args=("submit_report",))
                     curr_col += 1
                     
-                    if nav_cols[curr_col].button("📋 My Reports", use_container_width=True, key="nav_my",
-                                         type="primary" if st.session_state.current_page == "my_reports" else "secondary"):
-                        st.session_state.current_page = "my_reports"
-                        st.rerun()
+                    # Status changes to the user's reports they haven't seen yet
+                    unread = DataManager.count_unread_notifications(AuthManager.get_current_user().get('username'))
+                    nav_cols[curr_col].button(f"📋 My Reports ({unread})" if unread else "📋 My Reports",
+                                         use_container_width=True, key="nav_my",
+                                         type="primary" if st.session_state.current_page == "my_reports" else "secondary",
+                                         on_click=UIManager.go_to, args=("my_reports",))
                     curr_col += 1
 
                 # 3. Admin Route
                 if is_admin:
-                    if nav_cols[curr_col].button("🛡️ Admin Dashboard", use_container_width=True, key="nav_admin",
-                                         type="primary" if st.session_state.current_page == "admin" else "secondary"):
-                        st.session_state.current_page = "admin"
-                        st.rerun()
+                    nav_cols[curr_col].button("🛡️ Admin Dashboard", use_container_width=True, key="nav_admin",
+                                         type="primary" if st.session_state.current_page == "admin" else "secondary",
+                                         on_click=UIManager.go_to, args=("admin",))
 
             with col_auth:
                 right_cols = st.columns([1.5, 0.7, 1.2])
@@ -257,28 +256,22 @@ class UIManager:
                 # Theme toggle
                 current_theme = UIManager.get_theme()
                 theme_icon = "🌙" if current_theme == "light" else "☀️"
-                if right_cols[1].button(theme_icon, use_container_width=True, key="theme_toggle"):
-                    UIManager.toggle_theme()
-                    st.rerun()
+                right_cols[1].button(theme_icon, use_container_width=True, key="theme_toggle",
+                                     on_click=UIManager.toggle_theme)
 
                 if not AuthManager.is_authenticated():
-                    if right_cols[0].button("🔐", use_container_width=True, key="nav_login", help="Login"):
-                        st.session_state.current_page = "login"
-                        st.rerun()
+                    right_cols[0].button("🔐", use_container_width=True, key="nav_login", help="Login",
+                                         on_click=UIManager.go_to, args=("login",))
                 else:
                     user = AuthManager.get_current_user()
                     username = user.get("full_name", user.get("username", "User"))
                     
-                    if right_cols[0].button(f"👤 {username}", use_container_width=True, key="profile_btn", 
-                                            type="primary" if st.session_state.get('show_profile') else "secondary"):
-                        st.session_state.show_profile = not st.session_state.get('show_profile', False)
+                    right_cols[0].button(f"👤 {username}", use_container_width=True, key="profile_btn",
+                                         type="primary" if st.session_state.get('show_profile') else "secondary",
+                                         on_click=UIManager._toggle_profile)
                     
-                    if right_cols[2].button("🚪 Logout", use_container_width=True, key="logout_btn"):
-                        AuthManager.logout()
-                        st.session_state.current_page = "home"
-                        st.session_state.show_profile = False
-                        st.query_params['logout'] = 'true'
-                        st.rerun()
+                    right_cols[2].button("🚪 Logout", use_container_width=True, key="logout_btn",
+                                         on_click=UIManager._logout)
                 
             # Render Profile Details if toggled
             if st.session_state.get('show_profile', False) and AuthManager.is_authenticated():
@@ -289,19 +282,54 @@ class UIManager:
                     p_col1.markdown(f"**Username:** {user.get('username', 'N/A')}")
                     role = user.get('role', 'user')
                     p_col2.markdown(f"**Role:** {str(role).capitalize() if role else 'User'}")
-                    if st.button("Close Profile", use_container_width=True):
-                        st.session_state.show_profile = False
-                        st.rerun()
+                    st.button("Close Profile", use_container_width=True, on_click=UIManager._toggle_profile)
         
         return st.session_state.current_page
     
     @staticmethod
+    def go_to(page):
+        """Navigation callback: runs before the rerun, so a click costs one script run."""
+        st.session_state.current_page = page
+
+    @staticmethod
+    def _toggle_profile():
+        st.session_state.show_profile = not st.session_state.get('show_profile', False)
+
+    @staticmethod
+    def _logout():
+        from utils.auth_manager import AuthManager
+        AuthManager.logout()
+        st.session_state.current_page = "home"
+        st.session_state.show_profile = False
+        st.query_params['logout'] = 'true'
+
+    @staticmethod
+    @st.cache_data(show_spinner=False)
+    def _read_text_file(file_path):
+        """Read a static asset once per process instead of on every rerun."""
+        if not os.path.exists(file_path):
+            return ""
+        with open(file_path) as f:
+            return f.read()
+
+    @staticmethod
+    @st.cache_data(show_spinner=False)
     def _get_image_base64(image_path):
         """Convert image to base64 for inline display."""
         import base64
         with open(image_path, "rb") as img_file:
             return base64.b64encode(img_file.read()).decode()
     
+    @staticmethod
+    @st.fragment(run_every=DataManager.LIVE_REFRESH_SECONDS)
+    def render_live_updates():
+        """
+        Poll the change feed on a timer and rerun the page only when other
+        sessions changed reports, so idle ticks cost O(1) instead of a reload.
+        """
+        if DataManager.sync():
+            st.rerun(scope="app")
+
     @staticmethod
     def render_header():
         """Deprecated - kept for compatibility."""
@@ -339,12 +367,49 @@ class UIManager:
     <div style="margin-top:1px; font-size: 0.8rem; opacity: 0.7;">
         {location_display} | <b>{report['status']}</b>
     </div>
-    <p style="font-size: 0.9rem; margin-top: var(--space-4); border-top:1px solid var(--border-color); padding-top:var(--space-2);">{report['description']}</p>
+    <p style="font-size: 0.9rem; margin-top: var(--space-4); border-top:1px solid var(--border-color); padding-top:var(--space-2);">{report['description']}</p>{UIManager._photos_html(report, "detail")}
 </div>
 """
         st.markdown(textwrap.dedent(card_html).strip(), unsafe_allow_html=True)
     
     @staticmethod
+    def _photos_html(report, variant, limit=None):
+        """
+        Image tags for a report's photos. Images are referenced by URL from
+        the media store (never inlined as base64) and load lazily. Returns a
+        single line so it can sit inside the card HTML without a blank line,
+        which Markdown would treat as the end of the HTML block.
+        """
+        photos = report.get('photos') or ()
+        if not photos:
+            return ""
+        store = DataManager.get_media_store()
+        imgs = "".join(
+            f'<img src="{store.url(ref, variant)}" loading="lazy" class="report-photo" alt="Report photo">'
+            for ref in list(photos)[:limit]
+        )
+        return f'<div class="report-photos">{imgs}</div>'
+
+    @staticmethod
+    def render_pager(state_key, page, pages):
+        """Newer/Older buttons for a paged list whose page number lives in st.session_state[state_key]."""
+        col_newer, col_page, col_older = st.columns([1, 2, 1])
+        with col_newer:
+            st.button("⬅️ Newer", key=f"{state_key}_newer", disabled=page == 0, use_container_width=True,
+                      on_click=UIManager._set_state, args=(state_key, page - 1))
+        with col_page:
+            st.markdown(f'<div style="text-align:center; opacity:0.7;">Page {page + 1} of {pages}</div>',
+                        unsafe_allow_html=True)
+        with col_older:
+            st.button("Older ➡️", key=f"{state_key}_older", disabled=page >= pages - 1, use_container_width=True,
+                      on_click=UIManager._set_state, args=(state_key, page + 1))
+
+    @staticmethod
+    def _set_state(key, value):
+        st.session_state[key] = value
+
+    @staticmethod
+    @Profiler.timed("UIManager.render_report_cards_grid")
     def render_report_cards_grid(reports, columns=4):
         """Renders report cards in a grid format with Boss Level aesthetics."""
         if not reports:
@@ -361,7 +426,7 @@ class UIManager:
 
             card = f'''
 <div class="card-item">
-    <div class="report-card-grid fade-in {'resolved' if report['status'] == 'Resolved' else ''}">
+    <div class="report-card-grid fade-in {'resolved' if report['status'] == 'Resolved' else ''}">{UIManager._photos_html(report, "card", limit=1)}
         <div style="display:flex; justify-content:space-between; align-items:flex-start;">
             <h4 style="margin:0; font-size: 0.95rem; line-height:1.3;">{icon} {report['title']}</h4>
             <span style="font-size: 0.65rem; font-weight:600; opacity: 0.6;">#{report['id']}</span>
@@ -383,6 +448,7 @@ class UIManager:
         st.markdown('\n'.join(cards_html), unsafe_allow_html=True)
 
     @staticmethod
+    @Profiler.timed("UIManager.render_footer")
     def render_footer():
         """Renders a simple, elegant 'Boss Level' footer with logo."""
         logo_path = "logo/logo.png"
@@ -0,0 +1,62 @@
+"""
+Per-user submissions view for NagarNirman
+The reports one user submitted, kept by DataManager as the store changes,
+so the My Submissions page renders its card grid and table without
+scanning every report or rebuilding a DataFrame on each rerun.
+"""
+
+
+class UserReports:
+    """
+    Materialised "My Submissions" view of one user.
+
+    Holds the user's Report records (shared with the session's report list,
+    so in-place changes show up in the cards) and the display table, built
+    once and patched on status changes. `version` is the session's store
+    version the view reflects; DataManager rebuilds a view whose version
+    falls behind.
+    """
+
+    # Table columns and the report fields they show
+    COLUMNS = (("Id", "id"), ("Title", "title"), ("Category", "category"), ("Date", "date"),
+               ("Status", "status"), ("Division", "division"), ("District", "district"))
+
+    def __init__(self, username, reports, version):
+        self.username = username
+        self.version = version
+        self._reports = list(reports)
+        self._rows = {r['id']: i for i, r in enumerate(self._reports)}
+        self._newest = None
+        self._frame = None
+
+    def __len__(self):
+        return len(self._reports)
+
+    def add(self, report):
+        self._rows[report['id']] = len(self._reports)
+        self._reports.append(report)
+        self._newest = None
+        # Rebuilt by the next frame() call; only the user's own rows
+        self._frame = None
+
+    def update(self, report):
+        """Reflect a status change of one of the user's reports."""
+        row = self._rows.get(report['id'])
+        if row is not None and self._frame is not None:
+            self._frame.iat[row, self._frame.columns.get_loc("Status")] = report['status']
+
+    def newest(self):
+        """The user's reports, newest first."""
+        if self._newest is None:
+            self._newest = self._reports[::-1]
+        return self._newest
+
+    def frame(self):
+        """The My Submissions table, oldest first."""
+        if self._frame is None:
+            # Deferred like in ReportColumns: only the table tab needs pandas
+            import pandas as pd
+            data = {label: [r.get(name) for r in self._reports] for label, name in self.COLUMNS}
+            data["Date"] = pd.to_datetime(data["Date"], errors="coerce")
+            self._frame = pd.DataFrame(data)
+        return self._frame
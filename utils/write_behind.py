@@ -0,0 +1,185 @@
+"""
+Write-behind persistence for NagarNirman
+In write-behind mode (NN_WRITE_MODE=behind) a report change is published to
+the other sessions and queued, and the rerun carries on without waiting for
+the disk. A writer thread drains the queue in group commits: every partition
+touched by the queued changes is read, patched and written once per commit,
+however many changes it received.
+
+Durability, i.e. what a crash can lose after the UI confirmed a change:
+- Process crash or kill: the changes still queued or being written, normally
+  the last few milliseconds' worth (up to max_pending under overload).
+  Partitions are replaced by rename, so none is ever left half-written.
+- Power loss or OS crash, depending on the fsync policy:
+    always:   the same as a process crash; every group commit is fsynced.
+    interval: also what was written since the last fsync, at most
+              `interval` seconds' worth.
+    count:    also what was written since the last fsync, at most `count`
+              changes (or `interval` seconds once the queue goes idle).
+  Between fsyncs a power loss can also leave a partition empty on
+  filesystems that don't order renames after data; loading it then
+  restores it from backup like any corrupt store file.
+- Clean shutdown: close() (run at interpreter exit) writes and fsyncs
+  everything.
+DataManager reserves report ids in fsynced blocks in this mode, so an id
+shown to a user is never handed out again after a crash.
+"""
+
+import atexit
+import queue
+import threading
+import time
+
+from utils.metrics import Metrics
+
+
+class WriteBehind:
+    """Bounded change queue drained by one writer thread in group commits."""
+
+    POLICIES = ("always", "interval", "count")
+    # Jobs taken into one group commit at most
+    MAX_BATCH = 1000
+    # Seconds to wait before retrying a group commit that failed
+    RETRY_SECONDS = 1.0
+
+    def __init__(self, load, save, key_of, sync, policy="always", interval=1.0, count=100,
+                 max_pending=10_000):
+        """
+        Args:
+            load: key -> list of report dicts currently stored in that partition.
+            save: ({key: [report dicts]}, fsync: bool) -> None; replaces partitions.
+            key_of: report dict -> its partition key.
+            sync: keys -> None; fsyncs partitions saved with fsync=False.
+            policy, interval, count: when written partitions are fsynced (see module docstring).
+            max_pending: queued changes before submit() blocks the caller.
+        """
+        if policy not in WriteBehind.POLICIES:
+            raise ValueError(f"Unknown fsync policy: {policy}")
+        self._load, self._save, self._key_of, self._sync = load, save, key_of, sync
+        self.policy, self.interval, self.count = policy, interval, count
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._submit_lock = threading.Lock()
+        self._cond = threading.Condition()
+        # Jobs accepted / written so far (jobs are written in submission order)
+        self._submitted = 0
+        self._written = 0
+        # Partitions written, and changes in them, since the last fsync
+        self._unsynced = set()
+        self._unsynced_changes = 0
+        self._last_sync = time.monotonic()
+        self.commits = 0
+        self.error = None
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    @property
+    def pending(self):
+        """Changes accepted but not written yet."""
+        return self._submitted - self._written
+
+    def submit(self, changes, partitions):
+        """
+        Queue (kind, data) change-feed events touching `partitions`.
+        Blocks while max_pending changes are already queued.
+        """
+        with self._submit_lock:
+            self._queue.put((list(changes), set(partitions)))
+            self._submitted += 1
+        Metrics.write_queue_depth.set(self._queue.qsize())
+
+    def flush(self, durable=False, timeout=None):
+        """
+        Wait until every change submitted before the call has been written
+        (and fsynced, if `durable`). Returns False on timeout.
+        """
+        with self._submit_lock:
+            target = self._submitted
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._written >= target, timeout):
+                return False
+            if durable:
+                self._fsync()
+        return True
+
+    def close(self):
+        """Write and fsync everything queued (run at interpreter exit)."""
+        self.flush(durable=True, timeout=30)
+
+    def _run(self):
+        while True:
+            try:
+                # Wake up when idle to fsync what the policy has left unsynced
+                job = self._queue.get(timeout=self.interval if self._unsynced else None)
+            except queue.Empty:
+                with self._cond:
+                    self._fsync()
+                continue
+            batch = [job]
+            while len(batch) < WriteBehind.MAX_BATCH:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            while True:
+                try:
+                    with self._cond:
+                        self._commit(batch)
+                    break
+                except Exception as e:
+                    # Keep the batch and retry; the queue fills up and submitters wait meanwhile
+                    self.error = e
+                    Metrics.write_errors.inc(store="reports")
+                    time.sleep(WriteBehind.RETRY_SECONDS)
+            self.error = None
+            with self._cond:
+                self._written += len(batch)
+                self._cond.notify_all()
+            Metrics.write_queue_depth.set(self._queue.qsize())
+
+    def _commit(self, batch):
+        """Apply a batch of jobs to the partitions they touch and save each partition once."""
+        partitions = {}
+
+        def partition(key):
+            if key not in partitions:
+                partitions[key] = {r['id']: r for r in self._load(key)}
+            return partitions[key]
+
+        changed = 0
+        for changes, keys in batch:
+            for kind, data in changes:
+                changed += 1
+                if kind == 'add':
+                    partition(self._key_of(data['report']))[data['id']] = data['report']
+                elif kind == 'status':
+                    for key in keys:
+                        reports = partition(key)
+                        if data['id'] in reports:
+                            reports[data['id']] = dict(reports[data['id']], status=data['status'],
+                                                       resolved_at=data.get('resolved_at'))
+                elif kind == 'archive':
+                    for key in keys:
+                        reports = partition(key)
+                        for report_id in data['ids']:
+                            reports.pop(report_id, None)
+            # Touched partitions are written even if empty (e.g. all archived)
+            for key in keys:
+                partition(key)
+
+        fsync = self.policy == "always"
+        self._save({key: [reports[i] for i in sorted(reports)] for key, reports in partitions.items()}, fsync)
+        self.commits += 1
+        if not fsync:
+            self._unsynced.update(partitions)
+            self._unsynced_changes += changed
+            if ((self.policy == "interval" and time.monotonic() - self._last_sync >= self.interval)
+                    or (self.policy == "count" and self._unsynced_changes >= self.count)):
+                self._fsync()
+
+    def _fsync(self):
+        if self._unsynced:
+            self._sync(sorted(self._unsynced))
+        self._unsynced = set()
+        self._unsynced_changes = 0
+        self._last_sync = time.monotonic()
@@ -1,4 +1,5 @@
 import streamlit as st
+from utils.profiler import Profiler
 import textwrap
 
 TEAM_MEMBERS = [
@@ -77,6 +78,7 @@ TEAM_MEMBERS = [
 ]
 
 
+@Profiler.timed("about.show_about_page")
 def show_about_page():
     # Hero / Intro block with CTA and quick stats
     hero = textwrap.dedent("""
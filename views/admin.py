@@ -1,11 +1,48 @@
+"""
+Authority Dashboard page.
+
+Rerun contract:
+- division scope: picking a division reloads only that division's
+  partition for this session (a full app rerun, like navigation).
+- status panel: its inputs rerun only the panel; "Apply Update"
+  writes through DataManager and then requests a full app rerun so the
+  metrics, table and audit feed pick up the change.
+- export panel: generating or downloading the PDF reruns only the panel.
+- diagnostics panel: picking a run or exporting the trace reruns only the panel.
+- archive panel: searching and exporting archived reports reruns only the
+  panel; "Archive now" requests a full app rerun when reports were moved.
+- audit feed: paging, jumping to an id and opening a record rerun only
+  the feed.
+- triage panel: changing how many reports it lists reruns only the panel.
+- routes panel: editing the roster and planning rerun only the panel; the
+  plan runs as a background job that a timer fragment polls, and a full
+  app rerun shows it once it is ready (as does "Assign routes", which
+  dispatches reports).
+- metrics and case table rerun only on a full app rerun (so does paging
+  the case table).
+- live updates: a timer fragment polls the change feed and requests a full
+  rerun only when another session changed reports.
+"""
+
 import streamlit as st
-import pandas as pd
 import base64
 from datetime import datetime
 from utils.data_manager import DataManager
 from utils.auth_manager import AuthManager
 from utils.ui_manager import UIManager
+from utils.profiler import Profiler
+from utils.archive import ReportArchive
+from utils.location_data import get_divisions
+from utils.assignment import Assignments
+
+# Audit records per page
+AUDIT_PAGE_SIZE = 25
+# Case table rows per page
+CASE_PAGE_SIZE = 50
+# How often the routes panel checks on a planning job
+ROUTE_POLL_SECONDS = 1
 
+@Profiler.timed("admin.show_admin_page")
 def show_admin_page():
     """Authority Dashboard with WOW Version analytics and management tools."""
     st.markdown('<div class="fade-in">', unsafe_allow_html=True)
@@ -22,7 +59,14 @@ def show_admin_page():
             <p style="font-size:1.1rem; opacity:0.8; letter-spacing:0.02em;">Administrative control center for urban infrastructure management.</p>
         </div>
     """, unsafe_allow_html=True)
+
+    divisions = get_divisions()
+    scope = DataManager.get_division_scope()
+    st.selectbox("Division scope", ["All divisions"] + divisions,
+                 index=divisions.index(scope) + 1 if scope in divisions else 0,
+                 key="admin_division_scope", on_change=_apply_division_scope)
     
+    UIManager.render_live_updates()
     reports = DataManager.get_all_reports()
     
     if not reports:
@@ -32,8 +76,9 @@ def show_admin_page():
     
     # BOSS Metrics Row
     m_col1, m_col2, m_col3, m_col4 = st.columns(4)
-    total = len(reports)
-    resolved = sum(1 for r in reports if r["status"] == "Resolved")
+    # Totals include archived reports via the archive rollups
+    total = DataManager.count_reports()
+    resolved = DataManager.count_reports("status", "Resolved")
     pending = total - resolved
     efficiency = (resolved/total*100) if total > 0 else 0
     
@@ -48,86 +93,397 @@ def show_admin_page():
 
     st.markdown('<div style="margin-top: var(--space-10);"></div>', unsafe_allow_html=True)
 
+    # What to send crews to first, and who goes where
+    _triage_panel()
+    _routes_panel()
+
     # Management & Export
     col_list, col_act = st.columns([7, 3])
     
     with col_list:
         st.markdown("### 🛠️ Active Case Management")
-        df = pd.DataFrame(reports)
-        cols = ['id', 'title', 'category', 'status', 'date']
-        # The dataframe container is styled via global CSS
-        st.dataframe(df[cols], use_container_width=True, hide_index=True)
+        _case_table(len(reports))
         
         # BOSS Export Section
-        st.markdown('<div style="margin-top: var(--space-6);"></div>', unsafe_allow_html=True)
-        
-        export_content = """
-            <div style="display: flex; align-items: center; gap: var(--space-4); margin-bottom: var(--space-4);">
-                <div style="font-size: 2rem;">📋</div>
-                <div>
-                    <strong style="font-size: 1.1rem; display: block; color: var(--color-primary);">System-Wide Intelligence Report</strong>
-                    <span style="font-size: 0.85rem; opacity: 0.8;">Generate a high-fidelity PDF containing all active and resolved infrastructure reports.</span>
-                </div>
-            </div>
-        """
-        UIManager.render_wow_card(export_content)
-        
-        # Lazy generation: generate PDF only when admin clicks the button.
-        # Add a small spacer so the button isn't flush against the card above.
-        st.markdown('<div style="height:18px"></div>', unsafe_allow_html=True)
-        if st.button("📥 Generate & Download System Report (PDF)", use_container_width=True, type="primary", key="admin_generate_download"):
-            pdf_data = DataManager.generate_reports_pdf(reports)
-            if pdf_data:
-                try:
-                    filename = f"NagarNirman_Report_{datetime.now().strftime('%Y%m%d')}.pdf"
-                    # Provide a direct download button (reliable) and a backup anchor link
-                    st.download_button(
-                        label="📥 Download System Report (PDF)",
-                        data=pdf_data,
-                        file_name=filename,
-                        mime="application/pdf",
-                        use_container_width=True,
-                        key="admin_download_btn_generated"
-                    )
-
-                    # Base64 link as a visible fallback (some browsers/clients may prefer it)
-                    try:
-                        b64 = base64.b64encode(pdf_data).decode('ascii')
-                        dl_html = f'<div style="margin-top:8px"><a href="data:application/pdf;base64,{b64}" download="{filename}">Click here if download does not start</a></div>'
-                        st.markdown(dl_html, unsafe_allow_html=True)
-                    except Exception:
-                        # If base64 encoding fails for very large files, skip the anchor fallback.
-                        pass
-
-                    st.success("PDF ready — use the button above to download.")
-                except Exception as e:
-                    st.error(f"Failed to prepare download: {e}")
-            else:
-                st.info("Preparing PDF engine... If this persists, please contact system admin.")
+        _export_panel()
         
     with col_act:
-        st.markdown("### 🔄 Update Status")
-        status_form_html = """
-            <div style="padding: var(--space-1); line-height:1.6; opacity:0.9; margin-bottom:var(--space-4);">
-                Select a report ID to modify its current system status. Changes are reflected immediately across the platform.
-            </div>
-        """
-        UIManager.render_wow_card(status_form_html)
-        
-        report_ids = [str(r['id']) for r in reports]
-        selected_id = st.selectbox("Assign ID", report_ids)
-        new_status = st.selectbox("New Status", ["Pending", "In Progress", "Resolved"])
-        
-        if st.button("💾 Apply Update", use_container_width=True, type="primary"):
-            if DataManager.update_status(int(selected_id), new_status):
-                st.success(f"Report #{selected_id} updated.")
-                st.rerun()
+        _status_panel()
+
+    # Rerun diagnostics (timing spans, counters, sampled profiles)
+    st.markdown('<div style="margin-top: var(--space-8);"></div>', unsafe_allow_html=True)
+    _diagnostics_panel()
+    _archive_panel()
 
     # Detailed Audit Feed
     st.markdown('<div style="margin-top: var(--space-12);"></div>', unsafe_allow_html=True)
     st.markdown("## 📄 Detailed Audit Records")
-    for report in reversed(reports):
-        with st.expander(f"Audit #{report['id']} - {report['title']} ({report['status']})"):
-            UIManager.render_report_card(report)
+    _audit_feed()
     
     st.markdown('</div>', unsafe_allow_html=True) # End fade-in
+
+
+@Profiler.timed("admin._case_table")
+def _case_table(total):
+    """Working-set reports, newest first, one page at a time so only that page is sent."""
+    pages = max(1, -(-total // CASE_PAGE_SIZE))
+    page = min(st.session_state.get("case_page", 0), pages - 1)
+    cols = ['id', 'title', 'category', 'status', 'date']
+    # The dataframe container is styled via global CSS
+    st.dataframe([{c: r.get(c) for c in cols} for r in DataManager.get_reports_page(page, CASE_PAGE_SIZE)],
+                 use_container_width=True, hide_index=True)
+    UIManager.render_pager("case_page", page, pages)
+
+
+@st.fragment
+@Profiler.timed("admin._audit_feed")
+def _audit_feed():
+    """
+    Audit records, newest first, one page at a time. A record shows only its
+    header row until it is opened, so the feed costs the same however many
+    reports there are.
+    """
+    total = len(DataManager.get_all_reports())
+    pages = max(1, -(-total // AUDIT_PAGE_SIZE))
+    page = min(st.session_state.get("audit_page", 0), pages - 1)
+    opened = st.session_state.setdefault("audit_open", set())
+
+    col_jump, col_go = st.columns([4, 1], vertical_alignment="bottom")
+    with col_jump:
+        st.number_input("Jump to report #", min_value=1, step=1, value=None, key="audit_jump")
+    with col_go:
+        st.button("🔎 Go", key="audit_go", use_container_width=True, on_click=_jump_to_report)
+    missing = st.session_state.get("audit_missing")
+    if missing:
+        st.warning(f"Report #{missing} is not in the working set: it may be archived, "
+                   "outside the division scope, or not exist.")
+
+    for report in DataManager.get_reports_page(page, AUDIT_PAGE_SIZE):
+        is_open = report['id'] in opened
+        st.button(f"{'▾' if is_open else '▸'} Audit #{report['id']} - {report['title']} ({report['status']})",
+                  key=f"audit_{report['id']}", use_container_width=True,
+                  on_click=_toggle_audit_record, args=(report['id'],))
+        if is_open:
+            UIManager.render_report_card(report)
+    UIManager.render_pager("audit_page", page, pages)
+
+
+@st.fragment
+@Profiler.timed("admin._triage_panel")
+def _triage_panel():
+    """Pending reports to dispatch first, by triage score (see utils/triage.py)."""
+    with st.expander("🚨 Triage: next reports to dispatch", expanded=True):
+        count = st.select_slider("Show", options=[5, 10, 25, 50], value=10, key="triage_count")
+        picked = DataManager.get_next_to_dispatch(count)
+        if not picked:
+            st.info("No pending reports to dispatch.")
+            return
+        st.dataframe([
+            {
+                "id": report['id'],
+                "title": report['title'],
+                "category": report['category'],
+                "district": report.get('district'),
+                "score": round(score['score'], 1),
+                "waiting (days)": score['age_days'],
+                "nearby duplicates": score['duplicates'],
+                "district backlog": score['backlog'],
+                "SLA": (f"overdue {-score['sla_left']}d" if score['sla_left'] < 0
+                        else f"{score['sla_left']}d left"),
+            }
+            for report, score in picked
+        ], use_container_width=True, hide_index=True)
+        st.caption(f"{len(DataManager.get_triage_queue())} pending reports queued. Score = category severity "
+                   "+ days waiting + nearby duplicates of the same issue + open reports in the district.")
+
+
+@st.fragment
+@Profiler.timed("admin._routes_panel")
+def _routes_panel():
+    """Batch a division's pending reports into volunteer routes and hand them out."""
+    with st.expander("🧭 Volunteer routes"):
+        scope = DataManager.get_division_scope()
+        division = st.selectbox("Division", [scope] if scope else get_divisions(), key="routes_division")
+        # Volunteers have no accounts; the roster is the names the admin enters
+        roster = Assignments.roster()
+        edited = st.data_editor(
+            [{"volunteer": name, "capacity": capacity} for name, capacity in roster.items()],
+            num_rows="dynamic", use_container_width=True, hide_index=True, key="routes_roster",
+            column_config={"capacity": st.column_config.NumberColumn(
+                "capacity", min_value=1, max_value=Assignments.MAX_CAPACITY, step=1,
+                default=Assignments.DEFAULT_CAPACITY)},
+        )
+        volunteers = [(str(row["volunteer"]).strip(), int(row["capacity"] or Assignments.DEFAULT_CAPACITY))
+                      for row in edited if row.get("volunteer") and str(row["volunteer"]).strip()]
+
+        if st.button("🧭 Plan routes", key="routes_plan", disabled=not volunteers):
+            Assignments.save_roster(volunteers)
+            st.session_state.route_plan = None
+            st.session_state.route_job = DataManager.start_route_planning(division, volunteers)
+        if st.session_state.get("route_job") is not None:
+            _route_job()
+
+        plan = st.session_state.get("route_plan")
+        if plan:
+            _show_route_plan(plan)
+        assigned = st.session_state.pop("route_message", None)
+        if assigned:
+            st.success(assigned)
+
+
+@st.fragment(run_every=ROUTE_POLL_SECONDS)
+def _route_job():
+    """Wait for the planning job without blocking the page; rerun it once the plan is ready."""
+    job = DataManager.get_route_job(st.session_state.route_job)
+    if job is None or job["state"] in ("done", "failed"):
+        st.session_state.route_job = None
+        if job is None:
+            st.session_state.route_plan = {"error": "The planning job expired; plan again."}
+        elif job["state"] == "failed":
+            st.session_state.route_plan = {"error": job["error"]}
+        else:
+            st.session_state.route_plan = dict(job["result"], division=st.session_state.routes_division)
+        st.rerun(scope="app")
+    st.info("Planning routes in the background…")
+
+
+def _show_route_plan(plan):
+    if plan.get("error"):
+        st.error(f"Route planning failed: {plan['error']}")
+        return
+    # Deferred like on the dashboard: only this view needs it
+    import pydeck as pdk
+
+    routes = [route for route in plan["routes"] if route["stops"]]
+    stops = sum(len(route["stops"]) for route in routes)
+    if not routes:
+        st.info(f"No pending reports with coordinates in {plan['division']}.")
+        return
+    st.caption(f"{stops} reports in {len(routes)} routes, {sum(r['km'] for r in routes):.1f} km in all "
+               f"({sum(r['nearest_neighbour_km'] for r in routes):.1f} km before 2-opt), planned in "
+               f"{plan['seconds']:.2f} s. {len(plan['unassigned'])} pending report(s) are beyond the "
+               "crew's capacity and wait for the next round.")
+    st.dataframe([
+        {
+            "volunteer": route["volunteer"],
+            "stops": len(route["stops"]),
+            "km": route["km"],
+            "route": " → ".join(f"#{report_id}" for report_id in route["stops"][:8])
+                     + (" …" if len(route["stops"]) > 8 else ""),
+        }
+        for route in routes
+    ], use_container_width=True, hide_index=True)
+    st.pydeck_chart(pdk.Deck(
+        layers=[
+            pdk.Layer("PathLayer", data=routes, get_path="path", get_color=[255, 75, 75], width_min_pixels=2,
+                      pickable=True),
+            pdk.Layer("ScatterplotLayer", data=[{"lon": lon, "lat": lat} for r in routes for lon, lat in r["path"]],
+                      get_position=["lon", "lat"], get_radius=60, get_fill_color=[30, 30, 30, 160]),
+        ],
+        initial_view_state=pdk.ViewState(latitude=routes[0]["path"][0][1], longitude=routes[0]["path"][0][0],
+                                         zoom=9),
+        tooltip={"text": "{volunteer}: {km} km"},
+    ))
+    if st.button("✅ Assign routes", key="routes_assign", type="primary"):
+        dispatched = DataManager.assign_routes(plan["division"], routes)
+        st.session_state.route_plan = None
+        st.session_state.route_message = f"Assigned {len(routes)} route(s); {dispatched} report(s) are now In Progress."
+        # Metrics, triage queue and case table live outside this fragment
+        st.rerun(scope="app")
+
+
+def _toggle_audit_record(report_id):
+    st.session_state.audit_open ^= {report_id}
+
+
+def _jump_to_report():
+    """Open the audit page holding the requested report id, with that record expanded."""
+    report_id = st.session_state.audit_jump
+    st.session_state.audit_missing = None
+    if report_id is None:
+        return
+    row = DataManager.get_report_row(int(report_id))
+    if row is None:
+        st.session_state.audit_missing = int(report_id)
+        return
+    # Pages run newest first
+    st.session_state.audit_page = (len(DataManager.get_all_reports()) - 1 - row) // AUDIT_PAGE_SIZE
+    st.session_state.audit_open.add(int(report_id))
+
+
+def _apply_division_scope():
+    """Load only the chosen division's partition for this session."""
+    choice = st.session_state.admin_division_scope
+    DataManager.set_division_scope(None if choice == "All divisions" else choice)
+
+
+@st.fragment
+@Profiler.timed("admin._export_panel")
+def _export_panel():
+    """PDF export card; reruns on its own when the buttons are used."""
+    st.markdown('<div style="margin-top: var(--space-6);"></div>', unsafe_allow_html=True)
+
+    export_content = """
+        <div style="display: flex; align-items: center; gap: var(--space-4); margin-bottom: var(--space-4);">
+            <div style="font-size: 2rem;">📋</div>
+            <div>
+                <strong style="font-size: 1.1rem; display: block; color: var(--color-primary);">System-Wide Intelligence Report</strong>
+                <span style="font-size: 0.85rem; opacity: 0.8;">Generate a high-fidelity PDF containing all active and resolved infrastructure reports.</span>
+            </div>
+        </div>
+    """
+    UIManager.render_wow_card(export_content)
+
+    # Lazy generation: generate PDF only when admin clicks the button.
+    # Add a small spacer so the button isn't flush against the card above.
+    st.markdown('<div style="height:18px"></div>', unsafe_allow_html=True)
+    if st.button("📥 Generate & Download System Report (PDF)", use_container_width=True, type="primary", key="admin_generate_download"):
+        pdf_data = DataManager.generate_reports_pdf(DataManager.get_all_reports())
+        if pdf_data:
+            try:
+                filename = f"NagarNirman_Report_{datetime.now().strftime('%Y%m%d')}.pdf"
+                # Provide a direct download button (reliable) and a backup anchor link
+                st.download_button(
+                    label="📥 Download System Report (PDF)",
+                    data=pdf_data,
+                    file_name=filename,
+                    mime="application/pdf",
+                    use_container_width=True,
+                    key="admin_download_btn_generated"
+                )
+
+                # Base64 link as a visible fallback (some browsers/clients may prefer it)
+                try:
+                    b64 = base64.b64encode(pdf_data).decode('ascii')
+                    dl_html = f'<div style="margin-top:8px"><a href="data:application/pdf;base64,{b64}" download="{filename}">Click here if download does not start</a></div>'
+                    st.markdown(dl_html, unsafe_allow_html=True)
+                except Exception:
+                    # If base64 encoding fails for very large files, skip the anchor fallback.
+                    pass
+
+                st.success("PDF ready — use the button above to download.")
+            except Exception as e:
+                st.error(f"Failed to prepare download: {e}")
+        else:
+            st.info("Preparing PDF engine... If this persists, please contact system admin.")
+
+
+@st.fragment
+@Profiler.timed("admin._status_panel")
+def _status_panel():
+    """Status update form; selectbox changes rerun only this panel."""
+    st.markdown("### 🔄 Update Status")
+    status_form_html = """
+        <div style="padding: var(--space-1); line-height:1.6; opacity:0.9; margin-bottom:var(--space-4);">
+            Enter a report ID to modify its current system status. Changes are reflected immediately across the platform.
+        </div>
+    """
+    UIManager.render_wow_card(status_form_html)
+
+    # Typed rather than picked from a list of every id
+    selected_id = st.number_input("Assign ID", min_value=1, step=1, value=None, key="status_report_id")
+    new_status = st.selectbox("New Status", ["Pending", "In Progress", "Resolved"])
+
+    if st.button("💾 Apply Update", use_container_width=True, type="primary"):
+        if selected_id is None:
+            st.warning("Enter a report ID first.")
+        elif DataManager.update_status(int(selected_id), new_status):
+            # Shown by the next run: the app rerun below clears this one
+            st.session_state.status_message = f"Report #{selected_id} updated."
+            # Metrics, table and audit feed live outside this fragment
+            st.rerun(scope="app")
+        else:
+            st.warning(f"Report #{selected_id} is not in the working set: it may be archived, "
+                       "outside the division scope, or not exist.")
+    updated = st.session_state.pop("status_message", None)
+    if updated:
+        st.success(updated)
+
+
+@st.fragment
+def _diagnostics_panel():
+    """Recent reruns from every session, with spans, counters and sampled profiles."""
+    with st.expander("🩺 Diagnostics: recent reruns"):
+        runs = Profiler.recent_runs()
+        if not runs:
+            st.info("No reruns recorded yet.")
+            return
+
+        st.dataframe([
+            {
+                "time": datetime.fromtimestamp(run["start"]).strftime("%H:%M:%S"),
+                "page": run["name"],
+                "status": run["status"],
+                "ms": round(run["duration_ms"], 1),
+                "markdown KB": round(run["counters"].get("markdown_bytes", 0) / 1024, 1),
+                "profiled": run["profile"] is not None,
+            }
+            for run in runs
+        ], use_container_width=True, hide_index=True)
+
+        index = st.selectbox("Inspect run", range(len(runs)),
+                             format_func=lambda i: f"{runs[i]['name']} ({runs[i]['duration_ms']:.0f} ms)",
+                             key="diagnostics_run")
+        run = runs[index]
+        spans = sorted(run["spans"], key=lambda span: span["duration_ms"], reverse=True)
+        st.dataframe([{"span": span["name"], "ms": round(span["duration_ms"], 2), "depth": span["depth"]}
+                      for span in spans], use_container_width=True, hide_index=True)
+        st.json(run["counters"], expanded=False)
+        if run["profile"]:
+            st.code(run["profile"], language="text")
+        else:
+            st.caption(f"cProfile sampling rate: {Profiler.SAMPLE_RATE:.0%} (set NN_PROFILE_SAMPLE to enable).")
+
+        st.download_button("⬇️ Export trace (Chrome trace format)", data=Profiler.export_trace(runs),
+                           file_name=f"nagarnirman_trace_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+                           mime="application/json", key="diagnostics_trace")
+
+
+@st.fragment
+@Profiler.timed("admin._archive_panel")
+def _archive_panel():
+    """Search, export and run the archive of long-resolved reports."""
+    with st.expander(f"🗄️ Archive: {ReportArchive.count()} resolved reports in cold storage"):
+        st.caption(f"Reports resolved for {ReportArchive.ARCHIVE_AFTER_DAYS}+ days leave the working set "
+                   "automatically; they still count towards the totals above.")
+
+        col_text, col_division, col_from, col_to = st.columns([4, 2, 2, 2])
+        with col_text:
+            text = st.text_input("Search title/description, or #id", key="archive_text")
+        with col_division:
+            divisions = sorted(d for d in ReportArchive.totals()["division"] if d)
+            division = st.selectbox("Division", ["All"] + divisions, key="archive_division")
+        with col_from:
+            date_from = st.date_input("From", value=None, key="archive_from")
+        with col_to:
+            date_to = st.date_input("To", value=None, key="archive_to")
+
+        if st.button("🔎 Search Archive", key="archive_search"):
+            st.session_state.archive_results = DataManager.search_archive(
+                text,
+                date_from=date_from.strftime("%Y-%m-%d") if date_from else None,
+                date_to=date_to.strftime("%Y-%m-%d") if date_to else None,
+                division=None if division == "All" else division,
+            )
+
+        results = st.session_state.get("archive_results")
+        if results is not None:
+            st.caption(f"{len(results)} match(es)")
+            if results:
+                cols = ['id', 'title', 'category', 'division', 'district', 'date', 'resolved_at']
+                st.dataframe([{c: r.get(c) for c in cols} for r in results],
+                             use_container_width=True, hide_index=True)
+                if st.button("📥 Export Matches (PDF)", key="archive_export"):
+                    pdf_data = DataManager.generate_reports_pdf(results)
+                    if pdf_data:
+                        st.download_button("📥 Download Archive Report (PDF)", data=pdf_data,
+                                           file_name=f"NagarNirman_Archive_{datetime.now().strftime('%Y%m%d')}.pdf",
+                                           mime="application/pdf", key="archive_download")
+
+        if st.button("🗄️ Archive Now", key="archive_run"):
+            moved = DataManager.archive_resolved()
+            st.success(f"Archived {moved} report(s).")
+            if moved:
+                st.session_state.archive_results = None
+                # Metrics, table and audit feed live outside this fragment
+                st.rerun(scope="app")
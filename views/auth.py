@@ -1,6 +1,8 @@
 import streamlit as st
 from utils.auth_manager import AuthManager
+from utils.profiler import Profiler
 
+@Profiler.timed("auth.show_login_page")
 def show_login_page():
     """Display the login form with Boss Level UI."""
     st.markdown('<div class="fade-in auth-container">', unsafe_allow_html=True)
@@ -40,6 +42,7 @@ def show_login_page():
     st.markdown('</div>', unsafe_allow_html=True) # End auth-container
 
 
+@Profiler.timed("auth.show_register_page")
 def show_register_page():
     """Display the registration form with Boss Level UI."""
     st.markdown('<div class="fade-in auth-container" style="max-width:600px;">', unsafe_allow_html=True)
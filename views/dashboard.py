@@ -1,8 +1,29 @@
+"""
+City Overview page.
+
+Rerun contract: the page is split into fragments that read their data from
+DataManager themselves, so each one can be rerun independently.
+- metrics and insights have no widgets of their own; they rerun only on a
+  full app rerun (navigation, theme toggle, login/logout).
+- map: switching between points and the district heatmap, or the heatmap's
+  category, reruns only the map.
+- feed: its page buttons rerun only the feed.
+- live updates: a timer fragment polls the change feed and requests a full
+  rerun only when another session changed reports.
+Navbar clicks change the page and therefore always trigger a full rerun.
+"""
+
 import streamlit as st
-import pandas as pd
 from utils.data_manager import DataManager
 from utils.ui_manager import UIManager
+from utils.profiler import Profiler
+
+# Reports per page of the issue feed
+FEED_PAGE_SIZE = 20
+# Centre of Bangladesh, where the district heatmap opens
+COUNTRY_VIEW = {"latitude": 23.685, "longitude": 90.3563, "zoom": 6}
 
+@Profiler.timed("dashboard.show_dashboard")
 def show_dashboard():
     st.markdown('<div class="fade-in">', unsafe_allow_html=True)
     
@@ -14,6 +35,7 @@ def show_dashboard():
         </div>
     """, unsafe_allow_html=True)
     
+    UIManager.render_live_updates()
     reports = DataManager.get_all_reports()
     
     # Validation for Empty Data
@@ -22,18 +44,8 @@ def show_dashboard():
         st.markdown('</div>', unsafe_allow_html=True)
         return
 
-    # BOSS Metrics Row
-    m_col1, m_col2, m_col3 = st.columns(3)
-    total = len(reports)
-    resolved = sum(1 for r in reports if r["status"] == "Resolved")
-    pending = total - resolved
-    
-    with m_col1:
-        UIManager.render_custom_metric("Total Reports", total, "🌍")
-    with m_col2:
-        UIManager.render_custom_metric("Resolved Cases", resolved, "✅")
-    with m_col3:
-        UIManager.render_custom_metric("Active Issues", pending, "⏳")
+    # Each section is a fragment so it can rerun on its own (see module docstring)
+    _metrics_fragment()
 
     st.markdown('<div style="margin-top: var(--space-8);"></div>', unsafe_allow_html=True)
 
@@ -41,30 +53,107 @@ def show_dashboard():
     col_map, col_stat = st.columns([7.5, 2.5])
     
     with col_map:
-        st.markdown("### 📍 Issue Hotspots")
-        df = pd.DataFrame(reports)
-        # The map is styled automatically via CSS targeting the iframe container
-        st.map(df, zoom=11, size=30, color="#FF4B4B")
+        _map_fragment()
         
     with col_stat:
-        st.markdown("### 📊 Insights")
-        resolved_rate = (resolved/total)*100 if total > 0 else 0
-        
-        insight_html = f"""
-            <div style="padding: var(--space-2);">
-                <div style="font-size: 0.9rem; opacity:0.7; margin-bottom:var(--space-2);">RESOLUTION RATE</div>
-                <div style="font-size: 2.5rem; font-weight:800; color:var(--color-primary);">{resolved_rate:.1f}%</div>
-                <div style="margin-top: var(--space-4); font-size:0.85rem; line-height:1.4;">
-                    Our commitment to a better city is reflected in every resolved case.
-                </div>
-            </div>
-        """
-        UIManager.render_wow_card(insight_html)
-        st.progress(resolved_rate/100)
+        _insights_fragment()
 
     # Recent Reports Feed
     st.markdown('<div style="margin-top: var(--space-10);"></div>', unsafe_allow_html=True)
-    st.markdown("## 📝 Global Issue Feed")
-    UIManager.render_report_cards_grid(list(reversed(reports)), columns=4)
+    _feed_fragment()
     
     st.markdown('</div>', unsafe_allow_html=True) # End fade-in
+
+
+@st.fragment
+@Profiler.timed("dashboard._metrics_fragment")
+def _metrics_fragment():
+    """Headline counters: the columnar snapshot plus archive rollups."""
+    total = DataManager.count_reports()
+    resolved = DataManager.count_reports("status", "Resolved")
+    pending = total - resolved
+
+    m_col1, m_col2, m_col3 = st.columns(3)
+    with m_col1:
+        UIManager.render_custom_metric("Total Reports", total, "🌍")
+    with m_col2:
+        UIManager.render_custom_metric("Resolved Cases", resolved, "✅")
+    with m_col3:
+        UIManager.render_custom_metric("Active Issues", pending, "⏳")
+
+
+@st.fragment
+@Profiler.timed("dashboard._map_fragment")
+def _map_fragment():
+    """Hotspot map: every report as a point, or open issues per district as a heatmap."""
+    st.markdown("### 📍 Issue Hotspots")
+    view = st.radio("Map view", ["Reports", "Open issues by district"], horizontal=True,
+                    key="map_view", label_visibility="collapsed")
+    if view == "Reports":
+        # st.map serialises the viewport centre with json, which rejects float32
+        df = DataManager.get_reports_frame(["lat", "lon"]).astype("float64")
+        # The map is styled automatically via CSS targeting the iframe container
+        st.map(df, zoom=11, size=30, color="#FF4B4B")
+    else:
+        _district_heatmap()
+
+
+def _district_heatmap():
+    """Open issues at each district centroid, from the precomputed district counts."""
+    # Deferred like pandas: only this view needs it
+    import pydeck as pdk
+
+    counts = DataManager.get_district_counts()
+    category = st.selectbox("Category", ["All categories"] + counts.categories, key="heatmap_category")
+    rows = counts.layer(None if category == "All categories" else category)
+    districts = [r for r in rows if r["open"]]
+    st.pydeck_chart(pdk.Deck(
+        layers=[
+            pdk.Layer("HeatmapLayer", data=districts, get_position=["lon", "lat"], get_weight="open",
+                      radius_pixels=70),
+            # The heatmap can't be hovered; these invisible-ish centroids carry the tooltip
+            pdk.Layer("ScatterplotLayer", data=districts, get_position=["lon", "lat"], get_radius=6000,
+                      get_fill_color=[255, 75, 75, 60], pickable=True),
+        ],
+        initial_view_state=pdk.ViewState(**COUNTRY_VIEW),
+        tooltip={"text": "{district}, {division}: {open} open"},
+    ))
+    top = sorted(districts, key=lambda r: r["open"], reverse=True)[:3]
+    if top:
+        st.caption("Most open issues: " + ", ".join(f"{r['district']} ({r['open']})" for r in top))
+    if counts.unplaced:
+        st.caption(f"{counts.unplaced} open report(s) have a district not in divisionsData.json.")
+
+
+@st.fragment
+@Profiler.timed("dashboard._insights_fragment")
+def _insights_fragment():
+    """Resolution rate card, including archived reports."""
+    total = DataManager.count_reports()
+    resolved = DataManager.count_reports("status", "Resolved")
+
+    st.markdown("### 📊 Insights")
+    resolved_rate = (resolved/total)*100 if total > 0 else 0
+    
+    insight_html = f"""
+        <div style="padding: var(--space-2);">
+            <div style="font-size: 0.9rem; opacity:0.7; margin-bottom:var(--space-2);">RESOLUTION RATE</div>
+            <div style="font-size: 2.5rem; font-weight:800; color:var(--color-primary);">{resolved_rate:.1f}%</div>
+            <div style="margin-top: var(--space-4); font-size:0.85rem; line-height:1.4;">
+                Our commitment to a better city is reflected in every resolved case.
+            </div>
+        </div>
+    """
+    UIManager.render_wow_card(insight_html)
+    st.progress(resolved_rate/100)
+
+
+@st.fragment
+@Profiler.timed("dashboard._feed_fragment")
+def _feed_fragment():
+    """Card grid of every report, newest first, one page at a time."""
+    st.markdown("## 📝 Global Issue Feed")
+    pages = max(1, -(-len(DataManager.get_all_reports()) // FEED_PAGE_SIZE))
+    page = min(st.session_state.get("feed_page", 0), pages - 1)
+    UIManager.render_report_cards_grid(DataManager.get_reports_page(page, FEED_PAGE_SIZE), columns=4)
+    UIManager.render_pager("feed_page", page, pages)
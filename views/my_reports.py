@@ -1,9 +1,11 @@
+import html
 import streamlit as st
-import pandas as pd
 from utils.data_manager import DataManager
 from utils.auth_manager import AuthManager
 from utils.ui_manager import UIManager
+from utils.profiler import Profiler
 
+@Profiler.timed("my_reports.show_my_reports_page")
 def show_my_reports_page():
     """Display the current user's submitted reports with Boss Level UI."""
     st.markdown('<div class="fade-in">', unsafe_allow_html=True)
@@ -17,9 +19,11 @@ def show_my_reports_page():
     current_user = AuthManager.get_current_user()
     username = current_user.get('username')
 
-    # Use DataManager helper which filters by 'submitted_by' to match how
-    # reports are stored when created via `DataManager.add_report()`.
-    my_reports = DataManager.get_reports_by_user(username)
+    UIManager.render_live_updates()
+    _show_notifications(username)
+    # Cached per user and kept current by DataManager, so reruns and tab
+    # switches neither rescan the reports nor rebuild the table
+    my_reports = DataManager.get_user_reports(username)
     
     if not my_reports:
         st.info("You haven't submitted any reports yet.")
@@ -34,16 +38,27 @@ def show_my_reports_page():
     
     with tab_card:
         st.markdown('<div class="mt-4">', unsafe_allow_html=True)
-        UIManager.render_report_cards_grid(list(reversed(my_reports)), columns=4)
+        UIManager.render_report_cards_grid(my_reports.newest(), columns=4)
         st.markdown('</div>', unsafe_allow_html=True)
         
     with tab_table:
         st.markdown('<div class="glass-card mt-4">', unsafe_allow_html=True)
-        df = pd.DataFrame(my_reports)
-        # Reorder and rename columns for display
-        cols = ['id', 'title', 'category', 'date', 'status', 'division', 'district']
-        df_display = df[cols].copy()
-        df_display.columns = [c.capitalize() for c in cols]
-        st.dataframe(df_display, use_container_width=True, hide_index=True)
+        st.dataframe(my_reports.frame(), use_container_width=True, hide_index=True,
+                     column_config={"Date": st.column_config.DateColumn("Date")})
         st.markdown('</div>', unsafe_allow_html=True)
     st.markdown('</div>', unsafe_allow_html=True)
+
+
+def _show_notifications(username):
+    """Status changes to the user's reports, newest first, unread ones open."""
+    notifications = DataManager.get_notifications(username, limit=20)
+    if not notifications:
+        return
+    unread = DataManager.count_unread_notifications(username)
+    with st.expander(f"🔔 Updates ({unread} new)" if unread else "🔔 Updates", expanded=bool(unread)):
+        for n in notifications:
+            st.markdown(f"{'**🆕**' if not n['read'] else '✔️'} {html.escape(n['message'])}  \n"
+                        f"<small style='opacity:0.7'>{n['created']}</small>", unsafe_allow_html=True)
+        if unread:
+            st.button("Mark all as read", key="notifications_read",
+                      on_click=DataManager.mark_notifications_read, args=(username,))
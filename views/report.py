@@ -5,7 +5,10 @@ from utils.location_data import (
     get_divisions, get_districts, get_district_coordinates,
     get_categories, get_subcategories
 )
+from utils.profiler import Profiler
+from utils.rate_limit import RateLimits
 
+@Profiler.timed("report.show_report_page")
 def show_report_page():
     st.markdown('<div class="fade-in">', unsafe_allow_html=True)
     st.title("📢 Report an Issue")
@@ -45,6 +48,8 @@ def show_report_page():
         st.markdown("### 📝 Issue Details")
         title = st.text_input("Issue Title", placeholder="e.g., Broken Street Light at 5th Ave")
         desc = st.text_area("Description", placeholder="Describe the issue in detail...")
+        photos = st.file_uploader("Photos (optional)", type=["png", "jpg", "jpeg", "webp", "gif"],
+                                  accept_multiple_files=True)
         
         st.markdown('<div class="mt-4">', unsafe_allow_html=True)
         st.markdown("#### 🌍 Geographic Coordinates")
@@ -63,19 +68,33 @@ def show_report_page():
                 current_user = AuthManager.get_current_user()
                 username = current_user.get('username') if current_user else None
                 
-                new_id = DataManager.add_report(
-                    title=title,
-                    category=selected_category,
-                    subcategory=selected_subcategory,
-                    desc=desc,
-                    division=selected_division,
-                    district=selected_district,
-                    lat=input_lat,
-                    lon=input_lon,
-                    username=username
-                )
-                st.success(f"✅ Report #{new_id} submitted successfully!")
-                st.balloons()
+                allowed, retry_after = RateLimits.check("submit", user=username, **RateLimits.client())
+                if not allowed:
+                    st.error(RateLimits.message(retry_after))
+                else:
+                    # Photos are stored by content hash; identical uploads share one file
+                    photo_refs = []
+                    for photo in photos or []:
+                        ref, message = DataManager.save_photo(photo.getvalue())
+                        if ref:
+                            photo_refs.append(ref)
+                        else:
+                            st.warning(f"{photo.name}: {message}")
+                    
+                    new_id = DataManager.add_report(
+                        title=title,
+                        category=selected_category,
+                        subcategory=selected_subcategory,
+                        desc=desc,
+                        division=selected_division,
+                        district=selected_district,
+                        lat=input_lat,
+                        lon=input_lon,
+                        username=username,
+                        photos=photo_refs
+                    )
+                    st.success(f"✅ Report #{new_id} submitted successfully!")
+                    st.balloons()
             else:
                 st.error("Please fill in all required fields.")
     st.markdown('</div>', unsafe_allow_html=True)